@@ -1 +1,8 @@
-
+from iqm2_client import run_cli
+
+JURISDICTION = "El Cerrito"
+SUBDOMAIN = "elcerritoca"
+DOWNLOAD_DIR = "el_cerrito_agenda_packets"
+
+if __name__ == "__main__":
+    run_cli(JURISDICTION, SUBDOMAIN, DOWNLOAD_DIR)
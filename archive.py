@@ -0,0 +1,436 @@
+"""
+Sharded, compressed archive of downloaded documents.
+
+Documents are packed into size-bounded shard files under one directory.
+Each document body is compressed as an independent frame (zstd when the
+``zstandard`` package is installed, zlib otherwise), so reading one
+document means seeking to its offset and decompressing only its frame.
+Every shard has a JSON-lines index next to it:
+
+    archive/shard-00000.shard   concatenated compressed frames
+    archive/shard-00000.idx     {"name", "sha256", "offset", "length", "size", "codec", "metadata"}
+
+Identical bodies are stored once; each name pointing at them gets its own
+index line. Pack, list, read and export with:
+
+    python archive.py pack                      # documents in the manifest
+    python archive.py pack downloaded_pdfs --remove
+    python archive.py get agenda_packets/City_Council_2024_03_12.pdf -o packet.pdf
+    python archive.py export restored/
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import zlib
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Union
+
+from blob_store import sha256_file
+from manifest import DEFAULT_MANIFEST_PATH, Manifest
+from pdf_text import DEFAULT_PDF_DIRS
+
+try:
+    import zstandard
+    HAVE_ZSTD = True
+except ImportError:
+    HAVE_ZSTD = False
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+CORRUPT_FRAME_ERRORS = (zlib.error,) + ((zstandard.ZstdError,) if HAVE_ZSTD else ())
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_DIR = "archive"
+DEFAULT_SHARD_SIZE = 1024 * 1024 * 1024
+DEFAULT_LEVEL = 10
+WRITER_LOCK_FILE = ".writer.lock"
+COPY_CHUNK_SIZE = 1024 * 1024
+METADATA_FIELDS = ('jurisdiction', 'meeting_id', 'meeting_date', 'meeting_type', 'url')
+
+@dataclass
+class ArchiveEntry:
+    """Where one document lives inside the archive."""
+    name: str
+    sha256: str
+    shard: str
+    offset: int
+    length: int  # Compressed bytes in the shard
+    size: int  # Original bytes
+    codec: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+class ArchiveError(Exception):
+    """Raised for a missing document or a corrupt or unreadable frame."""
+
+def _compressor(codec: str, level: int):
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compressobj()
+    return zlib.compressobj(min(level, 9))
+
+def _decompressor(codec: str):
+    if codec == 'zstd':
+        if not HAVE_ZSTD:
+            raise ArchiveError("This archive uses zstd; install zstandard (pip install zstandard)")
+        return zstandard.ZstdDecompressor().decompressobj()
+    return zlib.decompressobj()
+
+def safe_relative_path(name: str) -> Path:
+    """
+    Turn an archived name into a relative path that stays inside an output directory.
+
+    Drive letters and leading slashes are dropped; names with ``..``
+    components are refused.
+    """
+    parts = [part for part in name.replace('\\', '/').split('/') if part not in ('', '.')]
+    if parts and parts[0].endswith(':'):
+        parts = parts[1:]  # Windows drive, e.g. "C:"
+    if not parts or '..' in parts:
+        raise ArchiveError(f"Refusing to write {name!r} outside the output directory")
+    return Path(*parts)
+
+class ShardArchive:
+    """
+    Append-only archive of documents in size-bounded compressed shards.
+
+    The archive has one writer at a time, enforced with a lock file taken
+    on the first ``add``. A shard is closed once it grows past
+    ``max_shard_size``. A single document larger than that gets a shard of
+    its own. Readers ignore bytes past the last indexed frame, which may be
+    a frame still being written; the writer cuts off such bytes (left by an
+    interrupted ``add``) before it appends to that shard.
+    """
+
+    def __init__(self, root: Union[str, Path] = DEFAULT_ARCHIVE_DIR,
+                 max_shard_size: int = DEFAULT_SHARD_SIZE, level: int = DEFAULT_LEVEL,
+                 codec: Optional[str] = None):
+        """
+        Args:
+            root: Directory holding the shards and their indexes
+            max_shard_size: Compressed bytes after which a new shard is started
+            level: Compression level (zstd 1-22, zlib up to 9)
+            codec: ``"zstd"`` or ``"zlib"`` for new documents (default: zstd if available)
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_shard_size = max_shard_size
+        self.level = level
+        self.codec = codec or ('zstd' if HAVE_ZSTD else 'zlib')
+        if self.codec == 'zstd' and not HAVE_ZSTD:
+            raise ArchiveError("zstd compression needs zstandard (pip install zstandard)")
+        self.entries: Dict[str, ArchiveEntry] = {}
+        self._by_hash: Dict[str, ArchiveEntry] = {}
+        self._shard: Optional[BinaryIO] = None
+        self._index: Optional[BinaryIO] = None
+        self._shard_name: Optional[str] = None
+        self._ends: Dict[str, int] = {}
+        self._writer_lock: Optional[BinaryIO] = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def _shard_names(self) -> List[str]:
+        return sorted(path.stem for path in self.root.glob('shard-*.shard'))
+
+    def _load(self) -> None:
+        for shard in self._shard_names():
+            end = 0
+            index_path = self.root / f"{shard}.idx"
+            if index_path.exists():
+                with open(index_path, encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            entry = ArchiveEntry(**json.loads(line))
+                        except (ValueError, TypeError):
+                            logger.warning(f"Skipping damaged index line in {index_path}")
+                            continue
+                        self.entries[entry.name] = entry
+                        self._by_hash.setdefault(entry.sha256, entry)
+                        if entry.shard == shard:
+                            # Dedup lines point into the shard that first stored the body
+                            end = max(end, entry.offset + entry.length)
+            self._ends[shard] = end
+
+    def _lock_writer(self) -> None:
+        """Take the archive's writer lock, then reload the index another writer may have extended."""
+        lock = open(self.root / WRITER_LOCK_FILE, 'a+b')
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock.close()
+            raise ArchiveError(f"{self.root} is being written by another process")
+        self._writer_lock = lock
+        self._load()
+
+    def _repair(self, shard: str) -> None:
+        """Cut off bytes past the last indexed frame of ``shard`` (an interrupted ``add``)."""
+        shard_path = self.root / f"{shard}.shard"
+        end = self._ends.get(shard, 0)
+        if shard_path.stat().st_size > end:
+            logger.warning(f"Truncating {shard_path.name} to {end} bytes (interrupted write)")
+            os.truncate(shard_path, end)
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_shard()
+            if self._writer_lock is not None:
+                self._writer_lock.close()
+                self._writer_lock = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _close_shard(self) -> None:
+        if self._shard is not None:
+            self._shard.close()
+            self._index.close()
+            self._shard = self._index = self._shard_name = None
+
+    def _writable_shard(self) -> str:
+        """Open the newest shard for appending, or start a new one when it is full."""
+        if self._shard is not None and self._shard.tell() < self.max_shard_size:
+            return self._shard_name
+        self._close_shard()
+        if self._writer_lock is None:
+            self._lock_writer()
+        names = self._shard_names()
+        name = names[-1] if names else None
+        if name is not None:
+            self._repair(name)
+        if name is None or (self.root / f"{name}.shard").stat().st_size >= self.max_shard_size:
+            name = f"shard-{len(names):05d}"
+        self._shard = open(self.root / f"{name}.shard", 'ab')
+        self._index = open(self.root / f"{name}.idx", 'ab')
+        self._shard_name = name
+        return name
+
+    def has(self, digest: str) -> bool:
+        return digest in self._by_hash
+
+    def find(self, key: str) -> ArchiveEntry:
+        """Look a document up by name or SHA-256."""
+        entry = self.entries.get(key) or self._by_hash.get(key)
+        if entry is None:
+            raise ArchiveError(f"Not in archive: {key}")
+        return entry
+
+    def add(self, source: Union[str, Path], digest: Optional[str] = None, name: Optional[str] = None,
+            metadata: Optional[Dict[str, Any]] = None) -> ArchiveEntry:
+        """
+        Pack one file, streaming it through the compressor.
+
+        A body that is already archived is not stored again; only an index
+        line for ``name`` is added.
+
+        Args:
+            source: File to pack
+            digest: Its SHA-256 if already known (e.g. from the manifest)
+            name: Name to store it under (default: ``source`` as given)
+            metadata: Meeting metadata kept in the index
+
+        Returns:
+            The index entry for ``name``.
+        """
+        source = Path(source)
+        name = name or source.as_posix()
+        digest = digest or sha256_file(source)
+        with self._lock:
+            stored = self._by_hash.get(digest)
+            shard = self._writable_shard()
+            if stored is None:
+                offset = self._shard.tell()
+                compressor = _compressor(self.codec, self.level)
+                size = 0
+                with open(source, 'rb') as f:
+                    for chunk in iter(lambda: f.read(COPY_CHUNK_SIZE), b''):
+                        size += len(chunk)
+                        self._shard.write(compressor.compress(chunk))
+                    self._shard.write(compressor.flush())
+                self._shard.flush()
+                self._ends[shard] = self._shard.tell()
+                entry = ArchiveEntry(name, digest, shard, offset, self._shard.tell() - offset,
+                                     size, self.codec, metadata or {})
+            else:
+                entry = ArchiveEntry(name, digest, stored.shard, stored.offset, stored.length,
+                                     stored.size, stored.codec, metadata or {})
+            self._index.write((json.dumps(asdict(entry)) + '\n').encode('utf-8'))
+            self._index.flush()
+            self.entries[name] = entry
+            self._by_hash.setdefault(digest, entry)
+        return entry
+
+    def iter_chunks(self, entry: ArchiveEntry) -> Iterator[bytes]:
+        """Yield the decompressed body of ``entry`` piece by piece, reading only its frame."""
+        decompressor = _decompressor(entry.codec)
+        remaining = entry.length
+        with open(self.root / f"{entry.shard}.shard", 'rb') as f:
+            f.seek(entry.offset)
+            while remaining:
+                data = f.read(min(COPY_CHUNK_SIZE, remaining))
+                if not data:
+                    raise ArchiveError(f"{entry.shard} ends inside the frame of {entry.name}")
+                remaining -= len(data)
+                try:
+                    yield decompressor.decompress(data)
+                except CORRUPT_FRAME_ERRORS as e:
+                    raise ArchiveError(f"Corrupt frame for {entry.name}: {e}") from e
+        if entry.codec == 'zlib':
+            yield decompressor.flush()
+
+    def read(self, key: str) -> bytes:
+        """Return the whole body of one document (by name or SHA-256)."""
+        return b''.join(self.iter_chunks(self.find(key)))
+
+    def extract(self, key: str, destination: Union[str, Path], root: Optional[Union[str, Path]] = None) -> Path:
+        """
+        Write one document to ``destination``, checking its SHA-256.
+
+        Args:
+            key: Name or SHA-256 of the document
+            destination: File to write
+            root: If given, refuse a ``destination`` that resolves outside it
+        """
+        entry = self.find(key)
+        destination = Path(destination)
+        if root is not None and not destination.resolve().is_relative_to(Path(root).resolve()):
+            raise ArchiveError(f"Refusing to write {destination} outside {root}")
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        part_path = destination.with_name(destination.name + '.part')
+        hasher = hashlib.sha256()
+        try:
+            with open(part_path, 'wb') as f:
+                for chunk in self.iter_chunks(entry):
+                    hasher.update(chunk)
+                    f.write(chunk)
+            if hasher.hexdigest() != entry.sha256:
+                raise ArchiveError(f"Checksum mismatch for {entry.name}")
+        except BaseException:
+            part_path.unlink(missing_ok=True)
+            raise
+        os.replace(part_path, destination)
+        return destination
+
+    def export(self, output_dir: Union[str, Path], jurisdiction: Optional[str] = None) -> int:
+        """
+        Write archived documents back out as loose files under ``output_dir``.
+
+        Files keep their archived names as relative paths, so
+        ``export('.')`` restores the original layout. Absolute names are
+        written relative to ``output_dir``; names with ``..`` are skipped.
+
+        Returns:
+            Number of files written.
+        """
+        count = 0
+        for entry in list(self.entries.values()):
+            if jurisdiction and entry.metadata.get('jurisdiction') != jurisdiction:
+                continue
+            try:
+                relative = safe_relative_path(entry.name)
+            except ArchiveError as e:
+                logger.warning(str(e))
+                continue
+            self.extract(entry.name, Path(output_dir) / relative, root=output_dir)
+            count += 1
+        return count
+
+def documents_to_pack(manifest_path: Union[str, Path],
+                      dirs: Iterable[Union[str, Path]]) -> Iterator[tuple]:
+    """Yield (filepath, sha256 or None, metadata) from the manifest, or from ``dirs`` if given."""
+    dirs = list(dirs)
+    if not dirs and os.path.exists(manifest_path):
+        with Manifest(manifest_path) as manifest:
+            rows = manifest.fetched_documents()
+        for row in rows:
+            if row['filepath'] and os.path.exists(row['filepath']):
+                yield row['filepath'], row['sha256'], {k: row[k] for k in METADATA_FIELDS if row.get(k)}
+        return
+    for directory in dirs or [d for d in DEFAULT_PDF_DIRS if os.path.isdir(d)]:
+        for path in sorted(Path(directory).rglob('*.pdf')):
+            if '.blobs' in path.parts or '.incoming' in path.parts:
+                continue
+            yield str(path), None, {}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Pack documents into compressed shards, or read them back")
+    parser.add_argument('--archive-dir', default=DEFAULT_ARCHIVE_DIR,
+                        help=f'Directory holding the shards (default: {DEFAULT_ARCHIVE_DIR})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    pack = commands.add_parser('pack', help='Add documents to the archive')
+    pack.add_argument('dirs', nargs='*', help='Directories to pack (default: documents in the manifest)')
+    pack.add_argument('--manifest', default=DEFAULT_MANIFEST_PATH,
+                      help=f'Path of the SQLite crawl manifest (default: {DEFAULT_MANIFEST_PATH})')
+    pack.add_argument('--max-shard-mb', type=int, default=DEFAULT_SHARD_SIZE // (1024 * 1024),
+                      help='Start a new shard after this many MB')
+    pack.add_argument('--level', type=int, default=DEFAULT_LEVEL, help='Compression level')
+    pack.add_argument('--remove', action='store_true', help='Delete loose files once they are packed')
+
+    get = commands.add_parser('get', help='Write one document by name or SHA-256')
+    get.add_argument('key')
+    get.add_argument('-o', '--output', help='Output file (default: stdout)')
+
+    export = commands.add_parser('export', help='Write archived documents back out as loose files')
+    export.add_argument('output_dir')
+    export.add_argument('--jurisdiction', help='Only export this jurisdiction')
+
+    commands.add_parser('list', help='List archived documents')
+    args = parser.parse_args(argv)
+
+    if args.command == 'pack':
+        archive = ShardArchive(args.archive_dir, args.max_shard_mb * 1024 * 1024, args.level)
+    else:
+        archive = ShardArchive(args.archive_dir)
+    with archive:
+        if args.command == 'pack':
+            packed = original = 0
+            for filepath, digest, metadata in documents_to_pack(args.manifest, args.dirs):
+                name = Path(filepath).as_posix()
+                digest = digest or sha256_file(filepath)
+                existing = archive.entries.get(name)
+                if existing is None or existing.sha256 != digest:
+                    # A revised file gets a new index line, which wins on reload
+                    entry = archive.add(filepath, digest, name, metadata)
+                    packed += 1
+                    original += entry.size
+                if args.remove:
+                    os.remove(filepath)
+            stored = sum((archive.root / f"{shard}.shard").stat().st_size for shard in archive._shard_names())
+            logger.info(f"Packed {packed} documents ({original / 1e6:.1f} MB); archive holds "
+                        f"{len(archive.entries)} documents in {stored / 1e6:.1f} MB ({archive.codec})")
+        elif args.command in ('get', 'export'):
+            try:
+                if args.command == 'export':
+                    count = archive.export(args.output_dir, args.jurisdiction)
+                    logger.info(f"Exported {count} documents to {args.output_dir}")
+                elif args.output:
+                    archive.extract(args.key, args.output)
+                else:
+                    for chunk in archive.iter_chunks(archive.find(args.key)):
+                        sys.stdout.buffer.write(chunk)
+            except ArchiveError as e:
+                logger.error(str(e))
+                return 1
+        else:
+            for entry in archive.entries.values():
+                print(f"{entry.sha256[:12]}  {entry.size:>10}  {entry.shard}  {entry.name}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
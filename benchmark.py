@@ -0,0 +1,296 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASELINE = "bench_baseline.json"
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_MAX_RSS_MB = 150.0
+
+@dataclass
+class BenchConfig:
+    """Workload shared by every benchmark."""
+    pdf_size: int = 2 * 1024 * 1024
+    latency: float = 0.02
+    files: int = 20
+    calendar_rows: int = 2000
+    meetings: int = 10
+    repeat: int = 5
+    large_size: int = 512 * 1024 * 1024
+    chunk_size: int = 64 * 1024
+
+def _unthrottled() -> None:
+    # The per-host limiter is politeness towards live sites; against the
+    # local stand-ins it would only measure itself
+    from download_utils import HostRateLimiter, set_rate_limiter
+    set_rate_limiter(HostRateLimiter(initial_rate=1e6, max_rate=1e6, burst=1e6))
+
+def bench_download_file(config: BenchConfig, hosts: Dict[str, str]) -> Dict[str, float]:
+    """Sequential ``download_file`` calls against the IQM2 stand-in."""
+    from download_utils import download_file
+    _unthrottled()
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        total = 0
+        for i in range(config.files):
+            result = download_file(f"{hosts['iqm2']}FileOpen.aspx?Type=1&ID={i}",
+                                   Path(tmp) / f"{i}.pdf", show_progress=False)
+            total += result.size
+        elapsed = time.perf_counter() - started
+    return {'files_per_s': config.files / elapsed, 'mb_per_s': total / elapsed / 1e6}
+
+def bench_download_large(config: BenchConfig, hosts: Dict[str, str]) -> Dict[str, float]:
+    """One ``large_size`` download with no Content-Length; its peak RSS must not grow with the file."""
+    from download_utils import download_file
+    _unthrottled()
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        result = download_file(f"{hosts['iqm2']}FileOpen.aspx?Type=1&ID=0&Size={config.large_size}",
+                               Path(tmp) / "large.pdf", chunk_size=config.chunk_size, show_progress=False)
+        elapsed = time.perf_counter() - started
+    if result.size != config.large_size:
+        raise RuntimeError(f"Expected {config.large_size} bytes, received {result.size}")
+    return {'mb_per_s': result.size / elapsed / 1e6}
+
+def bench_download_many(config: BenchConfig, hosts: Dict[str, str]) -> Dict[str, float]:
+    """Concurrent ``download_many`` batch against the IQM2 stand-in."""
+    from download_utils import download_many
+    _unthrottled()
+    with tempfile.TemporaryDirectory() as tmp:
+        jobs = [(f"{hosts['iqm2']}FileOpen.aspx?Type=1&ID={i}", Path(tmp) / f"{i}.pdf")
+                for i in range(config.files)]
+        started = time.perf_counter()
+        results = download_many(jobs)
+        elapsed = time.perf_counter() - started
+    total = sum(r.size for r in results)
+    return {'files_per_s': config.files / elapsed, 'mb_per_s': total / elapsed / 1e6}
+
+def bench_iqm2_parse(config: BenchConfig, hosts: Dict[str, str]) -> Dict[str, float]:
+    """``parse_calendar_rows`` on a synthetic list-view calendar."""
+    from iqm2_parsing import parse_calendar_rows, synthetic_calendar
+    html = synthetic_calendar(config.calendar_rows)
+    started = time.perf_counter()
+    for _ in range(config.repeat):
+        rows = parse_calendar_rows(html)
+    elapsed = (time.perf_counter() - started) / config.repeat
+    return {'parse_ms_per_page': elapsed * 1000, 'rows_per_s': len(rows) / elapsed,
+            'mb_per_s': len(html) / elapsed / 1e6}
+
+def bench_iqm2_client(config: BenchConfig, hosts: Dict[str, str]) -> Dict[str, float]:
+    """IQM2Client calendar crawl plus packet downloads against the stand-in."""
+    from iqm2_client import IQM2Client
+    _unthrottled()
+    client = IQM2Client('bench', base_url=hosts['iqm2'])
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        meetings = client.list_meetings(date(2023, 1, 1), date(2024, 12, 31))
+        listed = time.perf_counter()
+        results = client.download_packets(meetings[:config.files], Path(tmp))
+        elapsed = time.perf_counter() - started
+    total = sum(result.size for _, result in results)
+    return {'calendar_pages_per_s': 2 / (listed - started), 'meetings': len(meetings),
+            'files_per_s': len(results) / (elapsed - (listed - started)),
+            'mb_per_s': total / elapsed / 1e6}
+
+def bench_boarddocs(config: BenchConfig, hosts: Dict[str, str]) -> Dict[str, float]:
+    """BoardDocsClient meeting list, agendas, attachments and downloads."""
+    from boarddocs_client import BoardDocsClient
+    from boarddocs_fixture_server import SITE
+    _unthrottled()
+    client = BoardDocsClient(SITE, host=hosts['boarddocs'])
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        meetings = client.list_meetings()
+        results = []
+        first = None
+        for meeting in meetings:
+            results += client.download_meeting(meeting, tmp)
+            first = first or time.perf_counter() - started
+        elapsed = time.perf_counter() - started
+    total = sum(r.size for r in results)
+    return {'meetings_per_s': len(meetings) / elapsed, 'files_per_s': len(results) / elapsed,
+            'mb_per_s': total / elapsed / 1e6, 'first_file_ms': (first or 0) * 1000}
+
+def bench_boarddocs_stream(config: BenchConfig, hosts: Dict[str, str]) -> Dict[str, float]:
+    """The ``boarddocs`` workload with agenda discovery feeding a download pipeline."""
+    from boarddocs_client import BoardDocsClient
+    from boarddocs_fixture_server import SITE
+    from pipeline import stream_downloads
+    _unthrottled()
+    client = BoardDocsClient(SITE, host=hosts['boarddocs'])
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        meetings = client.list_meetings()
+        results = []
+        first = None
+        for _, result in stream_downloads(client.iter_download_jobs(meetings, tmp)):
+            results.append(result)
+            first = first or time.perf_counter() - started
+        elapsed = time.perf_counter() - started
+    total = sum(r.size for r in results)
+    return {'meetings_per_s': len(meetings) / elapsed, 'files_per_s': len(results) / elapsed,
+            'mb_per_s': total / elapsed / 1e6, 'first_file_ms': (first or 0) * 1000}
+
+BENCHMARKS: Dict[str, Callable[[BenchConfig, Dict[str, str]], Dict[str, float]]] = {
+    'download_file': bench_download_file,
+    'download_large': bench_download_large,
+    'download_many': bench_download_many,
+    'iqm2_parse': bench_iqm2_parse,
+    'iqm2_client': bench_iqm2_client,
+    'boarddocs': bench_boarddocs,
+    'boarddocs_stream': bench_boarddocs_stream,
+}
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux but bytes on macOS
+    return peak / 1e6 if sys.platform == 'darwin' else peak / 1024
+
+def _run_child(name: str, config: BenchConfig, hosts: Dict[str, str], results) -> None:
+    logging.basicConfig(level=logging.WARNING)
+    metrics = BENCHMARKS[name](config, hosts)
+    metrics['peak_rss_mb'] = peak_rss_mb()
+    results.put(metrics)
+
+def run_benchmark(name: str, config: BenchConfig, hosts: Dict[str, str]) -> Dict[str, float]:
+    """Run one benchmark in a fresh process so its peak RSS is its own."""
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=_run_child, args=(name, config, hosts, results))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError(f"Benchmark {name} failed with exit code {process.exitcode}")
+    return results.get()
+
+def metric_direction(metric: str) -> int:
+    """1 if higher is better, -1 if lower is better, 0 for counts that are not compared."""
+    if metric.endswith('_per_s'):
+        return 1
+    if metric.endswith(('_ms_per_page', '_ms', '_mb')):
+        return -1
+    return 0
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    Return a line per metric that is worse than the baseline by more than ``tolerance``.
+
+    Throughput metrics (``*_per_s``) regress when they drop; times and memory
+    regress when they grow. Counts and metrics missing from the baseline are
+    ignored.
+    """
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            before = baseline.get(name, {}).get(metric)
+            direction = metric_direction(metric)
+            if not before or not direction:
+                continue
+            change = (value - before) / before
+            if -direction * change > tolerance:
+                regressions.append(f"{name}.{metric}: {before:.2f} -> {value:.2f} ({change:+.0%})")
+    return regressions
+
+def format_results(results: Dict[str, Dict[str, float]],
+                   baseline: Optional[Dict[str, Dict[str, float]]] = None) -> str:
+    lines = []
+    for name, metrics in results.items():
+        lines.append(name)
+        for metric, value in metrics.items():
+            line = f"  {metric:<22} {value:>12.2f}"
+            before = (baseline or {}).get(name, {}).get(metric)
+            if before:
+                line += f"  (baseline {before:.2f}, {(value - before) / before:+.0%})"
+            lines.append(line)
+    return '\n'.join(lines)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    defaults = BenchConfig()
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers against local stand-in servers")
+    parser.add_argument('benchmarks', nargs='*',
+                        help=f"Benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument('--pdf-size', type=int, default=defaults.pdf_size, help='Bytes per synthetic PDF')
+    parser.add_argument('--latency', type=float, default=defaults.latency,
+                        help='Seconds the stand-in servers wait before each response')
+    parser.add_argument('--files', type=int, default=defaults.files, help='Files per download benchmark')
+    parser.add_argument('--calendar-rows', type=int, default=defaults.calendar_rows,
+                        help='Rows in the synthetic calendar for the parser benchmark')
+    parser.add_argument('--meetings', type=int, default=defaults.meetings,
+                        help='Meetings on the BoardDocs stand-in')
+    parser.add_argument('--repeat', type=int, default=defaults.repeat, help='Parser benchmark repetitions')
+    parser.add_argument('--large-size', type=int, default=defaults.large_size,
+                        help='Bytes in the download_large file')
+    parser.add_argument('--chunk-size', type=int, default=defaults.chunk_size,
+                        help='download_file chunk size for download_large')
+    parser.add_argument('--max-rss-mb', type=float, default=DEFAULT_MAX_RSS_MB,
+                        help=f'Fail if download_large peaks above this RSS (default: {DEFAULT_MAX_RSS_MB:.0f})')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help=f'Stored results to compare against (default: {DEFAULT_BASELINE})')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed slowdown before a metric counts as a regression (0.25 = 25%%)')
+    parser.add_argument('--output', help='Also write the results to this JSON file')
+    args = parser.parse_args(argv)
+    unknown = set(args.benchmarks) - BENCHMARKS.keys()
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    from boarddocs_fixture_server import start_fixture_server as start_boarddocs, synthetic_meetings
+    from iqm2_fixture_server import start_fixture_server as start_iqm2
+
+    config = BenchConfig(args.pdf_size, args.latency, args.files, args.calendar_rows,
+                         args.meetings, args.repeat, args.large_size, args.chunk_size)
+    _, iqm2_url = start_iqm2(pdf_size=config.pdf_size, latency=config.latency)
+    _, boarddocs_url = start_boarddocs(meetings=synthetic_meetings(config.meetings),
+                                       pdf_size=config.pdf_size, latency=config.latency)
+    hosts = {'iqm2': iqm2_url, 'boarddocs': boarddocs_url}
+
+    results = {}
+    for name in args.benchmarks or list(BENCHMARKS):
+        logger.info(f"Running {name}...")
+        results[name] = run_benchmark(name, config, hosts)
+
+    baseline_path = Path(args.baseline)
+    baseline = None
+    if baseline_path.exists() and not args.save_baseline:
+        stored = json.loads(baseline_path.read_text())
+        if stored['config'] != asdict(config):
+            logger.warning(f"Baseline was recorded with a different workload: {stored['config']}")
+        baseline = stored['results']
+    print(format_results(results, baseline))
+    # Memory on the streaming path is checked against a fixed ceiling, not
+    # only the baseline, so a whole-body read shows up on the first run
+    failed = False
+    large_rss = results.get('download_large', {}).get('peak_rss_mb')
+    if large_rss is not None and large_rss > args.max_rss_mb:
+        logger.error(f"download_large peaked at {large_rss:.0f} MB RSS "
+                     f"(limit {args.max_rss_mb:.0f} MB for a {config.large_size / 1e6:.0f} MB file)")
+        failed = True
+    if args.output:
+        Path(args.output).write_text(json.dumps({'config': asdict(config), 'results': results}, indent=2))
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps({'config': asdict(config), 'results': results}, indent=2))
+        logger.info(f"Saved baseline to {baseline_path}")
+        return 1 if failed else 0
+    if baseline is None:
+        return 1 if failed else 0
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        logger.error(f"Regression: {line}")
+    return 1 if regressions or failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
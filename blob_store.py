@@ -0,0 +1,87 @@
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import Union
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def sha256_file(filepath: Union[str, Path], chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """Return the hex SHA-256 of a file, reading it in chunks."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class BlobStore:
+    """
+    Content-addressed file store.
+
+    Each distinct body is kept once under ``<root>/<aa>/<sha256><suffix>`` and
+    the human-readable download paths become hardlinks (or symlinks when the
+    blob lives on another filesystem) pointing at it.
+    """
+
+    def __init__(self, root: Union[str, Path], use_symlinks: bool = False):
+        """
+        Args:
+            root: Directory holding the blobs
+            use_symlinks: Always link with symlinks instead of hardlinks
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.use_symlinks = use_symlinks
+
+    def blob_path(self, digest: str, suffix: str = '') -> Path:
+        """Return where the blob with ``digest`` lives."""
+        return self.root / digest[:2] / f"{digest}{suffix}"
+
+    def has(self, digest: str, suffix: str = '') -> bool:
+        return self.blob_path(digest, suffix).exists()
+
+    def ingest(self, source: Union[str, Path], digest: str, suffix: str = '') -> Path:
+        """
+        Move ``source`` into the store under ``digest``.
+
+        If the blob is already present the source is simply removed.
+
+        Returns:
+            Path of the stored blob.
+        """
+        source = Path(source)
+        blob = self.blob_path(digest, suffix)
+        if blob.exists():
+            source.unlink()
+            logger.info(f"Duplicate content, reusing blob {digest[:12]}")
+        else:
+            blob.parent.mkdir(exist_ok=True)
+            os.replace(source, blob)
+        return blob
+
+    def link(self, digest: str, destination: Union[str, Path], suffix: str = '') -> None:
+        """Atomically point ``destination`` at the blob with ``digest``."""
+        destination = Path(destination)
+        blob = self.blob_path(digest, suffix)
+        tmp_link = destination.with_name(f".{destination.name}.link")
+        if tmp_link.exists() or tmp_link.is_symlink():
+            tmp_link.unlink()
+
+        if not self.use_symlinks:
+            try:
+                os.link(blob, tmp_link)
+                os.replace(tmp_link, destination)
+                return
+            except OSError as e:
+                logger.debug(f"Hardlink failed for {destination}, using symlink: {e}")
+        os.symlink(blob.resolve(), tmp_link)
+        os.replace(tmp_link, destination)
+
+    def store(self, source: Union[str, Path], digest: str, destination: Union[str, Path]) -> Path:
+        """Ingest ``source`` and link ``destination`` to the resulting blob."""
+        suffix = Path(destination).suffix
+        blob = self.ingest(source, digest, suffix)
+        self.link(digest, destination, suffix)
+        return blob
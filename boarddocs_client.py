@@ -0,0 +1,262 @@
+"""
+Browserless BoardDocs client.
+
+BoardDocs public sites are rendered by JavaScript, but the data behind them
+comes from plain HTTP POST endpoints on the same ``Board.nsf`` database:
+
+    BD-GetMeetingsList?open   current_committee_id=...        -> JSON meeting list
+    BD-GetAgenda?open         id=<meeting>&current_committee_id=...  -> agenda HTML
+    BD-GetPublicItem?open     id=<item>&current_committee_id=...     -> item HTML
+    PRINT-AgendaDetailed?open&id=<meeting>&current_committee_id=...  -> agenda PDF
+
+This module talks to those directly, so no Chrome/chromedriver is needed.
+The endpoint paths are module constants in case a site differs.
+"""
+import argparse
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Iterable, Iterator, List, Optional
+
+import requests
+from bs4 import BeautifulSoup
+
+from blob_store import BlobStore
+from download_utils import DownloadResult, download_many, get_session, setup_download_directory
+from http_cache import add_cache_arguments, configure_from_args
+from manifest import Manifest, add_window_arguments, resolve_window
+from metrics import add_metrics_arguments, configure_metrics, get_metrics, write_run_report
+from pipeline import DownloadJob, stream_downloads
+from retry_policy import RetryPolicy, get_retry_policy
+
+logger = logging.getLogger(__name__)
+
+BOARDDOCS_HOST = "https://go.boarddocs.com"
+MEETINGS_PATH = "BD-GetMeetingsList?open"
+AGENDA_PATH = "BD-GetAgenda?open"
+PUBLIC_ITEM_PATH = "BD-GetPublicItem?open"
+AGENDA_PDF_PATH = "PRINT-AgendaDetailed?open"
+COMMITTEE_ID_PATTERN = re.compile(
+    r"""current_committee_id["']?\s*(?:[:=]|value=)\s*["']([A-Za-z0-9]+)["']""")
+
+@dataclass
+class BoardDocsAttachment:
+    """A file attached to an agenda item."""
+    item_id: str
+    name: str
+    url: str
+
+@dataclass
+class BoardDocsMeeting:
+    """One meeting from the BoardDocs meeting list."""
+    meeting_id: str
+    name: str
+    date: date
+    agenda_items: List[str] = field(default_factory=list)
+
+    def agenda_page_url(self, site_url: str) -> str:
+        """URL of the public agenda page, as found in the JSON-LD event list."""
+        return f"{site_url}/Public?open&id={self.meeting_id}#agenda"
+
+class BoardDocsClient:
+    """
+    Minimal BoardDocs API client for a single site and committee.
+
+    Args:
+        site: Site path such as ``"ca/auhsd"``
+        committee_id: BoardDocs committee ID; discovered from the public page
+            when omitted
+        host: Base host, overridable for the local fixture server
+        session: requests Session; defaults to the shared pooled session
+        retry_policy: Backoff/circuit breaker policy (default: the shared one)
+    """
+
+    def __init__(self, site: str, committee_id: Optional[str] = None,
+                 host: str = BOARDDOCS_HOST, session: Optional[requests.Session] = None,
+                 retry_policy: Optional[RetryPolicy] = None):
+        self.site_url = f"{host.rstrip('/')}/{site.strip('/')}/Board.nsf"
+        self.session = session or get_session()
+        self.retry_policy = retry_policy or get_retry_policy()
+        self._committee_id = committee_id
+
+    @property
+    def committee_id(self) -> str:
+        if self._committee_id is None:
+            self._committee_id = self.discover_committee_id()
+        return self._committee_id
+
+    def discover_committee_id(self) -> str:
+        """Read the default committee ID from the public landing page."""
+        url = f"{self.site_url}/Public"
+        response = self.retry_policy.call(self._request, 'GET', url, url=url)
+        match = COMMITTEE_ID_PATTERN.search(response.text)
+        if not match:
+            raise ValueError(f"No committee ID found on {self.site_url}/Public")
+        logger.info(f"Discovered committee ID {match.group(1)}")
+        return match.group(1)
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        with get_metrics().stage('page_fetch', source='boarddocs'):
+            response = self.session.request(method, url, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def _post(self, path: str, **data) -> requests.Response:
+        data.setdefault('current_committee_id', self.committee_id)
+        url = f"{self.site_url}/{path}"
+        return self.retry_policy.call(self._request, 'POST', url, data=data, url=url)
+
+    def list_meetings(self, start: Optional[date] = None,
+                      end: Optional[date] = None) -> List[BoardDocsMeeting]:
+        """Return meetings between start and end (inclusive), oldest first."""
+        meetings = []
+        with get_metrics().stage('discovery', source='boarddocs'):
+            entries = self._post(MEETINGS_PATH).json()
+        for entry in entries:
+            try:
+                meeting_date = datetime.strptime(entry.get('numberdate', ''), '%Y%m%d').date()
+            except ValueError:
+                logger.warning(f"Skipping meeting with bad date: {entry}")
+                continue
+            if (start and meeting_date < start) or (end and meeting_date > end):
+                continue
+            meetings.append(BoardDocsMeeting(entry['unique'], entry.get('name', 'Unknown_Event'),
+                                             meeting_date))
+        meetings.sort(key=lambda m: m.date)
+        logger.info(f"Found {len(meetings)} meetings")
+        return meetings
+
+    def get_agenda(self, meeting: BoardDocsMeeting) -> BeautifulSoup:
+        """Fetch the agenda structure and remember the item IDs on the meeting."""
+        html = self._post(AGENDA_PATH, id=meeting.meeting_id).text
+        with get_metrics().stage('parse', source='boarddocs'):
+            soup = BeautifulSoup(html, 'html.parser')
+            meeting.agenda_items = [li['unique'] for li in soup.find_all('li', attrs={'unique': True})
+                                    if 'item' in li.get('class', [])]
+        return soup
+
+    def get_item_attachments(self, item_id: str) -> List[BoardDocsAttachment]:
+        """Resolve the files attached to one agenda item."""
+        html = self._post(PUBLIC_ITEM_PATH, id=item_id).text
+        attachments = []
+        with get_metrics().stage('parse', source='boarddocs'):
+            for link in BeautifulSoup(html, 'html.parser').find_all('a', href=True):
+                href = link['href']
+                if '/files/' in href and '$file' in href:
+                    url = requests.compat.urljoin(self.site_url + '/', href)
+                    attachments.append(BoardDocsAttachment(item_id, link.get_text(strip=True), url))
+        return attachments
+
+    def get_attachments(self, meeting: BoardDocsMeeting, max_workers: int = 4) -> List[BoardDocsAttachment]:
+        """Resolve every attachment of a meeting, fetching items concurrently."""
+        if not meeting.agenda_items:
+            self.get_agenda(meeting)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            per_item = list(pool.map(self.get_item_attachments, meeting.agenda_items))
+        return [attachment for attachments in per_item for attachment in attachments]
+
+    def agenda_pdf_url(self, meeting: BoardDocsMeeting) -> str:
+        """URL of the full agenda PDF (what ``btn-download-agenda-pdf`` fetches)."""
+        return (f"{self.site_url}/{AGENDA_PDF_PATH}&id={meeting.meeting_id}"
+                f"&current_committee_id={self.committee_id}")
+
+    def meeting_jobs(self, meeting: BoardDocsMeeting, output_dir: str,
+                     include_attachments: bool = True) -> List[DownloadJob]:
+        """
+        Download jobs for the agenda PDF (and optionally attachments) of one meeting.
+
+        Filenames match the Selenium scripts so existing archives line up.
+        Each job's context is the meeting.
+        """
+        date_text = meeting.date.strftime('%Y_%m_%d')
+        event_name = meeting.name.replace(' ', '_').replace('/', '_')
+        jobs = [DownloadJob(self.agenda_pdf_url(meeting),
+                            os.path.join(output_dir, f"agenda_{date_text}_{event_name}.pdf"), meeting)]
+        if include_attachments:
+            for i, attachment in enumerate(self.get_attachments(meeting)):
+                jobs.append(DownloadJob(attachment.url,
+                                        os.path.join(output_dir, f"{date_text}_{event_name}_attachment_{i}.pdf"),
+                                        meeting))
+        return jobs
+
+    def iter_download_jobs(self, meetings: Iterable[BoardDocsMeeting], output_dir: str,
+                           include_attachments: bool = True) -> Iterator[DownloadJob]:
+        """Yield each meeting's jobs as soon as its agenda has been read, skipping meetings that fail."""
+        for meeting in meetings:
+            logger.info(f"{meeting.date} {meeting.name}")
+            try:
+                jobs = self.meeting_jobs(meeting, output_dir, include_attachments)
+            except requests.RequestException as e:
+                logger.error(f"Failed to process {meeting.name} on {meeting.date}: {e}")
+                continue
+            yield from jobs
+
+    def download_meeting(self, meeting: BoardDocsMeeting, output_dir: str,
+                         include_attachments: bool = True,
+                         blob_store: Optional[BlobStore] = None) -> List[DownloadResult]:
+        """Download the agenda PDF (and optionally attachments) of one meeting."""
+        jobs = self.meeting_jobs(meeting, output_dir, include_attachments)
+        return download_many([(job.url, job.filepath) for job in jobs], blob_store=blob_store,
+                             retry_policy=self.retry_policy)
+
+def main(argv: Optional[List[str]] = None, standalone: bool = True):
+    """
+    Download agendas and attachments for a BoardDocs site without a browser.
+
+    With ``standalone`` False the response cache and metrics are left as the
+    caller (scheduler.py) set them up, and no run report is written.
+    """
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Download BoardDocs agendas over HTTP")
+    parser.add_argument('--site', default='ca/auhsd', help='BoardDocs site path (default: ca/auhsd)')
+    parser.add_argument('--committee-id', help='Committee ID (default: discover from the public page)')
+    parser.add_argument('--host', default=BOARDDOCS_HOST, help='BoardDocs host')
+    parser.add_argument('--jurisdiction', default='AUHSD', help='Name recorded in the manifest')
+    parser.add_argument('--output-dir', default='auhsd_board_agendas')
+    parser.add_argument('--blob-dir', help='Store each distinct document once in this directory')
+    parser.add_argument('--no-attachments', action='store_true', help='Only fetch the agenda PDF')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent downloads (default: 4)')
+    add_window_arguments(parser)
+    add_cache_arguments(parser)
+    add_metrics_arguments(parser)
+    args = parser.parse_args(argv)
+    if not standalone:
+        _crawl(args)
+        return
+    configure_from_args(args)
+    configure_metrics(args)
+    try:
+        _crawl(args)
+    finally:
+        write_run_report(args, {'jurisdiction': args.jurisdiction})
+
+def _crawl(args: argparse.Namespace) -> None:
+    output_dir = setup_download_directory(args.output_dir)
+    blob_store = BlobStore(args.blob_dir) if args.blob_dir else None
+    client = BoardDocsClient(args.site, args.committee_id, host=args.host)
+    with Manifest(args.manifest) as manifest:
+        start, end = resolve_window(args, manifest, args.jurisdiction)
+        meetings = client.list_meetings(start, end)
+        if args.offline:
+            for meeting in meetings:
+                logger.info(f"{meeting.date} {meeting.name}")
+                for attachment in client.get_attachments(meeting):
+                    logger.info(f"  {attachment.name}: {attachment.url}")
+            return
+        # Agendas of later meetings are read while earlier files download
+        pdf_count = 0
+        jobs = client.iter_download_jobs(meetings, str(output_dir),
+                                         include_attachments=not args.no_attachments)
+        for job, result in stream_downloads(jobs, workers=args.workers, blob_store=blob_store,
+                                            retry_policy=client.retry_policy):
+            meeting = job.context
+            manifest.record_result(args.jurisdiction, meeting.meeting_id, meeting.date, result,
+                                   meeting_type=meeting.name)
+            pdf_count += result.ok
+        logger.info(f"Download complete. Total PDFs downloaded: {pdf_count}")
+
+if __name__ == "__main__":
+    main()
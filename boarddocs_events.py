@@ -0,0 +1,79 @@
+"""
+On-disk cache of the BoardDocs JSON-LD event list.
+
+The Selenium scripts read every meeting's agenda URL from the JSON-LD block
+on the public landing page. That page is heavy, so the parsed list is saved
+and reused until it expires; each run (or resumed run) then goes straight
+to the agenda URLs without loading the landing page at all.
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EVENT_CACHE = ".boarddocs_events.json"
+DEFAULT_EVENT_TTL_HOURS = 12.0
+
+def load_cached_events(path: Union[str, Path], base_url: str, ttl: float) -> Optional[List[dict]]:
+    """
+    Return the saved event list for ``base_url``, or None if it is missing or stale.
+
+    Args:
+        path: Cache file
+        base_url: Landing page the events were read from
+        ttl: Maximum age in seconds
+    """
+    path = Path(path)
+    try:
+        cached = json.loads(path.read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable event cache {path}: {e}")
+        return None
+    if cached.get('base_url') != base_url:
+        return None
+    age = time.time() - cached.get('fetched_at', 0)
+    if age > ttl:
+        logger.info(f"Event cache {path} is {age / 3600:.1f}h old, reloading")
+        return None
+    return cached['events']
+
+def save_events(path: Union[str, Path], base_url: str, events: List[dict]) -> None:
+    """Atomically write the event list and when it was fetched."""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_text(json.dumps({'base_url': base_url, 'fetched_at': time.time(), 'events': events}),
+                        encoding='utf-8')
+    os.replace(tmp_path, path)
+
+def cached_events(path: Union[str, Path], base_url: str, fetch: Callable[[], List[dict]],
+                  ttl: float = DEFAULT_EVENT_TTL_HOURS * 3600, refresh: bool = False) -> List[dict]:
+    """
+    Return the event list from the cache, calling ``fetch`` only when it is stale.
+
+    An empty result from ``fetch`` is not cached, so a failed page load is
+    retried on the next run.
+    """
+    events = None if refresh else load_cached_events(path, base_url, ttl)
+    if events is not None:
+        logger.info(f"Using {len(events)} cached events from {path}")
+        return events
+    events = fetch()
+    if events:
+        save_events(path, base_url, events)
+    return events
+
+def add_event_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the shared --event-cache/--event-ttl/--refresh-events options."""
+    parser.add_argument('--event-cache', default=DEFAULT_EVENT_CACHE,
+                        help=f'File for the cached JSON-LD event list (default: {DEFAULT_EVENT_CACHE})')
+    parser.add_argument('--event-ttl', type=float, default=DEFAULT_EVENT_TTL_HOURS,
+                        help=f'Hours before the event list is reloaded (default: {DEFAULT_EVENT_TTL_HOURS:g})')
+    parser.add_argument('--refresh-events', action='store_true',
+                        help='Reload the event list from the landing page even if the cache is fresh')
@@ -0,0 +1,165 @@
+"""
+Local stand-in for a BoardDocs site, for running boarddocs_client offline.
+
+    python boarddocs_fixture_server.py --port 8900
+    python boarddocs_client.py --host http://127.0.0.1:8900 --from 2024-01-01 --to 2024-12-31
+"""
+import argparse
+import json
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+SITE = "ca/auhsd"
+COMMITTEE_ID = "A9HCZ2588A7B"
+
+MEETINGS = [
+    {"unique": "D0000000001", "name": "Regular Board Meeting", "numberdate": "20240110",
+     "items": {"I01": ["Budget Report.pdf"], "I02": ["Minutes.pdf", "Shared Policy.pdf"]}},
+    {"unique": "D0000000002", "name": "Special Board Meeting", "numberdate": "20240214",
+     "items": {"I03": ["Shared Policy.pdf"]}},
+    {"unique": "D0000000003", "name": "Regular Board Meeting", "numberdate": "20250312",
+     "items": {"I04": []}},
+]
+
+def fake_pdf(label: str, size: int = 0) -> bytes:
+    """
+    Return a small valid one-page PDF whose text is ``label``, padded to ``size``.
+
+    The padding is a comment ahead of the xref table, so readers such as
+    pypdf still find ``startxref`` and the offsets it points to.
+    """
+    stream = f"BT /F1 12 Tf 72 720 Td ({label}) Tj ET".encode()
+    objects = [
+        b"<</Type/Catalog/Pages 2 0 R>>",
+        b"<</Type/Pages/Kids[3 0 R]/Count 1>>",
+        b"<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]/Resources<</Font<</F1 5 0 R>>>>/Contents 4 0 R>>",
+        b"<</Length " + str(len(stream)).encode() + b">>stream\n" + stream + b"\nendstream",
+        b"<</Type/Font/Subtype/Type1/BaseFont/Helvetica>>",
+    ]
+    body = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(body))
+        body += f"{number} 0 obj".encode() + obj + b"endobj\n"
+    xref = (f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode() +
+            b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets))
+
+    def trailer(xref_offset: int) -> bytes:
+        return f"trailer<</Size {len(objects) + 1}/Root 1 0 R>>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+
+    padding = max(0, size - len(body) - len(xref) - len(trailer(size)))
+    if padding:
+        body += b"%" + b"0" * (padding - 2) + b"\n" if padding > 1 else b"\n"
+    return body + xref + trailer(len(body))
+
+def synthetic_meetings(count: int, items: int = 2, files_per_item: int = 1,
+                       year: int = 2024) -> List[dict]:
+    """Build ``count`` meetings spread over ``year``, for load tests."""
+    meetings = []
+    for i in range(count):
+        numberdate = (date(year, 1, 1) + timedelta(days=i * 365 // count)).strftime('%Y%m%d')
+        meeting_items = {f"I{i:04d}{j:02d}": [f"Item {i}-{j} file {k}.pdf" for k in range(files_per_item)]
+                         for j in range(items)}
+        meetings.append({"unique": f"D{i:010d}", "name": "Regular Board Meeting",
+                         "numberdate": numberdate, "items": meeting_items})
+    return meetings
+
+class BoardDocsFixtureHandler(BaseHTTPRequestHandler):
+    """Serves the handful of Board.nsf endpoints the client uses."""
+
+    prefix = f"/{SITE}/Board.nsf"
+    meetings = MEETINGS
+    pdf_size = 0
+    latency = 0.0  # Seconds to wait before every response
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, body: bytes, content_type: str, status: int = 200) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _form(self) -> dict:
+        length = int(self.headers.get('Content-Length', 0))
+        fields = parse_qs(self.rfile.read(length).decode())
+        return {key: values[0] for key, values in fields.items()}
+
+    def _meeting(self, meeting_id: str):
+        return next((m for m in self.meetings if m['unique'] == meeting_id), None)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        if parsed.path == f"{self.prefix}/Public":
+            events = [{"@type": "Event", "name": m['name'],
+                       "startDate": f"{m['numberdate'][:4]}-{m['numberdate'][4:6]}-{m['numberdate'][6:]}T18:00:00",
+                       "url": f"http://{self.headers['Host']}{self.prefix}/Public?open&id={m['unique']}#agenda"}
+                      for m in self.meetings]
+            page = (f"<html><head><script type=\"application/ld+json\">{json.dumps(events)}</script></head>"
+                    f"<body><input type=\"hidden\" id=\"current_committee_id\" value=\"{COMMITTEE_ID}\">"
+                    f"</body></html>")
+            self._send(page.encode(), 'text/html')
+        elif parsed.path == f"{self.prefix}/PRINT-AgendaDetailed":
+            meeting = self._meeting(query.get('id', [''])[0])
+            if meeting is None:
+                self._send(b'not found', 'text/plain', 404)
+            else:
+                self._send(fake_pdf(f"Agenda {meeting['unique']}", self.pdf_size), 'application/pdf')
+        elif '/files/' in parsed.path and '$file' in parsed.path:
+            name = parsed.path.rsplit('/', 1)[-1]
+            self._send(fake_pdf(f"Attachment {name}", self.pdf_size), 'application/pdf')
+        else:
+            self._send(b'not found', 'text/plain', 404)
+
+    def do_POST(self):
+        parsed = urlparse(self.path)
+        form = self._form()
+        if form.get('current_committee_id') != COMMITTEE_ID:
+            self._send(b'bad committee', 'text/plain', 400)
+            return
+        if parsed.path == f"{self.prefix}/BD-GetMeetingsList":
+            listing = [{"unique": m['unique'], "name": m['name'], "numberdate": m['numberdate']}
+                       for m in self.meetings]
+            self._send(json.dumps(listing).encode(), 'application/json')
+        elif parsed.path == f"{self.prefix}/BD-GetAgenda":
+            meeting = self._meeting(form.get('id', ''))
+            if meeting is None:
+                self._send(b'not found', 'text/plain', 404)
+                return
+            items = ''.join(f'<li class="item" unique="{item_id}"><span class="title">Item {item_id}</span></li>'
+                            for item_id in meeting['items'])
+            self._send(f'<ul class="agenda">{items}</ul>'.encode(), 'text/html')
+        elif parsed.path == f"{self.prefix}/BD-GetPublicItem":
+            item_id = form.get('id', '')
+            files = next((m['items'][item_id] for m in self.meetings if item_id in m['items']), [])
+            links = ''.join(f'<a class="public-file" href="/{SITE}/Board.nsf/files/{name[:6].upper()}/$file/{name}">'
+                            f'{name}</a>' for name in files)
+            self._send(f'<div class="public-item">{links}</div>'.encode(), 'text/html')
+        else:
+            self._send(b'not found', 'text/plain', 404)
+
+def start_fixture_server(port: int = 0, meetings: Optional[List[dict]] = None, pdf_size: int = 0,
+                         latency: float = 0.0) -> Tuple[ThreadingHTTPServer, str]:
+    """Start the fixture server on a background thread; returns (server, host URL)."""
+    handler = type('ConfiguredHandler', (BoardDocsFixtureHandler,),
+                   {'meetings': meetings or MEETINGS, 'pdf_size': pdf_size, 'latency': latency})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fake BoardDocs site locally")
+    parser.add_argument('--port', type=int, default=8900)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), BoardDocsFixtureHandler)
+    print(f"Serving fake BoardDocs at http://127.0.0.1:{args.port}/{SITE}/Board.nsf/Public")
+    server.serve_forever()
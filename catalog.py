@@ -0,0 +1,246 @@
+"""
+Columnar catalog of every fetched meeting document.
+
+The crawl manifest is exported as Parquet files, partitioned by
+jurisdiction and meeting year, with one row per fetch:
+
+    meeting_catalog/jurisdiction=San%20Ramon/year=2025/part-<run>-0.parquet
+
+Columns: jurisdiction, body (meeting type, or BoardDocs event name),
+meeting_id, meeting_date, year, url, filepath, size, sha256, page_count
+(from pdf_text output, when extracted) and fetched_at. Each export only
+appends documents that are new, or were downloaded with a different body,
+since the previous one; re-checks that found a document unchanged add
+nothing. Queries keep the latest fetch of each document unless asked for
+all of them.
+
+    python catalog.py export
+    python catalog.py query --jurisdiction "San Ramon" --body planning --year 2025 --min-mb 50
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from manifest import DEFAULT_MANIFEST_PATH, Manifest
+from pdf_text import DEFAULT_TEXT_DIR, text_path_for
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    HAVE_PYARROW = True
+except ImportError:
+    HAVE_PYARROW = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_DIR = "meeting_catalog"
+STATE_FILE = "_export_state.json"  # Leading underscore: ignored by dataset discovery
+
+def catalog_schema() -> 'pa.Schema':
+    return pa.schema([
+        ('jurisdiction', pa.string()),
+        ('body', pa.string()),
+        ('meeting_id', pa.string()),
+        ('meeting_date', pa.date32()),
+        ('year', pa.int16()),
+        ('url', pa.string()),
+        ('filepath', pa.string()),
+        ('size', pa.int64()),
+        ('sha256', pa.string()),
+        ('page_count', pa.int32()),
+        ('fetched_at', pa.timestamp('s')),
+    ])
+
+def _require_pyarrow() -> None:
+    if not HAVE_PYARROW:
+        raise RuntimeError("The meeting catalog needs pyarrow (pip install pyarrow)")
+
+def page_count(text_dir: Union[str, Path], digest: Optional[str]) -> Optional[int]:
+    """Pages in the extracted text of a document (one JSONL line each), or None if not extracted."""
+    if not digest:
+        return None
+    path = text_path_for(text_dir, digest)
+    if not path.exists():
+        return None
+    with open(path, 'rb') as f:
+        return sum(1 for _ in f)
+
+def catalog_record(row: Dict[str, Any], text_dir: Union[str, Path] = DEFAULT_TEXT_DIR) -> Dict[str, Any]:
+    """Turn a manifest row into a catalog row."""
+    meeting_date = datetime.strptime(row['meeting_date'], '%Y-%m-%d').date()
+    return {
+        'jurisdiction': row['jurisdiction'],
+        'body': row['meeting_type'],
+        'meeting_id': row['meeting_id'],
+        'meeting_date': meeting_date,
+        'year': meeting_date.year,
+        'url': row['url'],
+        'filepath': row['filepath'],
+        'size': row['size'],
+        'sha256': row['sha256'],
+        'page_count': page_count(text_dir, row['sha256']),
+        'fetched_at': datetime.fromisoformat(row['updated_at']),
+    }
+
+class MeetingCatalog:
+    """Parquet dataset of fetched documents, partitioned by jurisdiction and year."""
+
+    def __init__(self, root: Union[str, Path] = DEFAULT_CATALOG_DIR):
+        _require_pyarrow()
+        self.root = Path(root)
+        self.partitioning = ds.partitioning(
+            pa.schema([('jurisdiction', pa.string()), ('year', pa.int16())]), flavor='hive')
+
+    @property
+    def state_path(self) -> Path:
+        return self.root / STATE_FILE
+
+    def last_export(self) -> Optional[datetime]:
+        if not self.state_path.exists():
+            return None
+        return datetime.fromisoformat(json.loads(self.state_path.read_text())['last_export'])
+
+    def append(self, records: List[Dict[str, Any]]) -> int:
+        """Write records as new Parquet files alongside the existing ones."""
+        if not records:
+            return 0
+        table = pa.Table.from_pylist(records, schema=catalog_schema())
+        ds.write_dataset(table, self.root, format='parquet', partitioning=self.partitioning,
+                         basename_template=f"part-{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}-{{i}}.parquet",
+                         existing_data_behavior='overwrite_or_ignore')
+        return len(records)
+
+    def export_from_manifest(self, manifest: Manifest, text_dir: Union[str, Path] = DEFAULT_TEXT_DIR,
+                             full: bool = False) -> int:
+        """
+        Append manifest rows that are new or changed since the last export.
+
+        Rows are selected by ``changed_at``, so documents that nightly runs
+        only re-checked are not appended again. Selection starts from the
+        second the previous export started, so a document recorded during
+        that second may be appended twice; queries keep only the latest
+        fetch of each document.
+
+        Returns:
+            Number of rows appended.
+        """
+        started = datetime.now()
+        since = None if full else self.last_export()
+        rows = manifest.fetched_documents(changed_since=since)
+        count = self.append([catalog_record(row, text_dir) for row in rows])
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_name(STATE_FILE + '.tmp')
+        tmp_path.write_text(json.dumps({'last_export': started.isoformat(timespec='seconds')}))
+        os.replace(tmp_path, self.state_path)
+        return count
+
+    def dataset(self) -> 'ds.Dataset':
+        return ds.dataset(self.root, format='parquet', partitioning=self.partitioning,
+                          schema=catalog_schema())
+
+    def query(self, jurisdiction: Optional[str] = None, body: Optional[str] = None,
+              year: Optional[int] = None, start: Optional[date] = None, end: Optional[date] = None,
+              min_size: Optional[int] = None, latest_only: bool = True) -> 'pa.Table':
+        """
+        Return matching rows as an Arrow table, newest meetings first.
+
+        Jurisdiction and year filters prune whole partitions; the rest run
+        vectorized over the remaining Parquet row groups.
+
+        Args:
+            jurisdiction: Exact jurisdiction name
+            body: Case-insensitive substring of the meeting body, e.g. ``"planning"``
+            year: Meeting year
+            start: Earliest meeting date
+            end: Latest meeting date
+            min_size: Smallest file size in bytes
+            latest_only: Keep only the most recent fetch of each document of each meeting
+        """
+        conditions = []
+        if jurisdiction:
+            conditions.append(ds.field('jurisdiction') == jurisdiction)
+        if year:
+            conditions.append(ds.field('year') == year)
+        if body:
+            conditions.append(pc.match_substring(ds.field('body'), body, ignore_case=True))
+        if start:
+            conditions.append(ds.field('meeting_date') >= start)
+        if end:
+            conditions.append(ds.field('meeting_date') <= end)
+        if min_size:
+            conditions.append(ds.field('size') >= min_size)
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        table = self.dataset().to_table(filter=expression)
+        if latest_only and table.num_rows:
+            keys = ['jurisdiction', 'meeting_id', 'url']
+            others = [name for name in table.column_names if name not in keys]
+            # Ordered "last" aggregation after sorting by fetch time keeps the newest fetch
+            table = table.sort_by('fetched_at').group_by(keys, use_threads=False).aggregate(
+                [(name, 'last') for name in others])
+            table = table.rename_columns([name.removesuffix('_last') for name in table.column_names])
+            table = table.select(catalog_schema().names)
+        return table.sort_by([('meeting_date', 'descending'), ('jurisdiction', 'ascending')])
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Columnar catalog of fetched meeting documents")
+    parser.add_argument('--catalog-dir', default=DEFAULT_CATALOG_DIR,
+                        help=f'Directory of the Parquet catalog (default: {DEFAULT_CATALOG_DIR})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export = commands.add_parser('export', help='Append documents new or changed since the last export')
+    export.add_argument('--manifest', default=DEFAULT_MANIFEST_PATH,
+                        help=f'Path of the SQLite crawl manifest (default: {DEFAULT_MANIFEST_PATH})')
+    export.add_argument('--text-dir', default=DEFAULT_TEXT_DIR,
+                        help=f'pdf_text.py output, for page counts (default: {DEFAULT_TEXT_DIR})')
+    export.add_argument('--full', action='store_true', help='Append every fetched document again')
+
+    query = commands.add_parser('query', help='Filter the catalog')
+    query.add_argument('--jurisdiction')
+    query.add_argument('--body', help='Substring of the meeting body, e.g. "planning"')
+    query.add_argument('--year', type=int)
+    query.add_argument('--from', dest='start', type=lambda s: datetime.strptime(s, '%Y-%m-%d').date())
+    query.add_argument('--to', dest='end', type=lambda s: datetime.strptime(s, '%Y-%m-%d').date())
+    query.add_argument('--min-mb', type=float, help='Only files at least this many MB')
+    query.add_argument('--all-fetches', action='store_true', help='Show every fetch, not just the latest')
+    query.add_argument('--limit', type=int, default=50, help='Rows to print')
+    args = parser.parse_args(argv)
+
+    try:
+        catalog = MeetingCatalog(args.catalog_dir)
+    except RuntimeError as e:
+        logger.error(str(e))
+        return 1
+    if args.command == 'export':
+        with Manifest(args.manifest) as manifest:
+            count = catalog.export_from_manifest(manifest, args.text_dir, args.full)
+        logger.info(f"Appended {count} rows to {catalog.root}")
+        return 0
+
+    if not catalog.root.exists():
+        logger.error(f"No catalog at {catalog.root}; run 'python catalog.py export' first")
+        return 1
+    started = time.perf_counter()
+    table = catalog.query(args.jurisdiction, args.body, args.year, args.start, args.end,
+                          int(args.min_mb * 1e6) if args.min_mb else None, not args.all_fetches)
+    elapsed = time.perf_counter() - started
+    for row in table.slice(0, args.limit).to_pylist():
+        pages = f"{row['page_count']} pages, " if row['page_count'] is not None else ''
+        size = f"{row['size'] / 1e6:.1f} MB" if row['size'] is not None else 'size unknown'
+        print(f"{row['meeting_date']} {row['jurisdiction']} - {row['body'] or 'Unknown'} ({pages}{size})")
+        print(f"    {row['url']}")
+    print(f"{table.num_rows} documents in {elapsed * 1000:.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,146 +1,196 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import StaleElementReferenceException
-import os
-import requests
-import time
-import json
-import glob
-
-def download_pdfs_with_selenium():
-    base_url = "https://go.boarddocs.com/ca/auhsd/Board.nsf/Public"
-    output_dir = "auhsd_board_agendas"
-    os.makedirs(output_dir, exist_ok=True)
-    pdf_count = 0
-    
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--disable-gpu")
-    prefs = {
-        "download.default_directory": os.path.abspath(output_dir),
-        "download.prompt_for_download": False,
-        "plugins.always_open_pdf_externally": True
-    }
-    chrome_options.add_experimental_option("prefs", prefs)
-    
-    chrome_driver_path = "C:/Windows/System32/chromedriver.exe"
-    service = Service(executable_path=chrome_driver_path)
-    service.log_path = "chromedriver.log"
-    service.log_level = "INFO"
-    
-    try:
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        print("WebDriver initialized successfully")
-    except Exception as e:
-        print(f"Failed to initialize WebDriver: {e}")
-        return
-    
-    try:
-        driver.get(base_url)
-        print("Page loaded")
-        time.sleep(5)
-        with open("initial_page.html", "w", encoding="utf-8") as f:
-            f.write(driver.page_source)
-        print("Initial page source saved to 'initial_page.html'")
-        
-        # Fetch JSON-LD once and process events
-        json_found = False
-        scripts = driver.find_elements(By.TAG_NAME, "script")
-        for script in scripts:
-            if "application/ld+json" in script.get_attribute("type"):
-                json_found = True
-                json_data = script.get_attribute("innerHTML")
-                print(f"JSON-LD: Found, length={len(json_data)} chars")
-                try:
-                    events = json.loads(json_data)
-                    if not isinstance(events, list):
-                        events = [events]
-                    
-                    print(f"Found {len(events)} events in JSON-LD")
-                    for j, event in enumerate(events):  # Process all events
-                        try:
-                            if event.get("@type") == "Event":
-                                date_text = event.get("startDate", "").split("T")[0].replace("-", "/")
-                                if "2024" not in date_text and "2025" not in date_text:
-                                    print(f"Event {j}: Skipping {date_text} (not 2024/2025)")
-                                    continue
-                                
-                                agenda_url = event.get("url")
-                                event_name = event.get("name", "Unknown_Event")
-                                print(f"Event {j}: {event_name} on {date_text}, URL={agenda_url}")
-                                
-                                driver.get(agenda_url)
-                                print(f"Event {j}: Navigated to agenda page")
-                                time.sleep(3)
-                                
-                                try:
-                                    download_button = WebDriverWait(driver, 10).until(
-                                        EC.element_to_be_clickable((By.ID, "btn-download-agenda-pdf"))
-                                    )
-                                    print(f"Event {j}: Found download button")
-                                    
-                                    driver.execute_script("arguments[0].click();", download_button)
-                                    print(f"Event {j}: Clicked download button")
-                                    time.sleep(10)
-                                    
-                                    filename = f"agenda_{date_text.replace('/', '_')}_{event_name.replace(' ', '_')}.pdf"
-                                    filepath = os.path.join(output_dir, filename)
-                                    print(f"Event {j}: Looking for {filename}")
-                                    
-                                    pdf_files = glob.glob(os.path.join(output_dir, "*.pdf"))
-                                    if pdf_files:
-                                        latest_pdf = max(pdf_files, key=os.path.getctime)
-                                        print(f"Event {j}: Found PDF: {latest_pdf}")
-                                        os.rename(latest_pdf, filepath)
-                                        pdf_count += 1
-                                    else:
-                                        print(f"Event {j}: No PDF found in directory")
-                                        with open(f"agenda_page_{j}.html", "w", encoding="utf-8") as f:
-                                            f.write(driver.page_source)
-                                        print(f"Event {j}: Saved agenda page to 'agenda_page_{j}.html'")
-                                
-                                except Exception as e:
-                                    print(f"Event {j}: Failed to process download: {e}")
-                                    with open(f"agenda_page_{j}.html", "w", encoding="utf-8") as f:
-                                        f.write(driver.page_source)
-                                    print(f"Event {j}: Saved agenda page to 'agenda_page_{j}.html'")
-                                
-                                # Return to base safely
-                                driver.get(base_url)
-                                time.sleep(2)
-                        
-                        except StaleElementReferenceException as e:
-                            print(f"Event {j}: Stale element error, skipping: {e}")
-                            driver.get(base_url)
-                            time.sleep(2)
-                        except Exception as e:
-                            print(f"Event {j}: Unexpected error, skipping: {e}")
-                            driver.get(base_url)
-                            time.sleep(2)
-                    
-                    break  # Process only first JSON-LD
-                
-                except Exception as e:
-                    print(f"JSON-LD: Error processing: {e}")
-                    break
-        if not json_found:
-            print("No JSON-LD scripts found on page")
-        
-    except Exception as e:
-        print(f"Unexpected error: {e}")
-        with open("error_page.html", "w", encoding="utf-8") as f:
-            f.write(driver.page_source)
-        print("Error page source saved to 'error_page.html'")
-        
-    finally:
-        driver.quit()
-        print(f"\nDownload complete. Total PDFs downloaded: {pdf_count}")
-
-if __name__ == "__main__":
-    import selenium
-    print(f"Selenium version: {selenium.__version__}")
-    download_pdfs_with_selenium()
\ No newline at end of file
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+import argparse
+import os
+import time
+import json
+import re
+from datetime import datetime
+from urllib.parse import urlparse
+from blob_store import sha256_file
+from boarddocs_events import (DEFAULT_EVENT_CACHE, DEFAULT_EVENT_TTL_HOURS, add_event_cache_arguments,
+                              cached_events)
+from download_capture import capture_download
+from download_utils import get_rate_limiter
+from manifest import Manifest, add_window_arguments, resolve_window
+from webdriver_pool import WebDriverPool, default_pool_size
+
+JURISDICTION = "AUHSD"
+BASE_URL = "https://go.boarddocs.com/ca/auhsd/Board.nsf/Public"
+OUTPUT_DIR = "auhsd_board_agendas"
+
+def event_id_from_url(url):
+    """Return the BoardDocs meeting ID from an agenda URL, or the URL itself."""
+    match = re.search(r'[?&]id=([A-Za-z0-9]+)', url or '')
+    return match.group(1) if match else url
+
+def make_driver(download_dir):
+    """Start a headless Chrome that saves downloads into download_dir."""
+    os.makedirs(download_dir, exist_ok=True)
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--disable-gpu")
+    prefs = {
+        "download.default_directory": os.path.abspath(download_dir),
+        "download.prompt_for_download": False,
+        "plugins.always_open_pdf_externally": True
+    }
+    chrome_options.add_experimental_option("prefs", prefs)
+
+    chrome_driver_path = "C:/Windows/System32/chromedriver.exe"
+    service = Service(executable_path=chrome_driver_path)
+    service.log_path = "chromedriver.log"
+    service.log_level = "INFO"
+
+    return webdriver.Chrome(service=service, options=chrome_options)
+
+def load_events(driver, base_url):
+    """Load the public page and return the events from its first JSON-LD block."""
+    driver.get(base_url)
+    print("Page loaded")
+    time.sleep(5)
+    with open("initial_page.html", "w", encoding="utf-8") as f:
+        f.write(driver.page_source)
+    print("Initial page source saved to 'initial_page.html'")
+
+    scripts = driver.find_elements(By.TAG_NAME, "script")
+    for script in scripts:
+        if "application/ld+json" in script.get_attribute("type"):
+            json_data = script.get_attribute("innerHTML")
+            print(f"JSON-LD: Found, length={len(json_data)} chars")
+            events = json.loads(json_data)
+            if not isinstance(events, list):
+                events = [events]
+            print(f"Found {len(events)} events in JSON-LD")
+            return events
+    print("No JSON-LD scripts found on page")
+    return []
+
+def select_events(events, start_date, end_date):
+    """Return (index, event, event_date) for the Event entries inside the date window."""
+    selected = []
+    for j, event in enumerate(events):
+        if event.get("@type") != "Event":
+            continue
+        iso_date = event.get("startDate", "").split("T")[0]
+        date_text = iso_date.replace("-", "/")
+        try:
+            event_date = datetime.strptime(iso_date, "%Y-%m-%d").date()
+        except ValueError:
+            print(f"Event {j}: Skipping unparseable date {iso_date!r}")
+            continue
+        if not start_date <= event_date <= end_date:
+            print(f"Event {j}: Skipping {date_text} (outside {start_date} to {end_date})")
+            continue
+        selected.append((j, event, event_date))
+    return selected
+
+def download_event_agenda(driver, task, output_dir, manifest):
+    """Open one event's agenda page and save its agenda PDF; returns the file path."""
+    j, event, event_date = task
+    date_text = event_date.strftime("%Y/%m/%d")
+    agenda_url = event.get("url")
+    event_name = event.get("name", "Unknown_Event")
+    print(f"Event {j}: {event_name} on {date_text}, URL={agenda_url}")
+
+    try:
+        # Pace page loads per host instead of sleeping a fixed time after each one
+        get_rate_limiter().acquire(urlparse(agenda_url).netloc)
+        driver.get(agenda_url)
+        print(f"Event {j}: Navigated to agenda page")
+
+        download_button = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.ID, "btn-download-agenda-pdf"))
+        )
+        print(f"Event {j}: Found download button")
+
+        filename = f"agenda_{date_text.replace('/', '_')}_{event_name.replace(' ', '_')}.pdf"
+        filepath = os.path.join(output_dir, filename)
+
+        capture_download(
+            driver,
+            lambda: driver.execute_script("arguments[0].click();", download_button),
+            filepath, timeout=60)
+        print(f"Event {j}: Saved {filename}")
+        manifest.record(JURISDICTION, event_id_from_url(agenda_url), event_date,
+                        agenda_url, 'downloaded', meeting_type=event_name,
+                        filepath=filepath, sha256=sha256_file(filepath),
+                        size=os.path.getsize(filepath))
+        return filepath
+
+    except Exception as e:
+        print(f"Event {j}: Failed to process download: {e}")
+        try:
+            with open(f"agenda_page_{j}.html", "w", encoding="utf-8") as f:
+                f.write(driver.page_source)
+            print(f"Event {j}: Saved agenda page to 'agenda_page_{j}.html'")
+        except Exception:
+            pass
+        raise
+
+def fetch_events(base_url, output_dir):
+    """Start a browser just to read the event list from the landing page."""
+    try:
+        driver = make_driver(output_dir)
+        print("WebDriver initialized successfully")
+    except Exception as e:
+        print(f"Failed to initialize WebDriver: {e}")
+        return []
+
+    try:
+        return load_events(driver, base_url)
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        with open("error_page.html", "w", encoding="utf-8") as f:
+            f.write(driver.page_source)
+        print("Error page source saved to 'error_page.html'")
+        return []
+    finally:
+        driver.quit()
+
+def download_pdfs_with_selenium(start_date, end_date, manifest, workers=1, recycle_after=50,
+                                event_cache=DEFAULT_EVENT_CACHE, event_ttl_hours=DEFAULT_EVENT_TTL_HOURS,
+                                refresh_events=False):
+    base_url = BASE_URL
+    output_dir = OUTPUT_DIR
+    os.makedirs(output_dir, exist_ok=True)
+
+    # The landing page is only loaded when the saved event list has expired;
+    # each browser then goes straight from one agenda URL to the next
+    events = cached_events(event_cache, base_url, lambda: fetch_events(base_url, output_dir),
+                           ttl=event_ttl_hours * 3600, refresh=refresh_events)
+
+    tasks = select_events(events, start_date, end_date)
+    print(f"Processing {len(tasks)} events with {workers} browser(s)")
+    pool = WebDriverPool(
+        lambda worker_id: make_driver(os.path.join(output_dir, ".incoming", f"worker_{worker_id}")),
+        size=workers, recycle_after=recycle_after)
+    results = pool.map(
+        lambda worker_driver, task: download_event_agenda(worker_driver, task, output_dir, manifest),
+        tasks)
+
+    pdf_count = sum(1 for result in results if result.ok)
+    for result in results:
+        if not result.ok:
+            print(f"Event {result.task[0]}: Failed after {result.attempts} attempt(s): {result.error}")
+    print(f"\nDownload complete. Total PDFs downloaded: {pdf_count}")
+
+if __name__ == "__main__":
+    import selenium
+    print(f"Selenium version: {selenium.__version__}")
+    parser = argparse.ArgumentParser(description="Download AUHSD BoardDocs agendas")
+    add_window_arguments(parser)
+    parser.add_argument('--workers', type=int, default=default_pool_size(),
+                        help='Number of headless browsers to run in parallel')
+    parser.add_argument('--recycle-after', type=int, default=50,
+                        help='Restart each browser after this many meetings')
+    add_event_cache_arguments(parser)
+    args = parser.parse_args()
+    with Manifest(args.manifest) as manifest:
+        start_date, end_date = resolve_window(args, manifest, JURISDICTION)
+        download_pdfs_with_selenium(start_date, end_date, manifest, args.workers, args.recycle_after,
+                                    args.event_cache, args.event_ttl, args.refresh_events)
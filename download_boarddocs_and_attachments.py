@@ -1,169 +1,153 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import StaleElementReferenceException
-import os
-import requests
-import time
-import json
-import glob
-
-def download_pdfs_with_selenium():
-    base_url = "https://go.boarddocs.com/ca/auhsd/Board.nsf/Public"
-    output_dir = "auhsd_board_agendas"
-    os.makedirs(output_dir, exist_ok=True)
-    pdf_count = 0
-    
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--disable-gpu")
-    prefs = {
-        "download.default_directory": os.path.abspath(output_dir),
-        "download.prompt_for_download": False,
-        "plugins.always_open_pdf_externally": True
-    }
-    chrome_options.add_experimental_option("prefs", prefs)
-    
-    chrome_driver_path = "C:/Windows/System32/chromedriver.exe"
-    service = Service(executable_path=chrome_driver_path)
-    service.log_path = "chromedriver.log"
-    service.log_level = "INFO"
-    
-    try:
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        print("WebDriver initialized successfully")
-    except Exception as e:
-        print(f"Failed to initialize WebDriver: {e}")
-        return
-    
-    try:
-        driver.get(base_url)
-        print("Page loaded")
-        time.sleep(5)
-        with open("initial_page.html", "w", encoding="utf-8") as f:
-            f.write(driver.page_source)
-        print("Initial page source saved to 'initial_page.html'")
-        
-        # Fetch JSON-LD once and process events
-        json_found = False
-        scripts = driver.find_elements(By.TAG_NAME, "script")
-        for script in scripts:
-            if "application/ld+json" in script.get_attribute("type"):
-                json_found = True
-                json_data = script.get_attribute("innerHTML")
-                print(f"JSON-LD: Found, length={len(json_data)} chars")
-                try:
-                    events = json.loads(json_data)
-                    if not isinstance(events, list):
-                        events = [events]
-                    
-                    print(f"Found {len(events)} events in JSON-LD")
-                    for j, event in enumerate(events):
-                        try:
-                            if event.get("@type") == "Event":
-                                date_text = event.get("startDate", "").split("T")[0].replace("-", "/")
-                                if "2024" not in date_text and "2025" not in date_text:
-                                    print(f"Event {j}: Skipping {date_text} (not 2024/2025)")
-                                    continue
-                                
-                                agenda_url = event.get("url")
-                                event_name = event.get("name", "Unknown_Event")
-                                print(f"Event {j}: {event_name} on {date_text}, URL={agenda_url}")
-                                
-                                driver.get(agenda_url)
-                                print(f"Event {j}: Navigated to agenda page")
-                                time.sleep(3)
-                                
-                                # Extract embedded PDF links from the HTML
-                                try:
-                                    pdf_links = WebDriverWait(driver, 10).until(
-                                        EC.presence_of_all_elements_located((By.XPATH, "//a[contains(@href, '.pdf')]"))
-                                    )
-                                    for i, link in enumerate(pdf_links):
-                                        pdf_url = link.get_attribute("href")
-                                        if pdf_url:
-                                            pdf_filename = f"{date_text.replace('/', '_')}_{event_name.replace(' ', '_')}_attachment_{i}.pdf"
-                                            pdf_filepath = os.path.join(output_dir, pdf_filename)
-                                            print(f"Event {j}: Downloading attachment {i}: {pdf_url}")
-                                            try:
-                                                pdf_response = requests.get(pdf_url, timeout=10)
-                                                pdf_response.raise_for_status()
-                                                with open(pdf_filepath, 'wb') as f:
-                                                    f.write(pdf_response.content)
-                                                pdf_count += 1
-                                            except Exception as e:
-                                                print(f"Event {j}: Failed to download attachment {i}: {e}")
-                                except Exception as e:
-                                    print(f"Event {j}: No embedded PDF links found: {e}")
-                                
-                                # Download main agenda PDF
-                                try:
-                                    download_button = WebDriverWait(driver, 10).until(
-                                        EC.element_to_be_clickable((By.ID, "btn-download-agenda-pdf"))
-                                    )
-                                    print(f"Event {j}: Found download button")
-                                    
-                                    driver.execute_script("arguments[0].click();", download_button)
-                                    print(f"Event {j}: Clicked download button")
-                                    time.sleep(10)
-                                    
-                                    filename = f"agenda_{date_text.replace('/', '_')}_{event_name.replace(' ', '_')}.pdf"
-                                    filepath = os.path.join(output_dir, filename)
-                                    print(f"Event {j}: Looking for {filename}")
-                                    
-                                    pdf_files = glob.glob(os.path.join(output_dir, "*.pdf"))
-                                    if pdf_files:
-                                        latest_pdf = max(pdf_files, key=os.path.getctime)
-                                        print(f"Event {j}: Found PDF: {latest_pdf}")
-                                        os.rename(latest_pdf, filepath)
-                                        pdf_count += 1
-                                    else:
-                                        print(f"Event {j}: No PDF found in directory")
-                                        with open(f"agenda_page_{j}.html", "w", encoding="utf-8") as f:
-                                            f.write(driver.page_source)
-                                        print(f"Event {j}: Saved agenda page to 'agenda_page_{j}.html'")
-                                
-                                except Exception as e:
-                                    print(f"Event {j}: Failed to process main download: {e}")
-                                    with open(f"agenda_page_{j}.html", "w", encoding="utf-8") as f:
-                                        f.write(driver.page_source)
-                                    print(f"Event {j}: Saved agenda page to 'agenda_page_{j}.html'")
-                                
-                                # Return to base safely
-                                driver.get(base_url)
-                                time.sleep(2)
-                        
-                        except StaleElementReferenceException as e:
-                            print(f"Event {j}: Stale element error, skipping: {e}")
-                            driver.get(base_url)
-                            time.sleep(2)
-                        except Exception as e:
-                            print(f"Event {j}: Unexpected error, skipping: {e}")
-                            driver.get(base_url)
-                            time.sleep(2)
-                    
-                    break  # Process only first JSON-LD
-                
-                except Exception as e:
-                    print(f"JSON-LD: Error processing: {e}")
-                    break
-        if not json_found:
-            print("No JSON-LD scripts found on page")
-        
-    except Exception as e:
-        print(f"Unexpected error: {e}")
-        with open("error_page.html", "w", encoding="utf-8") as f:
-            f.write(driver.page_source)
-        print("Error page source saved to 'error_page.html'")
-        
-    finally:
-        driver.quit()
-        print(f"\nDownload complete. Total PDFs downloaded: {pdf_count}")
-
-if __name__ == "__main__":
-    import selenium
-    print(f"Selenium version: {selenium.__version__}")
-    download_pdfs_with_selenium()
\ No newline at end of file
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import StaleElementReferenceException
+import argparse
+import os
+from blob_store import BlobStore, sha256_file
+from download_capture import capture_download
+from manifest import Manifest, add_window_arguments, resolve_window
+from urllib.parse import urlparse
+from boarddocs_events import (DEFAULT_EVENT_CACHE, DEFAULT_EVENT_TTL_HOURS, add_event_cache_arguments,
+                              cached_events)
+from download_boarddocs import event_id_from_url, load_events, select_events
+from download_utils import get_rate_limiter
+from pipeline import DownloadJob, DownloadPipeline
+
+JURISDICTION = "AUHSD"
+
+def download_pdfs_with_selenium(start_date, end_date, manifest, event_cache=DEFAULT_EVENT_CACHE,
+                                event_ttl_hours=DEFAULT_EVENT_TTL_HOURS, refresh_events=False,
+                                blob_dir=None):
+    base_url = "https://go.boarddocs.com/ca/auhsd/Board.nsf/Public"
+    output_dir = "auhsd_board_agendas"
+    os.makedirs(output_dir, exist_ok=True)
+    # Attachments are often shared between meetings; with blob_dir, keep each body once
+    blob_store = BlobStore(blob_dir) if blob_dir else None
+    # Agendas are counted here; attachments by the pipeline, whose callbacks run on its threads
+    agenda_count = 0
+
+    def record_attachment(job, result):
+        event_id, event_date, event_name = job.context
+        manifest.record_result(JURISDICTION, event_id, event_date, result, meeting_type=event_name)
+        if not result.ok:
+            print(f"Failed to download attachment {result.url}: {result.error}")
+    
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--disable-gpu")
+    prefs = {
+        "download.default_directory": os.path.abspath(output_dir),
+        "download.prompt_for_download": False,
+        "plugins.always_open_pdf_externally": True
+    }
+    chrome_options.add_experimental_option("prefs", prefs)
+    
+    chrome_driver_path = "C:/Windows/System32/chromedriver.exe"
+    service = Service(executable_path=chrome_driver_path)
+    service.log_path = "chromedriver.log"
+    service.log_level = "INFO"
+    
+    try:
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+        print("WebDriver initialized successfully")
+    except Exception as e:
+        print(f"Failed to initialize WebDriver: {e}")
+        return
+    
+    # Attachments download in the background while the browser moves on to the next event
+    attachments = DownloadPipeline(workers=4, blob_store=blob_store, on_result=record_attachment)
+    
+    try:
+        # The landing page is only loaded when the saved event list has expired;
+        # the browser then goes straight from one agenda URL to the next
+        events = cached_events(event_cache, base_url, lambda: load_events(driver, base_url),
+                               ttl=event_ttl_hours * 3600, refresh=refresh_events)
+        for j, event, event_date in select_events(events, start_date, end_date):
+            date_text = event_date.strftime("%Y/%m/%d")
+            try:
+                agenda_url = event.get("url")
+                event_name = event.get("name", "Unknown_Event")
+                print(f"Event {j}: {event_name} on {date_text}, URL={agenda_url}")
+            
+                # Pace page loads per host instead of sleeping a fixed time after each one
+                get_rate_limiter().acquire(urlparse(agenda_url).netloc)
+                driver.get(agenda_url)
+                print(f"Event {j}: Navigated to agenda page")
+            
+                # Extract embedded PDF links from the HTML
+                try:
+                    pdf_links = WebDriverWait(driver, 10).until(
+                        EC.presence_of_all_elements_located((By.XPATH, "//a[contains(@href, '.pdf')]"))
+                    )
+                    for i, link in enumerate(pdf_links):
+                        pdf_url = link.get_attribute("href")
+                        if pdf_url:
+                            pdf_filename = f"{date_text.replace('/', '_')}_{event_name.replace(' ', '_')}_attachment_{i}.pdf"
+                            pdf_filepath = os.path.join(output_dir, pdf_filename)
+                            print(f"Event {j}: Queued attachment {i}: {pdf_url}")
+                            attachments.submit(DownloadJob(
+                                pdf_url, pdf_filepath,
+                                (event_id_from_url(agenda_url), event_date, event_name)))
+                except Exception as e:
+                    print(f"Event {j}: No embedded PDF links found: {e}")
+            
+                # Download main agenda PDF
+                try:
+                    download_button = WebDriverWait(driver, 10).until(
+                        EC.element_to_be_clickable((By.ID, "btn-download-agenda-pdf"))
+                    )
+                    print(f"Event {j}: Found download button")
+                
+                    filename = f"agenda_{date_text.replace('/', '_')}_{event_name.replace(' ', '_')}.pdf"
+                    filepath = os.path.join(output_dir, filename)
+
+                    capture_download(
+                        driver,
+                        lambda: driver.execute_script("arguments[0].click();", download_button),
+                        filepath, timeout=60)
+                    print(f"Event {j}: Saved {filename}")
+                    agenda_count += 1
+                    manifest.record(JURISDICTION, event_id_from_url(agenda_url), event_date,
+                                    agenda_url, 'downloaded', meeting_type=event_name,
+                                    filepath=filepath, sha256=sha256_file(filepath),
+                                    size=os.path.getsize(filepath))
+            
+                except Exception as e:
+                    print(f"Event {j}: Failed to process main download: {e}")
+                    with open(f"agenda_page_{j}.html", "w", encoding="utf-8") as f:
+                        f.write(driver.page_source)
+                    print(f"Event {j}: Saved agenda page to 'agenda_page_{j}.html'")
+
+            except StaleElementReferenceException as e:
+                print(f"Event {j}: Stale element error, skipping: {e}")
+            except Exception as e:
+                print(f"Event {j}: Unexpected error, skipping: {e}")
+        
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        with open("error_page.html", "w", encoding="utf-8") as f:
+            f.write(driver.page_source)
+        print("Error page source saved to 'error_page.html'")
+        
+    finally:
+        driver.quit()
+        attachments.close()
+        print(f"\nDownload complete. Total PDFs downloaded: {agenda_count + attachments.succeeded}")
+
+if __name__ == "__main__":
+    import selenium
+    print(f"Selenium version: {selenium.__version__}")
+    parser = argparse.ArgumentParser(description="Download AUHSD BoardDocs agendas")
+    add_window_arguments(parser)
+    add_event_cache_arguments(parser)
+    parser.add_argument('--blob-dir', help='Store each distinct attachment once in this directory')
+    args = parser.parse_args()
+    with Manifest(args.manifest) as manifest:
+        start_date, end_date = resolve_window(args, manifest, JURISDICTION)
+        download_pdfs_with_selenium(start_date, end_date, manifest,
+                                    args.event_cache, args.event_ttl, args.refresh_events,
+                                    args.blob_dir)
\ No newline at end of file
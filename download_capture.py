@@ -0,0 +1,86 @@
+import logging
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Suffixes Chrome uses for downloads that are still in progress
+IN_PROGRESS_SUFFIXES = ('.crdownload', '.tmp', '.part')
+
+class DownloadTimeout(TimeoutError):
+    """Raised when a browser download does not finish in time."""
+
+def set_download_directory(driver, directory: Union[str, Path]) -> None:
+    """Point Chrome's downloads at ``directory`` via the DevTools protocol."""
+    params = {'behavior': 'allow', 'downloadPath': str(Path(directory).resolve())}
+    try:
+        driver.execute_cdp_cmd('Browser.setDownloadBehavior', params)
+    except Exception:
+        # Older Chrome versions only expose the Page-level command
+        driver.execute_cdp_cmd('Page.setDownloadBehavior', params)
+
+def wait_for_download(directory: Union[str, Path], timeout: float = 60,
+                      poll_interval: float = 0.2) -> Path:
+    """
+    Wait until exactly one finished file appears in ``directory``.
+
+    A file counts as finished once no in-progress marker remains and its size
+    is unchanged between two polls.
+
+    Returns:
+        Path of the downloaded file.
+    """
+    directory = Path(directory)
+    deadline = time.monotonic() + timeout
+    last_sizes = {}
+    while time.monotonic() < deadline:
+        entries = list(directory.iterdir())
+        pending = [p for p in entries if p.suffix in IN_PROGRESS_SUFFIXES]
+        finished = [p for p in entries if p.suffix not in IN_PROGRESS_SUFFIXES]
+        if finished and not pending:
+            sizes = {p: p.stat().st_size for p in finished}
+            if sizes == last_sizes and all(sizes.values()):
+                if len(finished) > 1:
+                    logger.warning(f"Several files in {directory}, using the largest")
+                return max(finished, key=lambda p: sizes[p])
+            last_sizes = sizes
+        time.sleep(poll_interval)
+    raise DownloadTimeout(f"No completed download in {directory} after {timeout}s")
+
+def capture_download(driver, trigger: Callable[[], None], destination: Union[str, Path],
+                     staging_root: Optional[Union[str, Path]] = None, timeout: float = 60) -> Path:
+    """
+    Run ``trigger`` (e.g. a button click) and move the file it downloads to ``destination``.
+
+    Each call gets its own empty staging directory, so the downloaded file is
+    identified exactly instead of guessing by modification time.
+
+    Args:
+        driver: Chrome WebDriver
+        trigger: Callable that starts the download
+        destination: Final path for the downloaded file
+        staging_root: Where to create the per-download directory; defaults to
+            a hidden folder next to ``destination`` so the final move is a rename
+        timeout: Seconds to wait for the download to complete
+
+    Returns:
+        The destination path.
+    """
+    destination = Path(destination)
+    staging_root = Path(staging_root) if staging_root else destination.parent / '.incoming'
+    staging_root.mkdir(parents=True, exist_ok=True)
+    staging_dir = Path(tempfile.mkdtemp(prefix='download_', dir=staging_root))
+    try:
+        set_download_directory(driver, staging_dir)
+        started = time.monotonic()
+        trigger()
+        downloaded = wait_for_download(staging_dir, timeout)
+        os.replace(downloaded, destination)
+        logger.info(f"Captured {downloaded.name} -> {destination} in {time.monotonic() - started:.1f}s")
+        return destination
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
@@ -1,51 +1,584 @@
-import logging
-import os
-from pathlib import Path
-import requests
-from typing import Union
-
-logger = logging.getLogger(__name__)
-
-def setup_download_directory(dir_name: str) -> Path:
-    """Create and return download directory path."""
-    download_dir = Path(dir_name)
-    download_dir.mkdir(exist_ok=True)
-    return download_dir
-
-def download_file(url: str, filepath: Union[str, Path], chunk_size: int = 8192) -> None:
-    """
-    Download a file from URL to specified path with progress tracking.
-
-    Args:
-        url: Source URL
-        filepath: Destination file path
-        chunk_size: Size of chunks for streaming download
-    """
-    try:
-        response = requests.get(url, stream=True, timeout=30)
-        response.raise_for_status()
-
-        total_size = int(response.headers.get('content-length', 0))
-        filepath = Path(filepath) if isinstance(filepath, str) else filepath
-
-        with open(filepath, 'wb') as file:
-            if total_size == 0:
-                file.write(response.content)
-            else:
-                downloaded = 0
-                for chunk in response.iter_content(chunk_size=chunk_size):
-                    if chunk:
-                        file.write(chunk)
-                        downloaded += len(chunk)
-                        progress = (downloaded / total_size) * 100
-                        print(f"\rProgress: {progress:.1f}%", end="", flush=True)
-                print()  # New line after progress
-
-        logger.info(f"Successfully downloaded: {filepath}")
-
-    except requests.RequestException as e:
-        logger.error(f"Download failed: {e}")
-        filepath = Path(filepath) if isinstance(filepath, str) else filepath
-        if filepath.exists():
-            filepath.unlink()  # Remove partial download
-        raise
\ No newline at end of file
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from blob_store import BlobStore
+from metrics import get_metrics
+from retry_policy import CircuitOpenError, RetryPolicy, RetryQueue, get_retry_policy, is_retryable
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) timeout applied to every request that does not set its own
+DEFAULT_TIMEOUT = (10, 30)
+POOL_CONNECTIONS = 10  # Number of hosts to keep connection pools for
+POOL_MAXSIZE = 16  # Keep-alive connections per host; keep >= download concurrency
+USER_AGENT = "Mozilla/5.0 (compatible; govwiki-scraper/1.0)"
+DEFAULT_CHUNK_SIZE = 64 * 1024  # Bytes requested from the socket per read
+WRITE_BUFFER_SIZE = 1024 * 1024  # Bytes gathered before each hash update and disk write
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_rate_limiter: Optional['HostRateLimiter'] = None
+_rate_limiter_lock = threading.Lock()
+
+def parse_retry_after(value: Optional[str]) -> float:
+    """Return the delay in seconds from a Retry-After header (seconds or HTTP date)."""
+    if not value:
+        return 0.0
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return 0.0
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+@dataclass
+class _Bucket:
+    rate: float
+    tokens: float
+    updated: float = field(default_factory=time.monotonic)
+    blocked_until: float = 0.0
+
+class HostRateLimiter:
+    """
+    Adaptive token bucket per host.
+
+    Each host starts at ``initial_rate`` requests per second. Fast successful
+    responses raise the rate additively; 429/503 responses, connection
+    errors and slow responses cut it multiplicatively, and a Retry-After
+    header pauses the host entirely until it has passed.
+
+    Args:
+        initial_rate: Starting requests/second for a new host
+        min_rate: Floor for the rate
+        max_rate: Ceiling for the rate
+        burst: Bucket size (requests allowed back to back)
+        increase: Rate added after each fast success
+        decrease_factor: Rate multiplier after a throttling response or error
+        slow_response: Seconds after which a response counts as slow
+    """
+
+    THROTTLE_STATUSES = (429, 503)
+
+    def __init__(self, initial_rate: float = 2.0, min_rate: float = 0.2, max_rate: float = 20.0,
+                 burst: float = 4.0, increase: float = 0.25, decrease_factor: float = 0.5,
+                 slow_response: float = 5.0):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.slow_response = slow_response
+        self._buckets: Dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host: str, now: float) -> _Bucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = _Bucket(self.initial_rate, self.burst, now)
+        if now > bucket.updated:
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * bucket.rate)
+            bucket.updated = now
+        return bucket
+
+    def acquire(self, host: str) -> float:
+        """
+        Block until a request to ``host`` is allowed.
+
+        Returns:
+            Seconds spent waiting.
+        """
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._bucket(host, now)
+            # Reserve a token now; a negative balance queues later callers behind us
+            bucket.tokens -= 1
+            wait = max(bucket.blocked_until - now, -bucket.tokens / bucket.rate, 0.0)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def record(self, host: str, status: Optional[int], elapsed: float,
+               retry_after: Optional[str] = None) -> None:
+        """Adjust the host's rate from the outcome of a request (status None = connection error or timeout)."""
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._bucket(host, now)
+            if status is None or status in self.THROTTLE_STATUSES:
+                bucket.rate = max(self.min_rate, bucket.rate * self.decrease_factor)
+                delay = parse_retry_after(retry_after)
+                if delay:
+                    bucket.blocked_until = max(bucket.blocked_until, now + delay)
+                    # Start from an empty bucket once the pause is over
+                    bucket.tokens = min(bucket.tokens, 0.0)
+                    bucket.updated = max(bucket.updated, bucket.blocked_until)
+                logger.warning(f"Throttling {host}: {status or 'connection error or timeout'}, "
+                               f"rate now {bucket.rate:.2f}/s" + (f", paused {delay:.0f}s" if delay else ""))
+            elif elapsed > self.slow_response:
+                bucket.rate = max(self.min_rate, bucket.rate * (1 + self.decrease_factor) / 2)
+            elif status < 400:
+                bucket.rate = min(self.max_rate, bucket.rate + self.increase)
+
+    def rate(self, host: str) -> float:
+        with self._lock:
+            bucket = self._buckets.get(host)
+            return bucket.rate if bucket else self.initial_rate
+
+def get_rate_limiter() -> HostRateLimiter:
+    """Return the process-wide per-host rate limiter."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = HostRateLimiter()
+    return _rate_limiter
+
+def set_rate_limiter(limiter: HostRateLimiter) -> None:
+    """Replace the process-wide rate limiter, including on the shared session."""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        _rate_limiter = limiter
+    if _session is not None:
+        for adapter in _session.adapters.values():
+            if isinstance(adapter, TimeoutHTTPAdapter) and adapter.rate_limiter is not None:
+                adapter.rate_limiter = limiter
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that fills in a default timeout when the caller omits one
+    and, when given a rate limiter, paces requests per host through it.
+    """
+
+    def __init__(self, *args, timeout=DEFAULT_TIMEOUT,
+                 rate_limiter: Optional[HostRateLimiter] = None, **kwargs):
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        host = urlparse(request.url).netloc
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(host)
+        started = time.monotonic()
+        try:
+            response = super().send(request, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            # Read timeouts are not ConnectionErrors but are the clearest sign of an overloaded host
+            get_metrics().inc('http_requests_total', host=host, status='error')
+            if self.rate_limiter is not None:
+                self.rate_limiter.record(host, None, time.monotonic() - started)
+            raise
+        metrics = get_metrics()
+        metrics.inc('http_requests_total', host=host, status=response.status_code)
+        metrics.observe('http_request_seconds', response.elapsed.total_seconds(), host=host)
+        if self.rate_limiter is not None:
+            self.rate_limiter.record(host, response.status_code, response.elapsed.total_seconds(),
+                                     response.headers.get('retry-after'))
+        return response
+
+@dataclass
+class DownloadResult:
+    """Outcome of a single item in a batch download."""
+    url: str
+    filepath: Path
+    ok: bool
+    size: int = 0
+    error: Optional[str] = None
+    not_modified: bool = False
+    sha256: Optional[str] = None
+
+def create_session(timeout=DEFAULT_TIMEOUT, pool_connections: int = POOL_CONNECTIONS,
+                   pool_maxsize: int = POOL_MAXSIZE,
+                   rate_limiter: Optional[HostRateLimiter] = None) -> requests.Session:
+    """
+    Build a requests Session with a tuned keep-alive connection pool.
+
+    Args:
+        timeout: Default (connect, read) timeout for requests without one
+        pool_connections: Number of per-host pools to cache
+        pool_maxsize: Maximum pooled connections per host
+        rate_limiter: Per-host limiter every request waits on (None = unthrottled)
+
+    Returns:
+        A new Session with the adapter mounted for http and https.
+    """
+    session = requests.Session()
+    adapter = TimeoutHTTPAdapter(timeout=timeout, rate_limiter=rate_limiter,
+                                 pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'User-Agent': USER_AGENT, 'Connection': 'keep-alive'})
+    return session
+
+def get_session() -> requests.Session:
+    """Return the process-wide shared Session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session(rate_limiter=get_rate_limiter())
+    return _session
+
+class ValidatorStore:
+    """
+    Sidecar JSON file remembering ETag/Last-Modified per URL.
+
+    Lets reruns send conditional requests and skip bodies the server reports
+    as unchanged. Safe to share between download threads.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, str]] = {}
+        if self.path.exists():
+            try:
+                self._entries = json.loads(self.path.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable validator store {self.path}: {e}")
+
+    def get(self, url: str) -> Dict[str, str]:
+        """Return the stored validators for ``url`` (possibly empty)."""
+        with self._lock:
+            return dict(self._entries.get(url, {}))
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Build If-None-Match/If-Modified-Since headers for ``url``."""
+        entry = self.get(url)
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def update(self, url: str, response_headers) -> None:
+        """Record the validators from a successful response and persist them."""
+        entry = {}
+        if response_headers.get('etag'):
+            entry['etag'] = response_headers['etag']
+        if response_headers.get('last-modified'):
+            entry['last_modified'] = response_headers['last-modified']
+        with self._lock:
+            if entry:
+                self._entries[url] = entry
+            else:
+                self._entries.pop(url, None)
+            tmp_path = self.path.with_name(self.path.name + '.tmp')
+            tmp_path.write_text(json.dumps(self._entries, indent=1, sort_keys=True), encoding='utf-8')
+            os.replace(tmp_path, self.path)
+
+def setup_download_directory(dir_name: str) -> Path:
+    """Create and return download directory path."""
+    download_dir = Path(dir_name)
+    download_dir.mkdir(exist_ok=True)
+    return download_dir
+
+class IncompleteDownloadError(requests.RequestException):
+    """Raised when the bytes received do not match the advertised length."""
+    retryable = True
+
+def part_path_for(filepath: Path) -> Path:
+    """Return the temporary ``.part`` path used while downloading ``filepath``."""
+    return filepath.with_name(filepath.name + '.part')
+
+def _parse_content_range_total(value: str) -> int:
+    """Return the complete length from a ``Content-Range`` header, or 0 if unknown."""
+    match = re.match(r'bytes\s+\d+-\d+/(\d+)', value or '')
+    return int(match.group(1)) if match else 0
+
+def stream_to_file(response: requests.Response, file, hasher=None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE, buffer_size: int = WRITE_BUFFER_SIZE,
+                   on_flush: Optional[Callable[[int], None]] = None) -> Tuple[int, float]:
+    """
+    Copy a streamed response body into ``file`` through one reusable buffer.
+
+    Network chunks are gathered in a preallocated ``buffer_size`` buffer that
+    is hashed and written out whenever it fills, so memory use is bounded by
+    the buffer and chunk sizes however large the body is.
+
+    Args:
+        response: Response opened with ``stream=True``
+        file: Binary file object to write to
+        hasher: hashlib object updated with every byte written
+        chunk_size: Bytes to ask the connection for per read
+        buffer_size: Bytes to collect before each write
+        on_flush: Called with the running byte count after each write
+
+    Each write is timed (and, with ``--profile write``, profiled) as one
+    pass through the ``write`` stage.
+
+    Returns:
+        (bytes written, seconds spent in file writes)
+    """
+    buffer = bytearray(max(buffer_size, chunk_size))
+    view = memoryview(buffer)
+    filled = written = 0
+    write_seconds = 0.0
+    metrics = get_metrics()
+
+    def write(data) -> None:
+        nonlocal written, write_seconds
+        if hasher is not None:
+            hasher.update(data)
+        started = time.perf_counter()
+        with metrics.stage('write'):
+            file.write(data)
+        write_seconds += time.perf_counter() - started
+        written += len(data)
+        if on_flush is not None:
+            on_flush(written)
+
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        size = len(chunk)
+        if filled + size > len(buffer):
+            write(view[:filled])
+            filled = 0
+        if size > len(buffer):
+            # A decompressed chunk can outgrow the buffer; write it as is
+            write(chunk)
+            continue
+        view[filled:filled + size] = chunk
+        filled += size
+    if filled:
+        write(view[:filled])
+    return written, write_seconds
+
+def download_file(url: str, filepath: Union[str, Path], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  show_progress: bool = True, resume: bool = False,
+                  validators: Optional[ValidatorStore] = None,
+                  blob_store: Optional[BlobStore] = None,
+                  buffer_size: int = WRITE_BUFFER_SIZE) -> DownloadResult:
+    """
+    Download a file from URL to specified path with progress tracking.
+
+    The body is written to ``<filepath>.part`` and renamed into place only once
+    it is complete, so ``filepath`` never holds a half-written file.
+
+    Args:
+        url: Source URL
+        filepath: Destination file path
+        chunk_size: Size of chunks for streaming download
+        show_progress: Print a progress line while downloading
+        resume: Keep the ``.part`` file on failure and continue it with an
+            HTTP Range request on the next attempt
+        validators: Store of ETag/Last-Modified values; when given and the
+            file already exists, a conditional request is sent and a 304
+            leaves the existing file untouched
+        blob_store: Content-addressed store; when given the body is kept
+            once under its SHA-256 and ``filepath`` becomes a link to it
+        buffer_size: Bytes gathered in memory before each write to disk
+
+    Returns:
+        DownloadResult for the transfer; ``not_modified`` is set on a 304.
+    """
+    metrics = get_metrics()
+    with metrics.stage('download'):
+        try:
+            result = _download_file(url, filepath, chunk_size, buffer_size, show_progress, resume,
+                                    validators, blob_store)
+        except requests.RequestException:
+            metrics.inc('downloads_total', result='failed')
+            raise
+    metrics.inc('downloads_total', result='not_modified' if result.not_modified else 'ok')
+    return result
+
+def _download_file(url: str, filepath: Union[str, Path], chunk_size: int, buffer_size: int,
+                   show_progress: bool, resume: bool, validators: Optional[ValidatorStore],
+                   blob_store: Optional[BlobStore]) -> DownloadResult:
+    filepath = Path(filepath) if isinstance(filepath, str) else filepath
+    part_path = part_path_for(filepath)
+
+    try:
+        headers = {}
+        offset = part_path.stat().st_size if resume and part_path.exists() else 0
+        known = validators.get(url) if validators is not None else {}
+        if offset:
+            # Byte offsets only line up if the server does not re-encode the body
+            headers = {'Range': f'bytes={offset}-', 'Accept-Encoding': 'identity'}
+            if known.get('etag'):
+                # Only append if the .part still belongs to the same version
+                headers['If-Range'] = known['etag']
+        elif validators is not None and filepath.exists():
+            headers = validators.conditional_headers(url)
+
+        response = get_session().get(url, stream=True, headers=headers)
+        if offset and response.status_code == 416:
+            # Stale or already-complete .part file; start over
+            logger.info(f"Range not satisfiable, restarting: {filepath}")
+            response.close()
+            offset = 0
+            response = get_session().get(url, stream=True)
+        if response.status_code == 304:
+            response.close()
+            logger.info(f"Not modified, keeping existing file: {filepath}")
+            return DownloadResult(url, filepath, True, size=filepath.stat().st_size,
+                                  not_modified=True)
+        response.raise_for_status()
+
+        if offset and response.status_code == 206:
+            logger.info(f"Resuming {filepath} from byte {offset}")
+            mode = 'ab'
+            total_size = (_parse_content_range_total(response.headers.get('content-range'))
+                          or offset + int(response.headers.get('content-length', 0)))
+        else:
+            offset = 0  # Server ignored the Range header; full body follows
+            mode = 'wb'
+            total_size = int(response.headers.get('content-length', 0))
+        # Content-Length counts encoded bytes, iter_content yields decoded ones
+        if response.headers.get('content-encoding', 'identity') != 'identity':
+            total_size = 0
+
+        # Hash while streaming; a resumed .part has to be hashed from disk first
+        hasher = hashlib.sha256()
+        if offset:
+            with open(part_path, 'rb') as existing:
+                for chunk in iter(lambda: existing.read(1024 * 1024), b''):
+                    hasher.update(chunk)
+
+        def report_progress(written: int) -> None:
+            if total_size:
+                print(f"\rProgress: {(offset + written) / total_size * 100:.1f}%", end="", flush=True)
+            else:
+                print(f"\rDownloaded: {(offset + written) / 1e6:.1f} MB", end="", flush=True)
+
+        # Unbuffered file: stream_to_file already writes in buffer_size blocks
+        with open(part_path, mode, buffering=0) as file:
+            stream_to_file(response, file, hasher, chunk_size, buffer_size,
+                           report_progress if show_progress else None)
+        if show_progress:
+            print()  # New line after progress
+
+        received = part_path.stat().st_size
+        get_metrics().inc('download_bytes_total', received - offset, host=urlparse(url).netloc)
+        if total_size and received != total_size:
+            raise IncompleteDownloadError(
+                f"Expected {total_size} bytes for {url}, received {received}")
+
+        digest = hasher.hexdigest()
+        if blob_store is not None:
+            blob_store.store(part_path, digest, filepath)
+        else:
+            os.replace(part_path, filepath)
+        if validators is not None:
+            validators.update(url, response.headers)
+        logger.info(f"Successfully downloaded: {filepath}")
+        return DownloadResult(url, filepath, True, size=received, sha256=digest)
+
+    except requests.RequestException as e:
+        logger.error(f"Download failed: {e}")
+        if part_path.exists() and not resume:
+            part_path.unlink()  # Remove partial download
+        raise
+
+async def download_many_async(items: Iterable[Tuple[str, Union[str, Path]]],
+                              max_concurrency: int = 8, per_host_limit: int = 4,
+                              chunk_size: int = DEFAULT_CHUNK_SIZE, resume: bool = False,
+                              validators: Optional[ValidatorStore] = None,
+                              blob_store: Optional[BlobStore] = None,
+                              retry_policy: Optional[RetryPolicy] = None,
+                              final_pass: bool = True) -> List[DownloadResult]:
+    """
+    Download many files concurrently, streaming each body to disk.
+
+    Each transfer runs ``download_file`` in a worker thread; a global semaphore
+    bounds the total number in flight and a per-host semaphore keeps us from
+    opening too many connections against a single server. Transient errors
+    are retried under ``retry_policy``; items that still fail transiently
+    (or whose host circuit was open) are queued and tried once more after
+    the rest of the batch has finished.
+
+    Args:
+        items: (url, filepath) pairs
+        max_concurrency: Maximum number of downloads in flight overall
+        per_host_limit: Maximum number of downloads in flight per host
+        chunk_size: Size of chunks for streaming download
+        resume: Continue interrupted downloads from their ``.part`` files
+        validators: Shared ETag/Last-Modified store for conditional requests
+        blob_store: Content-addressed store used to deduplicate bodies
+        retry_policy: Backoff/circuit breaker policy (default: the shared one)
+        final_pass: Retry queued failures at the end of the batch
+
+    Returns:
+        One DownloadResult per item, in input order.
+    """
+    items = list(items)
+    policy = retry_policy or get_retry_policy()
+    retry_queue = RetryQueue()
+    overall = asyncio.Semaphore(max_concurrency)
+    per_host: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(per_host_limit))
+
+    async def fetch(index: int, url: str, filepath: Union[str, Path]) -> DownloadResult:
+        filepath = Path(filepath)
+        host = urlparse(url).netloc
+        async with per_host[host], overall:
+            try:
+                return await asyncio.to_thread(policy.call, download_file, url, filepath,
+                                               chunk_size=chunk_size, show_progress=False,
+                                               resume=resume, validators=validators,
+                                               blob_store=blob_store, url=url)
+            except Exception as e:
+                if is_retryable(e) or isinstance(e, CircuitOpenError):
+                    retry_queue.add(index, e)
+                return DownloadResult(url, filepath, False, error=str(e))
+
+    results = await asyncio.gather(*(fetch(i, url, filepath) for i, (url, filepath) in enumerate(items)))
+    queued = retry_queue.drain()
+    if final_pass and queued:
+        logger.info(f"Retrying {len(queued)} failed downloads at the end of the batch")
+        retried = await asyncio.gather(*(fetch(item.key, *items[item.key]) for item in queued))
+        for item, result in zip(queued, retried):
+            results[item.key] = result
+    return results
+
+def download_many(items: Iterable[Tuple[str, Union[str, Path]]],
+                  max_concurrency: int = 8, per_host_limit: int = 4,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, resume: bool = False,
+                  validators: Optional[ValidatorStore] = None,
+                  blob_store: Optional[BlobStore] = None,
+                  retry_policy: Optional[RetryPolicy] = None) -> List[DownloadResult]:
+    """
+    Blocking wrapper around ``download_many_async`` for use from scripts.
+
+    Args:
+        items: (url, filepath) pairs
+        max_concurrency: Maximum number of downloads in flight overall
+        per_host_limit: Maximum number of downloads in flight per host
+        chunk_size: Size of chunks for streaming download
+        resume: Continue interrupted downloads from their ``.part`` files
+        validators: Shared ETag/Last-Modified store for conditional requests
+        blob_store: Content-addressed store used to deduplicate bodies
+        retry_policy: Backoff/circuit breaker policy (default: the shared one)
+
+    Returns:
+        One DownloadResult per item, in input order.
+    """
+    results = asyncio.run(download_many_async(items, max_concurrency, per_host_limit,
+                                                  chunk_size, resume, validators,
+                                                  blob_store, retry_policy))
+    ok = sum(1 for r in results if r.ok)
+    unchanged = sum(1 for r in results if r.not_modified)
+    logger.info(f"Batch download finished: {ok}/{len(results)} succeeded, {unchanged} unchanged")
+    return results
@@ -0,0 +1,183 @@
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from download_utils import DEFAULT_TIMEOUT, TimeoutHTTPAdapter, get_session
+from metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = ".http_cache"
+DEFAULT_TTL = 3600
+# (URL regex, seconds). First match wins; a TTL of 0 disables caching.
+DEFAULT_TTL_RULES: List[Tuple[str, int]] = [
+    (r'Calendar\.aspx', 6 * 3600),
+    (r'BD-GetMeetingsList', 6 * 3600),
+    (r'BD-GetAgenda|BD-GetPublicItem|Detail_Meeting\.aspx', 7 * 24 * 3600),
+    (r'Board\.nsf/Public', 3600),
+]
+CACHEABLE_TYPES = ('text/html', 'application/json', 'text/plain', 'application/ld+json')
+# Headers describing the wire encoding no longer apply to the stored, decoded body
+DROPPED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding', 'connection')
+
+class OfflineCacheMiss(requests.ConnectionError):
+    """Raised in offline mode when a request is not in the cache."""
+    retryable = False
+
+class ResponseCache:
+    """
+    On-disk cache of raw HTTP responses, keyed by method + URL + body.
+
+    Each entry is one gzip file holding a JSON header line followed by the
+    body, under ``<root>/<aa>/<key>.gz``.
+
+    Args:
+        root: Cache directory
+        ttl_rules: (URL regex, seconds) pairs; first match sets the TTL
+        default_ttl: TTL for URLs no rule matches
+        offline: Serve only from the cache, regardless of age
+    """
+
+    def __init__(self, root: Union[str, Path] = DEFAULT_CACHE_DIR,
+                 ttl_rules: Optional[List[Tuple[str, int]]] = None,
+                 default_ttl: int = DEFAULT_TTL, offline: bool = False):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        rules = DEFAULT_TTL_RULES if ttl_rules is None else ttl_rules
+        self.ttl_rules = [(re.compile(pattern), ttl) for pattern, ttl in rules]
+        self.default_ttl = default_ttl
+        self.offline = offline
+
+    @staticmethod
+    def key(method: str, url: str, body: Union[str, bytes, None] = None) -> str:
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        digest = hashlib.sha256(f"{method.upper()} {url}\n".encode('utf-8'))
+        digest.update(body or b'')
+        return digest.hexdigest()
+
+    def ttl_for(self, url: str) -> int:
+        for pattern, ttl in self.ttl_rules:
+            if pattern.search(url):
+                return ttl
+        return self.default_ttl
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.gz"
+
+    def load(self, method: str, url: str, body=None) -> Optional[Tuple[dict, bytes]]:
+        """Return (metadata, body) for a fresh entry (any entry when offline)."""
+        path = self._path(self.key(method, url, body))
+        if not path.exists():
+            return None
+        if not self.offline and time.time() - path.stat().st_mtime > self.ttl_for(url):
+            return None
+        try:
+            with gzip.open(path, 'rb') as f:
+                header, _, content = f.read().partition(b'\n')
+            return json.loads(header), content
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding corrupt cache entry {path}: {e}")
+            return None
+
+    def store(self, method: str, url: str, body, status: int, headers, content: bytes) -> None:
+        path = self._path(self.key(method, url, body))
+        path.parent.mkdir(exist_ok=True)
+        meta = {
+            'method': method, 'url': url, 'status': status, 'stored_at': time.time(),
+            'headers': {k: v for k, v in headers.items() if k.lower() not in DROPPED_HEADERS},
+        }
+        tmp_path = path.with_name(path.name + '.tmp')
+        with gzip.open(tmp_path, 'wb') as f:
+            f.write(json.dumps(meta).encode('utf-8') + b'\n' + content)
+        os.replace(tmp_path, path)
+
+class CachingHTTPAdapter(TimeoutHTTPAdapter):
+    """
+    Adapter that answers page requests from a ResponseCache.
+
+    Streamed requests (file downloads) always go to the network, and only
+    successful text/HTML/JSON responses are stored.
+    """
+
+    def __init__(self, cache: ResponseCache, *args, **kwargs):
+        self.cache = cache
+        super().__init__(*args, **kwargs)
+
+    def _cached_response(self, request, meta: dict, content: bytes) -> requests.Response:
+        response = requests.Response()
+        response.status_code = meta['status']
+        response.headers = CaseInsensitiveDict(meta['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = content
+        response.url = request.url
+        response.request = request
+        response.reason = 'OK (cached)'
+        response.connection = self
+        return response
+
+    def send(self, request, stream=False, **kwargs):
+        if stream or self.cache.ttl_for(request.url) <= 0:
+            if self.cache.offline:
+                raise OfflineCacheMiss(f"Offline: not fetching {request.url}", request=request)
+            return super().send(request, stream=stream, **kwargs)
+
+        hit = self.cache.load(request.method, request.url, request.body)
+        host = urlparse(request.url).netloc
+        if hit is not None:
+            logger.debug(f"Cache hit: {request.method} {request.url}")
+            get_metrics().inc('cache_hits_total', host=host)
+            return self._cached_response(request, *hit)
+        get_metrics().inc('cache_misses_total', host=host)
+        if self.cache.offline:
+            raise OfflineCacheMiss(f"Offline: {request.method} {request.url} is not cached",
+                                   request=request)
+
+        response = super().send(request, stream=stream, **kwargs)
+        content_type = response.headers.get('content-type', '').split(';')[0].strip().lower()
+        if response.status_code == 200 and content_type in CACHEABLE_TYPES:
+            self.cache.store(request.method, request.url, request.body, response.status_code,
+                             response.headers, response.content)
+        return response
+
+def enable_response_cache(cache: ResponseCache, session: Optional[requests.Session] = None) -> requests.Session:
+    """Mount a CachingHTTPAdapter on ``session`` (default: the shared session)."""
+    session = session or get_session()
+    current = session.get_adapter('https://')
+    adapter = CachingHTTPAdapter(cache, timeout=getattr(current, 'timeout', DEFAULT_TIMEOUT),
+                                 rate_limiter=getattr(current, 'rate_limiter', None),
+                                 pool_connections=current._pool_connections,
+                                 pool_maxsize=current._pool_maxsize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def add_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the shared --cache-dir/--no-cache/--offline options."""
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f'Directory for cached HTML/JSON responses (default: {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--no-cache', action='store_true', help='Do not cache page responses')
+    parser.add_argument('--offline', action='store_true',
+                        help='Serve pages only from the cache and skip downloads')
+
+def configure_from_args(args: argparse.Namespace) -> Optional[ResponseCache]:
+    """Install the response cache on the shared session as requested on the command line."""
+    if args.no_cache and not args.offline:
+        return None
+    cache = ResponseCache(args.cache_dir, offline=args.offline)
+    enable_response_cache(cache)
+    if args.offline:
+        logger.info(f"Offline mode: replaying responses from {cache.root}")
+    return cache
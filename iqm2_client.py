@@ -0,0 +1,251 @@
+import argparse
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urljoin
+
+import requests
+
+from blob_store import BlobStore
+from download_utils import (DownloadResult, ValidatorStore, download_many, get_session,
+                            setup_download_directory)
+from http_cache import add_cache_arguments, configure_from_args
+from iqm2_parsing import parse_calendar_rows
+from manifest import Manifest, add_window_arguments, resolve_window
+from metrics import add_metrics_arguments, configure_metrics, get_metrics, write_run_report
+from pipeline import DownloadJob, stream_downloads
+from retry_policy import RetryPolicy, get_retry_policy
+
+logger = logging.getLogger(__name__)
+
+CALENDAR_PATH = "Calendar.aspx?View=List&From={start}&To={end}"
+VALIDATOR_FILE = ".validators.json"
+DATE_PATTERN = re.compile(r'\d{1,2}/\d{1,2}/\d{4}')
+ID_PATTERN = re.compile(r'[?&]ID=(\d+)', re.IGNORECASE)
+
+@dataclass
+class IQM2Meeting:
+    """A meeting from an IQM2 list-view calendar."""
+    meeting_id: str
+    date: date
+    meeting_type: str
+    packet_url: Optional[str] = None
+    detail_url: Optional[str] = None
+    # Set when another meeting of the same body falls on the same day
+    name_suffix: Optional[str] = None
+
+def clean_filename(meeting_type: str) -> str:
+    """Create clean filename from meeting type."""
+    clean = re.sub(r'[<>:"/\\|?*]', '', meeting_type)
+    clean = re.sub(r'\s+', '-', clean)
+    clean = re.sub(r'-+', '-', clean)
+    return clean.strip('-')
+
+def packet_filename(meeting: IQM2Meeting) -> str:
+    """
+    Filename used for a meeting's agenda packet, e.g. ``2024-03-12_City-Council.pdf``.
+
+    A recessed or special session of the same body on the same day gets its
+    ``name_suffix`` appended (``2024-03-12_City-Council_2841.pdf``) so the
+    two do not share a target and ``.part`` resume file.
+    """
+    name = f"{meeting.date.strftime('%Y-%m-%d')}_{clean_filename(meeting.meeting_type)}"
+    if meeting.name_suffix:
+        name += f"_{clean_filename(meeting.name_suffix)}"
+    return f"{name}.pdf"
+
+def _format_date(day: date) -> str:
+    return f"{day.month}/{day.day}/{day.year}"
+
+class IQM2Client:
+    """
+    requests-only client for any ``<subdomain>.iqm2.com`` calendar.
+
+    The ``View=List`` calendar is rendered server-side, so meetings and their
+    ``FileOpen.aspx?Type=1`` agenda packet links can be read without a browser.
+
+    Args:
+        subdomain: IQM2 site name, e.g. ``"sanramonca"``
+        session: requests Session; defaults to the shared pooled session
+        base_url: Override the ``Citizens/`` base URL (e.g. for a local stand-in)
+        retry_policy: Backoff/circuit breaker policy (default: the shared one)
+    """
+
+    def __init__(self, subdomain: str, session: Optional[requests.Session] = None,
+                 base_url: Optional[str] = None, retry_policy: Optional[RetryPolicy] = None):
+        self.subdomain = subdomain
+        self.base_url = base_url or f"https://{subdomain}.iqm2.com/Citizens/"
+        self.session = session or get_session()
+        self.retry_policy = retry_policy or get_retry_policy()
+
+    def calendar_urls(self, start: date, end: date) -> Dict[str, str]:
+        """Build one list-view calendar URL per year covering start..end."""
+        urls = {}
+        for year in range(start.year, end.year + 1):
+            year_start = max(start, date(year, 1, 1))
+            year_end = min(end, date(year, 12, 31))
+            urls[str(year)] = urljoin(self.base_url, CALENDAR_PATH.format(
+                start=_format_date(year_start), end=_format_date(year_end)))
+        return urls
+
+    def _get_text(self, url: str) -> str:
+        response = self.session.get(url)
+        response.raise_for_status()
+        return response.text
+
+    def fetch_calendar(self, url: str) -> str:
+        with get_metrics().stage('page_fetch', source='iqm2'):
+            return self.retry_policy.call(self._get_text, url, url=url)
+
+    def parse_meetings(self, html: str, page_url: str) -> List[IQM2Meeting]:
+        """Turn a list-view calendar page into meeting records."""
+        meetings = []
+        real_ids = set()
+        for row_index, row in enumerate(parse_calendar_rows(html), 1):
+            if len(row.cells) < 2:
+                logger.warning(f"Row {row_index} has insufficient cells ({len(row.cells)}), skipping")
+                continue
+            match = DATE_PATTERN.search(row.date_text)
+            if not match:
+                logger.warning(f"Row {row_index}: Invalid date format: {row.date_text}, skipping")
+                continue
+            meeting_date = datetime.strptime(match.group(0), '%m/%d/%Y').date()
+            meeting_type = row.meeting_type or "Unknown Meeting"
+
+            packet = row.file_link(1)
+            packet_url = urljoin(page_url, packet) if packet else None
+            detail = next((href for href in row.links if 'Detail_Meeting.aspx' in href), None)
+            detail_url = urljoin(page_url, detail) if detail else None
+            id_match = ID_PATTERN.search(detail or packet or '')
+            meeting_id = id_match.group(1) if id_match else f"{meeting_date}_{meeting_type}"
+            if id_match:
+                real_ids.add(meeting_id)
+
+            meetings.append(IQM2Meeting(meeting_id, meeting_date, meeting_type, packet_url, detail_url))
+
+        same_day: Dict[str, List[IQM2Meeting]] = {}
+        for meeting in meetings:
+            same_day.setdefault(packet_filename(meeting), []).append(meeting)
+        for group in same_day.values():
+            if len(group) > 1:
+                for number, meeting in enumerate(group, 1):
+                    # Without an IQM2 ID the fallback ID repeats the date and type; number them instead
+                    meeting.name_suffix = meeting.meeting_id if meeting.meeting_id in real_ids else str(number)
+        return meetings
+
+    def iter_meetings(self, start: date, end: date) -> Iterator[IQM2Meeting]:
+        """
+        Yield meetings between start and end, one calendar year at a time.
+
+        Fetching and parsing each year is timed as a ``discovery`` stage; the
+        time callers spend between meetings is not.
+        """
+        metrics = get_metrics()
+        for year, url in self.calendar_urls(start, end).items():
+            logger.info(f"Fetching {self.subdomain} {year} calendar: {url}")
+            with metrics.stage('discovery', source='iqm2'):
+                try:
+                    html = self.fetch_calendar(url)
+                except requests.RequestException as e:
+                    logger.error(f"Error fetching {year} calendar: {e}")
+                    continue
+                with metrics.stage('parse', source='iqm2'):
+                    meetings = self.parse_meetings(html, url)
+            logger.info(f"Found {len(meetings)} meetings for {year}")
+            for meeting in meetings:
+                if start <= meeting.date <= end:
+                    yield meeting
+
+    def list_meetings(self, start: date, end: date) -> List[IQM2Meeting]:
+        return list(self.iter_meetings(start, end))
+
+    def download_packets(self, meetings: Sequence[IQM2Meeting], download_dir: Path,
+                         validators: Optional[ValidatorStore] = None,
+                         blob_store: Optional[BlobStore] = None) -> List[Tuple[IQM2Meeting, DownloadResult]]:
+        """Download the agenda packet of every meeting that has one."""
+        with_packets = [m for m in meetings if m.packet_url]
+        jobs = [(m.packet_url, download_dir / packet_filename(m)) for m in with_packets]
+        results = download_many(jobs, max_concurrency=4, per_host_limit=4, resume=True,
+                                validators=validators, blob_store=blob_store,
+                                retry_policy=self.retry_policy)
+        return list(zip(with_packets, results))
+
+    def iter_packet_jobs(self, start: date, end: date, download_dir: Path) -> Iterator[DownloadJob]:
+        """Yield a download job per agenda packet as the calendar is read; the job context is the meeting."""
+        for meeting in self.iter_meetings(start, end):
+            if not meeting.packet_url:
+                logger.warning(f"No agenda packet found for {meeting.meeting_type} on {meeting.date}")
+                continue
+            yield DownloadJob(meeting.packet_url, download_dir / packet_filename(meeting), meeting)
+
+def run_cli(jurisdiction: str, subdomain: str, download_dir: str,
+            argv: Optional[Sequence[str]] = None, standalone: bool = True) -> None:
+    """
+    Command-line entry point shared by the per-jurisdiction IQM2 scripts.
+
+    Args:
+        jurisdiction: Name recorded in the manifest, e.g. ``"San Ramon"``
+        subdomain: IQM2 site name, e.g. ``"sanramonca"``
+        download_dir: Default directory for agenda packets
+        argv: Arguments to parse instead of ``sys.argv``
+        standalone: Set up the response cache and metrics, and write the run
+            report; False when a caller that runs several crawls in this
+            process (scheduler.py) has already done so
+    """
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description=f"Download {jurisdiction} agenda packets")
+    parser.add_argument('--output-dir', default=download_dir)
+    parser.add_argument('--blob-dir', help='Store each distinct packet once in this directory')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent packet downloads (default: 4)')
+    add_window_arguments(parser)
+    add_cache_arguments(parser)
+    add_metrics_arguments(parser)
+    args = parser.parse_args(argv)
+    if not standalone:
+        _crawl(jurisdiction, subdomain, args)
+        return
+    configure_from_args(args)
+    configure_metrics(args)
+    try:
+        _crawl(jurisdiction, subdomain, args)
+    finally:
+        write_run_report(args, {'jurisdiction': jurisdiction})
+
+def _crawl(jurisdiction: str, subdomain: str, args: argparse.Namespace) -> None:
+    output_dir = setup_download_directory(args.output_dir)
+    client = IQM2Client(subdomain)
+    with Manifest(args.manifest) as manifest:
+        start, end = resolve_window(args, manifest, jurisdiction)
+        logger.info(f"Fetching {jurisdiction} meetings calendar {start} to {end}...")
+        jobs = client.iter_packet_jobs(start, end, output_dir)
+        if args.offline:
+            count = 0
+            for job in jobs:
+                logger.info(f"{job.context.date} {job.context.meeting_type}: {job.url}")
+                count += 1
+            logger.info(f"Offline: found {count} agenda packets, skipping downloads")
+            return
+
+        # Packets download while later calendar years are still being read
+        validators = ValidatorStore(output_dir / VALIDATOR_FILE)
+        blob_store = BlobStore(args.blob_dir) if args.blob_dir else None
+        count = 0
+        for job, result in stream_downloads(jobs, workers=args.workers, resume=True,
+                                            validators=validators, blob_store=blob_store,
+                                            retry_policy=client.retry_policy):
+            count += 1
+            meeting = job.context
+            manifest.record_result(jurisdiction, meeting.meeting_id, meeting.date, result,
+                                   meeting_type=meeting.meeting_type)
+            if result.not_modified:
+                logger.info(f"Unchanged: {result.filepath.name}")
+            elif result.ok:
+                logger.info(f"Downloaded: {result.filepath.name}")
+            else:
+                logger.error(f"Failed to download {result.url}: {result.error}")
+        if not count:
+            logger.warning(f"No agenda packets found for {start} to {end}")
+    logger.info("Download process completed")
@@ -0,0 +1,122 @@
+"""
+Local stand-in for an IQM2 ``Citizens/`` site, for running iqm2_client offline.
+
+    python iqm2_fixture_server.py --port 8901
+"""
+import argparse
+import threading
+import time
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+from urllib.parse import parse_qs, urlparse
+
+from boarddocs_fixture_server import fake_pdf
+
+MEETING_TYPES = ("City Council", "Planning Commission", "Parks and Community Services Commission")
+
+def calendar_page(start: date, end: date, every_days: int = 7) -> str:
+    """Render a ``Calendar.aspx?View=List`` page with a meeting every ``every_days`` days."""
+    rows = []
+    day = start
+    i = 0
+    while day <= end:
+        meeting_id = int(day.strftime('%Y%m%d'))
+        row_class = 'rgRow' if i % 2 == 0 else 'rgAltRow'
+        rows.append(
+            f'<tr class="{row_class}"><td>{day.month}/{day.day}/{day.year} 7:00 PM</td>'
+            f'<td>{MEETING_TYPES[i % len(MEETING_TYPES)]}</td>'
+            f'<td><a href="Detail_Meeting.aspx?ID={meeting_id}">Details</a></td>'
+            f'<td><a href="FileOpen.aspx?Type=1&amp;ID={meeting_id}&amp;Inline=True">Agenda Packet</a>'
+            f' <a href="FileOpen.aspx?Type=14&amp;ID={meeting_id}&amp;Inline=True">Agenda</a></td></tr>')
+        day += timedelta(days=every_days)
+        i += 1
+    # Live pages carry a lot of navigation and script around the table
+    filler = '<div class="nav">' + '<span>menu</span>' * 500 + '</div>'
+    return (f'<html><head><script>{"var x = 1;" * 2000}</script></head><body>{filler}'
+            f'<table class="rgMasterTable"><tbody>{"".join(rows)}</tbody></table></body></html>')
+
+class IQM2FixtureHandler(BaseHTTPRequestHandler):
+    """
+    Serves Calendar.aspx (list view), FileOpen.aspx and Detail_Meeting.aspx.
+
+    ``FileOpen.aspx?...&Size=N`` streams an N-byte body without a
+    Content-Length, for exercising memory use on large downloads.
+    """
+
+    prefix = "/Citizens"
+    every_days = 7
+    pdf_size = 0
+    latency = 0.0  # Seconds to wait before every response
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, body: bytes, content_type: str, status: int = 200) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, size: int, content_type: str) -> None:
+        """Send ``size`` bytes without a Content-Length, ended by closing the connection."""
+        if self.latency:
+            time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        block = b'%PDF-1.4\n' + b'0' * (1024 * 1024 - 9)
+        sent = 0
+        while sent < size:
+            piece = block[:size - sent]
+            self.wfile.write(piece)
+            sent += len(piece)
+        self.close_connection = True
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = {key.lower(): values[0] for key, values in parse_qs(parsed.query).items()}
+        if parsed.path == f"{self.prefix}/Calendar.aspx":
+            try:
+                start = datetime.strptime(query['from'], '%m/%d/%Y').date()
+                end = datetime.strptime(query['to'], '%m/%d/%Y').date()
+            except (KeyError, ValueError):
+                self._send(b'bad date range', 'text/plain', 400)
+                return
+            self._send(calendar_page(start, end, self.every_days).encode(), 'text/html; charset=utf-8')
+        elif parsed.path == f"{self.prefix}/FileOpen.aspx":
+            if 'size' in query:
+                # Large packet of unknown length, as some servers send them
+                self._stream(int(query['size']), 'application/pdf')
+                return
+            label = f"Type {query.get('type')} ID {query.get('id')}"
+            self._send(fake_pdf(label, self.pdf_size), 'application/pdf')
+        elif parsed.path == f"{self.prefix}/Detail_Meeting.aspx":
+            self._send(f"<html><body>Meeting {query.get('id')}</body></html>".encode(), 'text/html')
+        else:
+            self._send(b'not found', 'text/plain', 404)
+
+def start_fixture_server(port: int = 0, pdf_size: int = 0, latency: float = 0.0,
+                         every_days: int = 7) -> Tuple[ThreadingHTTPServer, str]:
+    """Start the fixture server on a background thread; returns (server, ``Citizens/`` base URL)."""
+    handler = type('ConfiguredHandler', (IQM2FixtureHandler,),
+                   {'pdf_size': pdf_size, 'latency': latency, 'every_days': every_days})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/Citizens/"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fake IQM2 site locally")
+    parser.add_argument('--port', type=int, default=8901)
+    parser.add_argument('--pdf-size', type=int, default=0, help='Pad each PDF to this many bytes')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before each response')
+    args = parser.parse_args()
+    handler = type('ConfiguredHandler', (IQM2FixtureHandler,),
+                   {'pdf_size': args.pdf_size, 'latency': args.latency})
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), handler)
+    print(f"Serving fake IQM2 at http://127.0.0.1:{args.port}/Citizens/Calendar.aspx?View=List")
+    server.serve_forever()
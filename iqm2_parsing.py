@@ -0,0 +1,147 @@
+import argparse
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml.html
+    HAVE_LXML = True
+except ImportError:
+    HAVE_LXML = False
+
+logger = logging.getLogger(__name__)
+
+ROW_CLASSES = ('rgRow', 'rgAltRow')
+ROW_XPATH = ' | '.join(
+    f"//tr[contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]" for cls in ROW_CLASSES)
+FILE_LINK_PATTERN = re.compile(r'FileOpen\.aspx', re.IGNORECASE)
+
+@dataclass
+class CalendarRow:
+    """One meeting row of an IQM2 ``Calendar.aspx?View=List`` table."""
+    cells: List[str]
+    links: List[str] = field(default_factory=list)
+
+    @property
+    def date_text(self) -> str:
+        return self.cells[0] if self.cells else ''
+
+    @property
+    def meeting_type(self) -> str:
+        return self.cells[1] if len(self.cells) > 1 else ''
+
+    def file_link(self, file_type: int = 1) -> Optional[str]:
+        """Return the first ``FileOpen.aspx`` link of the given type (1 = agenda packet)."""
+        for href in self.links:
+            # Compare the parameter exactly: Type=1 must not match Type=14
+            if FILE_LINK_PATTERN.search(href) and parse_qs(urlparse(href).query).get('Type') == [str(file_type)]:
+                return href
+        return None
+
+def _rows_lxml(html: str) -> List[CalendarRow]:
+    doc = lxml.html.fromstring(html)
+    rows = []
+    for tr in doc.xpath(ROW_XPATH):
+        cells = [''.join(text.strip() for text in td.itertext()) for td in tr.xpath('./td')]
+        links = [a.get('href', '') for a in tr.iter('a')]
+        rows.append(CalendarRow(cells, links))
+    return rows
+
+def _is_row_class(value) -> bool:
+    # The strainer sees the raw attribute string, e.g. "rgRow rgSelectedRow"
+    classes = value.split() if isinstance(value, str) else (value or [])
+    return any(cls in ROW_CLASSES for cls in classes)
+
+def _rows_soup(html: str) -> List[CalendarRow]:
+    # Only build the rgRow/rgAltRow subtrees instead of the whole document
+    strainer = SoupStrainer('tr', class_=_is_row_class)
+    soup = BeautifulSoup(html, 'lxml' if HAVE_LXML else 'html.parser', parse_only=strainer)
+    rows = []
+    for tr in soup.find_all('tr', class_=list(ROW_CLASSES)):
+        cells = [td.get_text(strip=True) for td in tr.find_all('td', recursive=False)]
+        links = [a.get('href', '') for a in tr.find_all('a')]
+        rows.append(CalendarRow(cells, links))
+    return rows
+
+def parse_calendar_rows(html: str) -> List[CalendarRow]:
+    """Extract the meeting rows from an IQM2 list-view calendar page."""
+    return _rows_lxml(html) if HAVE_LXML else _rows_soup(html)
+
+def _file_links_lxml(html: str) -> List[str]:
+    doc = lxml.html.fromstring(html)
+    return [href for href in doc.xpath('//a/@href') if FILE_LINK_PATTERN.search(href)]
+
+def _file_links_soup(html: str) -> List[str]:
+    strainer = SoupStrainer('a', href=FILE_LINK_PATTERN)
+    soup = BeautifulSoup(html, 'lxml' if HAVE_LXML else 'html.parser', parse_only=strainer)
+    return [a['href'] for a in soup.find_all('a', href=True)]
+
+def extract_file_links(html: str) -> List[str]:
+    """Return every ``FileOpen.aspx`` href on a page, in document order."""
+    return _file_links_lxml(html) if HAVE_LXML else _file_links_soup(html)
+
+def _rows_full_soup(html: str) -> List[CalendarRow]:
+    """Reference implementation: the old whole-document html.parser walk."""
+    soup = BeautifulSoup(html, 'html.parser')
+    rows = []
+    for tr in soup.find_all('tr', class_=list(ROW_CLASSES)):
+        cells = [td.get_text(strip=True) for td in tr.find_all('td')]
+        links = [a.get('href', '') for a in tr.find_all('a')]
+        rows.append(CalendarRow(cells, links))
+    return rows
+
+def benchmark(html: str, repeat: int = 10) -> Dict[str, float]:
+    """
+    Time each parsing backend on ``html``.
+
+    Returns:
+        Mean seconds per parse, keyed by backend name.
+    """
+    backends: Dict[str, Callable[[str], List[CalendarRow]]] = {
+        'html.parser (full document)': _rows_full_soup,
+        'bs4 + SoupStrainer': _rows_soup,
+    }
+    if HAVE_LXML:
+        backends['lxml xpath'] = _rows_lxml
+    timings = {}
+    for name, parse in backends.items():
+        started = time.perf_counter()
+        for _ in range(repeat):
+            rows = parse(html)
+        timings[name] = (time.perf_counter() - started) / repeat
+        logger.info(f"{name}: {timings[name] * 1000:.1f} ms/page, {len(rows)} rows")
+    return timings
+
+def synthetic_calendar(rows: int = 2000) -> str:
+    """Build a list-view calendar page with ``rows`` meetings for benchmarking."""
+    body = []
+    for i in range(rows):
+        row_class = 'rgRow' if i % 2 == 0 else 'rgAltRow'
+        body.append(
+            f'<tr class="{row_class}"><td>{i % 12 + 1}/{i % 28 + 1}/2024</td><td>City Council</td>'
+            f'<td><a href="Detail_Meeting.aspx?ID={1000 + i}">Details</a></td>'
+            f'<td><a href="FileOpen.aspx?Type=1&amp;ID={5000 + i}&amp;Inline=True">Agenda Packet</a>'
+            f'<a href="FileOpen.aspx?Type=14&amp;ID={9000 + i}">Agenda</a></td></tr>')
+    filler = '<div class="nav">' + '<span>menu</span>' * 2000 + '</div>'
+    return (f'<html><head><script>{"var x = 1;" * 5000}</script></head><body>{filler}'
+            f'<table class="rgMasterTable"><tbody>{"".join(body)}</tbody></table></body></html>')
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="Benchmark IQM2 calendar parsing backends")
+    parser.add_argument('html_file', nargs='?', help='Saved calendar page (default: synthetic page)')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--rows', type=int, default=2000, help='Rows in the synthetic page')
+    args = parser.parse_args()
+    if args.html_file:
+        with open(args.html_file, encoding='utf-8') as f:
+            page = f.read()
+    else:
+        page = synthetic_calendar(args.rows)
+    logger.info(f"Page size: {len(page) / 1024:.0f} KiB")
+    benchmark(page, args.repeat)
@@ -0,0 +1,241 @@
+import argparse
+import logging
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MANIFEST_PATH = "crawl_manifest.sqlite3"
+# Re-check this many days before the newest recorded meeting, since packets
+# are often posted or revised after the meeting first appears
+DEFAULT_LOOKBACK_DAYS = 14
+
+DOCUMENTS_TABLE = """
+CREATE TABLE IF NOT EXISTS documents (
+    jurisdiction TEXT NOT NULL,
+    meeting_id   TEXT NOT NULL,
+    meeting_date TEXT NOT NULL,
+    meeting_type TEXT,
+    url          TEXT NOT NULL,
+    filepath     TEXT,
+    status       TEXT NOT NULL,
+    sha256       TEXT,
+    size         INTEGER,
+    updated_at   TEXT NOT NULL,
+    changed_at   TEXT,  -- When a new body was last recorded; re-checks leave it alone
+    PRIMARY KEY (jurisdiction, meeting_id, url)
+);
+"""
+SCHEMA = DOCUMENTS_TABLE + """
+CREATE INDEX IF NOT EXISTS documents_by_date ON documents (jurisdiction, meeting_date);
+CREATE INDEX IF NOT EXISTS documents_by_hash ON documents (sha256);
+CREATE INDEX IF NOT EXISTS documents_by_url ON documents (jurisdiction, url);
+CREATE INDEX IF NOT EXISTS documents_by_change ON documents (changed_at);
+"""
+COLUMNS = ('jurisdiction', 'meeting_id', 'meeting_date', 'meeting_type', 'url', 'filepath',
+           'status', 'sha256', 'size', 'updated_at')
+
+class Manifest:
+    """
+    SQLite record of every document the scrapers have seen.
+
+    One row per (jurisdiction, meeting, document URL) with the download
+    status and content hash; an attachment linked from several meetings has
+    a row for each of them. Shared by all scrapers so each can ask where its
+    previous run stopped.
+    """
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_MANIFEST_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        # Scrapers run side by side under the scheduler; wait for each other's writes
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._migrate()
+        self._conn.executescript(SCHEMA)
+
+    def _migrate(self) -> None:
+        """
+        Bring manifests from older versions up to date: re-key tables keyed by
+        (jurisdiction, url) alone and add the changed_at column.
+        """
+        table_info = list(self._conn.execute("PRAGMA table_info(documents)"))
+        columns = {row[1] for row in table_info}
+        if not table_info or 'changed_at' in columns:
+            return
+        with self._conn:
+            self._conn.execute("BEGIN")
+            if 'meeting_id' not in {row[1] for row in table_info if row[5]}:
+                logger.info(f"Re-keying {self.path} on (jurisdiction, meeting_id, url)")
+                self._conn.execute("ALTER TABLE documents RENAME TO documents_by_url_only")
+                self._conn.execute(DOCUMENTS_TABLE)
+                self._conn.execute(f"INSERT INTO documents ({', '.join(COLUMNS)}) "
+                                   f"SELECT {', '.join(COLUMNS)} FROM documents_by_url_only")
+                self._conn.execute("DROP TABLE documents_by_url_only")
+            else:
+                self._conn.execute("ALTER TABLE documents ADD COLUMN changed_at TEXT")
+            self._conn.execute("UPDATE documents SET changed_at = updated_at "
+                               "WHERE status IN ('downloaded', 'not_modified')")
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, jurisdiction: str, meeting_id: str, meeting_date: Union[date, str], url: str,
+               status: str, meeting_type: Optional[str] = None, filepath: Optional[str] = None,
+               sha256: Optional[str] = None, size: Optional[int] = None) -> None:
+        """
+        Insert or update the row for one document of one meeting.
+
+        ``changed_at`` is set the first time the document is fetched for the
+        meeting and whenever a download brings a different body (or one
+        without a hash); a ``not_modified`` re-check only bumps ``updated_at``.
+        """
+        if isinstance(meeting_date, (date, datetime)):
+            meeting_date = meeting_date.strftime('%Y-%m-%d')
+        now = datetime.now().isoformat(timespec='seconds')
+        changed_at = now if status in ('downloaded', 'not_modified') else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO documents (jurisdiction, meeting_id, meeting_date, meeting_type, url,
+                                       filepath, status, sha256, size, updated_at, changed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (jurisdiction, meeting_id, url) DO UPDATE SET
+                    meeting_date = excluded.meeting_date,
+                    meeting_type = COALESCE(excluded.meeting_type, meeting_type),
+                    filepath = COALESCE(excluded.filepath, filepath),
+                    status = excluded.status,
+                    sha256 = COALESCE(excluded.sha256, sha256),
+                    size = COALESCE(excluded.size, size),
+                    updated_at = excluded.updated_at,
+                    changed_at = CASE
+                        WHEN excluded.changed_at IS NOT NULL AND (
+                            changed_at IS NULL
+                            OR (excluded.status = 'downloaded'
+                                AND (excluded.sha256 IS NULL OR excluded.sha256 IS NOT sha256)))
+                        THEN excluded.changed_at
+                        ELSE changed_at END
+                """,
+                (jurisdiction, str(meeting_id), meeting_date, meeting_type, url,
+                 filepath, status, sha256, size, now, changed_at))
+
+    def record_result(self, jurisdiction: str, meeting_id: str, meeting_date: Union[date, str],
+                      result, meeting_type: Optional[str] = None) -> None:
+        """Record a ``download_utils.DownloadResult``."""
+        if result.not_modified:
+            status = 'not_modified'
+        else:
+            status = 'downloaded' if result.ok else 'failed'
+        self.record(jurisdiction, meeting_id, meeting_date, result.url, status,
+                    meeting_type=meeting_type, filepath=str(result.filepath),
+                    sha256=result.sha256, size=result.size or None)
+
+    def status(self, jurisdiction: str, url: str, meeting_id: Optional[str] = None) -> Optional[str]:
+        """
+        Return the recorded status of a document, or None if never seen.
+
+        Without ``meeting_id``, the status of the most recently recorded
+        meeting that links to the document.
+        """
+        query = "SELECT status FROM documents WHERE jurisdiction = ? AND url = ?"
+        params: list = [jurisdiction, url]
+        if meeting_id is not None:
+            query += " AND meeting_id = ?"
+            params.append(str(meeting_id))
+        with self._lock:
+            row = self._conn.execute(query + " ORDER BY updated_at DESC LIMIT 1", params).fetchone()
+        return row[0] if row else None
+
+    def status_counts(self, jurisdiction: str, since: Optional[datetime] = None) -> Dict[str, int]:
+        """Count a jurisdiction's documents by status, optionally only those touched since ``since``."""
+        query = "SELECT status, COUNT(*) FROM documents WHERE jurisdiction = ?"
+        params: list = [jurisdiction]
+        if since is not None:
+            query += " AND updated_at >= ?"
+            params.append(since.isoformat(timespec='seconds'))
+        with self._lock:
+            rows = self._conn.execute(query + " GROUP BY status", params).fetchall()
+        return dict(rows)
+
+    def fetched_documents(self, since: Optional[datetime] = None,
+                          changed_since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Every document that was downloaded (or confirmed unchanged).
+
+        Args:
+            since: Only rows recorded (fetched or re-checked) since then
+            changed_since: Only rows first fetched, or fetched with a new body, since then
+        """
+        query = "SELECT * FROM documents WHERE status IN ('downloaded', 'not_modified')"
+        params: list = []
+        if since is not None:
+            query += " AND updated_at >= ?"
+            params.append(since.isoformat(timespec='seconds'))
+        if changed_since is not None:
+            query += " AND changed_at >= ?"
+            params.append(changed_since.isoformat(timespec='seconds'))
+        with self._lock:
+            cursor = self._conn.execute(query, params)
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def latest_meeting_date(self, jurisdiction: str) -> Optional[date]:
+        """Return the newest meeting date with a successfully fetched document."""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT MAX(meeting_date) FROM documents
+                WHERE jurisdiction = ? AND status IN ('downloaded', 'not_modified')
+                """,
+                (jurisdiction,)).fetchone()
+        if not row or not row[0]:
+            return None
+        return datetime.strptime(row[0], '%Y-%m-%d').date()
+
+def add_window_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the shared --from/--to/--since-last-run/--manifest options."""
+    parser.add_argument('--from', dest='start', type=lambda s: datetime.strptime(s, '%Y-%m-%d').date(),
+                        help='First meeting date to crawl (YYYY-MM-DD)')
+    parser.add_argument('--to', dest='end', type=lambda s: datetime.strptime(s, '%Y-%m-%d').date(),
+                        help='Last meeting date to crawl (YYYY-MM-DD)')
+    parser.add_argument('--since-last-run', action='store_true',
+                        help='Only crawl meetings after the newest one already in the manifest')
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST_PATH,
+                        help=f'Path of the SQLite crawl manifest (default: {DEFAULT_MANIFEST_PATH})')
+
+def default_window(today: Optional[date] = None) -> Tuple[date, date]:
+    """Start of last year through the end of this year."""
+    today = today or date.today()
+    return date(today.year - 1, 1, 1), date(today.year, 12, 31)
+
+def resolve_window(args: argparse.Namespace, manifest: Manifest, jurisdiction: str,
+                   lookback_days: int = DEFAULT_LOOKBACK_DAYS) -> Tuple[date, date]:
+    """
+    Work out which meeting dates a run should cover.
+
+    Explicit --from/--to win; otherwise --since-last-run starts shortly before
+    the newest meeting already recorded for the jurisdiction, falling back to
+    ``default_window`` on a first run.
+    """
+    start, end = default_window()
+    if args.since_last_run:
+        latest = manifest.latest_meeting_date(jurisdiction)
+        if latest:
+            start = latest - timedelta(days=lookback_days)
+            logger.info(f"{jurisdiction}: resuming after {latest} (from {start})")
+        else:
+            logger.info(f"{jurisdiction}: nothing recorded yet, crawling default window")
+    if args.start:
+        start = args.start
+    if args.end:
+        end = args.end
+    return start, end
@@ -0,0 +1,262 @@
+import argparse
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('discovery', 'page_fetch', 'parse', 'download', 'write')
+# Upper bounds in seconds; the last bucket (+Inf) is implicit
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile (an estimate)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def as_dict(self) -> dict:
+        return {'count': self.count, 'sum': round(self.sum, 6),
+                'p50': self.quantile(0.5), 'p95': self.quantile(0.95),
+                'buckets': dict(zip([str(b) for b in self.buckets] + ['+Inf'], self.counts))}
+
+class Metrics:
+    """
+    Thread-safe counters and latency histograms for one run.
+
+    Counters and histograms are keyed by name plus labels, e.g.
+    ``inc('http_requests_total', host='sanramonca.iqm2.com', status=200)``.
+    ``stage()`` times a block into ``stage_seconds{stage=...}`` and, when the
+    stage is the one selected with ``--profile``, runs it under cProfile on
+    every thread that enters it.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self.profile_stage: Optional[str] = None
+        self._profilers: List[cProfile.Profile] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def enable_profiling(self, stage: str) -> None:
+        self.profile_stage = stage
+
+    def _start_profile(self) -> bool:
+        # cProfile only sees the thread that enabled it, so each thread that
+        # enters the stage gets its own profiler; they are merged when reported
+        local = self._local
+        depth = getattr(local, 'depth', 0)
+        if depth:
+            local.depth = depth + 1
+            return True
+        profiler = getattr(local, 'profiler', None)
+        if profiler is None:
+            profiler = local.profiler = cProfile.Profile()
+            with self._lock:
+                self._profilers.append(profiler)
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler (e.g. a debugger) already owns this thread's hook
+            return False
+        local.depth = 1
+        return True
+
+    def _stop_profile(self) -> None:
+        local = self._local
+        local.depth -= 1
+        if local.depth == 0:
+            local.profiler.disable()
+
+    @contextmanager
+    def stage(self, stage: str, **labels) -> Iterator[None]:
+        """Time the enclosed block as one pass through ``stage``."""
+        profiling = stage == self.profile_stage and self._start_profile()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('stage_seconds', time.perf_counter() - started, stage=stage, **labels)
+            if profiling:
+                self._stop_profile()
+
+    def report(self) -> dict:
+        """Snapshot of every series, plus totals per stage and overall throughput."""
+        duration = time.time() - self.started
+        with self._lock:
+            counters = {name: [{'labels': dict(key), 'value': value} for key, value in series.items()]
+                        for name, series in self.counters.items()}
+            histograms = {name: [{'labels': dict(key), **h.as_dict()} for key, h in series.items()]
+                          for name, series in self.histograms.items()}
+            stages = {}
+            for key, h in self.histograms.get('stage_seconds', {}).items():
+                stage = dict(key)['stage']
+                total = stages.setdefault(stage, {'count': 0, 'seconds': 0.0})
+                total['count'] += h.count
+                total['seconds'] = round(total['seconds'] + h.sum, 6)
+            downloaded = sum(self.counters.get('download_bytes_total', {}).values())
+        return {
+            'started_at': datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+            'duration_seconds': round(duration, 3),
+            'stages': stages,
+            'throughput': {'download_mb_per_s': round(downloaded / duration / 1e6, 3) if duration else 0.0},
+            'counters': counters,
+            'histograms': histograms,
+        }
+
+    def prometheus_text(self, prefix: str = 'govwiki_scraper_') -> str:
+        """Render every series in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                lines.append(f"# TYPE {prefix}{name} counter")
+                for key, value in series.items():
+                    lines.append(f"{prefix}{name}{_format_labels(key)} {value}")
+            for name, series in sorted(self.histograms.items()):
+                lines.append(f"# TYPE {prefix}{name} histogram")
+                for key, h in series.items():
+                    cumulative = 0
+                    for bound, count in zip([str(b) for b in h.buckets] + ['+Inf'], h.counts):
+                        cumulative += count
+                        lines.append(f"{prefix}{name}_bucket{_format_labels(key, ('le', bound))} {cumulative}")
+                    lines.append(f"{prefix}{name}_sum{_format_labels(key)} {h.sum}")
+                    lines.append(f"{prefix}{name}_count{_format_labels(key)} {h.count}")
+        lines.append(f"# TYPE {prefix}last_run_timestamp_seconds gauge")
+        lines.append(f"{prefix}last_run_timestamp_seconds {time.time():.0f}")
+        return '\n'.join(lines) + '\n'
+
+    def merged_profile(self) -> Optional[pstats.Stats]:
+        """Combined cProfile data from every thread that ran the profiled stage."""
+        with self._lock:
+            profilers = list(self._profilers)
+        stats = None
+        for profiler in profilers:
+            profiler.create_stats()
+            if not profiler.stats:
+                continue
+            if stats is None:
+                stats = pstats.Stats(profiler)
+            else:
+                stats.add(profiler)
+        return stats
+
+    def profile_stats(self, limit: int = 25) -> Optional[str]:
+        stats = self.merged_profile()
+        if stats is None:
+            return None
+        out = io.StringIO()
+        stats.stream = out
+        stats.sort_stats('cumulative').print_stats(limit)
+        return out.getvalue()
+
+_metrics = Metrics()
+
+def get_metrics() -> Metrics:
+    """Return the process-wide metrics registry."""
+    return _metrics
+
+def _write_atomic(path: Union[str, Path], text: str) -> None:
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_text(text, encoding='utf-8')
+    os.replace(tmp_path, path)
+
+def add_metrics_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the shared --metrics-report/--prometheus-textfile/--profile options."""
+    parser.add_argument('--metrics-report', help='Write a JSON run report to this file')
+    parser.add_argument('--prometheus-textfile',
+                        help='Write metrics in Prometheus text format (for node_exporter) to this file')
+    parser.add_argument('--profile', choices=STAGES, help='Run this stage under cProfile, on every thread that enters it')
+    parser.add_argument('--profile-output', help='Save raw cProfile data here (default: <stage>.prof)')
+
+def configure_metrics(args: argparse.Namespace) -> Metrics:
+    """Apply the --profile option to the shared registry."""
+    metrics = get_metrics()
+    if args.profile:
+        metrics.enable_profiling(args.profile)
+    return metrics
+
+def write_run_report(args: argparse.Namespace, extra: Optional[dict] = None) -> None:
+    """Write the JSON report, Prometheus textfile and profile requested on the command line."""
+    metrics = get_metrics()
+    report = metrics.report()
+    if extra:
+        report.update(extra)
+    if args.metrics_report:
+        _write_atomic(args.metrics_report, json.dumps(report, indent=2))
+        logger.info(f"Wrote run report to {args.metrics_report}")
+    if args.prometheus_textfile:
+        _write_atomic(args.prometheus_textfile, metrics.prometheus_text())
+    if args.profile:
+        output = args.profile_output or f"{args.profile}.prof"
+        stats = metrics.merged_profile()
+        if stats is None:
+            logger.warning(f"Stage '{args.profile}' never ran; no profile written")
+        else:
+            stats.dump_stats(output)
+            logger.info(f"cProfile of stage '{args.profile}' ({len(metrics._profilers)} threads) "
+                        f"saved to {output}\n{metrics.profile_stats()}")
+    summary = ', '.join(f"{stage} {t['seconds']:.1f}s/{t['count']}" for stage, t in report['stages'].items())
+    if summary:
+        logger.info(f"Time per stage: {summary}")
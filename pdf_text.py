@@ -0,0 +1,244 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from blob_store import sha256_file
+from manifest import DEFAULT_MANIFEST_PATH, Manifest
+
+try:
+    from pypdf import PdfReader
+    HAVE_PYPDF = True
+except ImportError:
+    HAVE_PYPDF = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TEXT_DIR = "extracted_text"
+DEFAULT_PDF_DIRS = ("agenda_packets", "downloaded_pdfs", "el_cerrito_agenda_packets",
+                    "auhsd_board_agendas")
+# Documents larger than this are split into page ranges so one long packet
+# is extracted on several cores instead of holding up a single worker
+LARGE_DOCUMENT_BYTES = 5 * 1024 * 1024
+PAGES_PER_TASK = 50
+
+@dataclass
+class ExtractionResult:
+    """Outcome of extracting one document."""
+    sha256: str
+    source: str
+    pages: int = 0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+def text_path_for(output_dir: Union[str, Path], digest: str) -> Path:
+    """Where the page JSONL of the document with ``digest`` is written."""
+    return Path(output_dir) / digest[:2] / f"{digest}.jsonl"
+
+def extract_document(source: str, digest: str, output_path: str,
+                     first_page: int = 1, last_page: Optional[int] = None) -> ExtractionResult:
+    """
+    Write one JSONL line per page of ``source`` to ``output_path``.
+
+    Pages are extracted and written one at a time, so memory use does not grow
+    with the length of the packet. Output goes to a ``.part`` file that is
+    renamed into place only when every page has been written.
+
+    Args:
+        first_page: First page to extract (1-based)
+        last_page: Last page to extract, inclusive (default: the last page)
+    """
+    output_path = Path(output_path)
+    part_path = output_path.with_name(output_path.name + '.part')
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    pages = 0
+    try:
+        reader = PdfReader(source)
+        last_page = min(last_page or len(reader.pages), len(reader.pages))
+        with open(part_path, 'w', encoding='utf-8') as out:
+            for page_number in range(first_page, last_page + 1):
+                page = reader.pages[page_number - 1]
+                try:
+                    text = page.extract_text() or ''
+                except Exception as e:
+                    logger.warning(f"{source}: page {page_number} could not be read: {e}")
+                    text = ''
+                out.write(json.dumps({'sha256': digest, 'page': page_number, 'text': text},
+                                     ensure_ascii=False) + '\n')
+                pages += 1
+        os.replace(part_path, output_path)
+        return ExtractionResult(digest, source, pages)
+    except Exception as e:
+        if part_path.exists():
+            part_path.unlink()
+        return ExtractionResult(digest, source, pages, error=str(e))
+
+def documents_from_manifest(manifest_path: Union[str, Path]) -> Iterator[Tuple[str, str]]:
+    """Yield (sha256, filepath) for every downloaded PDF recorded in the manifest."""
+    with Manifest(manifest_path) as manifest:
+        rows = manifest.fetched_documents()
+    for row in rows:
+        filepath = row['filepath']
+        if not filepath or not filepath.lower().endswith('.pdf') or not os.path.exists(filepath):
+            continue
+        yield row['sha256'] or sha256_file(filepath), filepath
+
+def documents_from_dirs(dirs: Iterable[Union[str, Path]]) -> Iterator[Tuple[str, str]]:
+    """Yield (sha256, filepath) for every PDF under ``dirs``, skipping blob stores."""
+    for directory in dirs:
+        for path in sorted(Path(directory).rglob('*.pdf')):
+            if '.blobs' in path.parts or '.incoming' in path.parts:
+                continue
+            yield sha256_file(path), str(path)
+
+def pending_documents(documents: Iterable[Tuple[str, str]],
+                      output_dir: Union[str, Path]) -> List[Tuple[str, str]]:
+    """
+    Keep documents whose text has not been extracted yet.
+
+    Output is keyed by content hash, so a changed packet (new hash) is picked
+    up again and identical copies in several directories are extracted once.
+    """
+    pending = {}
+    for digest, filepath in documents:
+        if digest not in pending and not text_path_for(output_dir, digest).exists():
+            pending[digest] = filepath
+    return list(pending.items())
+
+def page_ranges(source: str, pages_per_task: int = PAGES_PER_TASK) -> List[Tuple[int, Optional[int]]]:
+    """
+    Split a large document into (first_page, last_page) ranges.
+
+    Small files, and files whose page count cannot be read here, come back as
+    a single open range so the worker extracts (or reports on) the whole file.
+    """
+    if os.path.getsize(source) < LARGE_DOCUMENT_BYTES:
+        return [(1, None)]
+    try:
+        page_count = len(PdfReader(source).pages)
+    except Exception:
+        return [(1, None)]
+    return [(first, min(first + pages_per_task - 1, page_count))
+            for first in range(1, page_count + 1, pages_per_task)] or [(1, None)]
+
+def _join_chunks(chunks: List[Path], output_path: Path) -> None:
+    """Concatenate the per-range JSONL files of one document, in page order."""
+    part_path = output_path.with_name(output_path.name + '.part')
+    with open(part_path, 'wb') as out:
+        for chunk in chunks:
+            with open(chunk, 'rb') as f:
+                shutil.copyfileobj(f, out)
+    os.replace(part_path, output_path)
+
+def _finish_chunks(parts: List[ExtractionResult], output_path: Path) -> ExtractionResult:
+    """Join the ranges of a split document, or discard them if any range failed."""
+    chunk_paths = [output_path.with_name(f"{output_path.name}.{i:05d}") for i in range(len(parts))]
+    first = parts[0]
+    result = ExtractionResult(first.sha256, first.source, sum(p.pages for p in parts),
+                              next((p.error for p in parts if not p.ok), None))
+    try:
+        if result.ok:
+            _join_chunks(chunk_paths, output_path)
+    except OSError as e:
+        result.error = str(e)
+    finally:
+        for path in chunk_paths:
+            if path.exists():
+                path.unlink()
+    return result
+
+def extract_all(documents: Iterable[Tuple[str, str]], output_dir: Union[str, Path] = DEFAULT_TEXT_DIR,
+                workers: Optional[int] = None) -> List[ExtractionResult]:
+    """
+    Extract every new or changed document on a process pool.
+
+    Documents over LARGE_DOCUMENT_BYTES are split into ranges of
+    PAGES_PER_TASK pages, each extracted by its own worker, and the ranges
+    are joined in page order once they have all finished.
+
+    Args:
+        documents: (sha256, filepath) pairs
+        output_dir: Directory for the per-document JSONL files
+        workers: Worker processes (default: one per core)
+
+    Returns:
+        One ExtractionResult per document that needed extracting.
+    """
+    if not HAVE_PYPDF:
+        raise RuntimeError("Text extraction needs pypdf (pip install pypdf)")
+    pending = pending_documents(documents, output_dir)
+    logger.info(f"{len(pending)} documents need text extraction")
+    results = []
+    chunks: Dict[str, List[Optional[ExtractionResult]]] = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for digest, filepath in pending:
+            output_path = text_path_for(output_dir, digest)
+            ranges = page_ranges(filepath)
+            if len(ranges) == 1:
+                futures[pool.submit(extract_document, filepath, digest, str(output_path))] = (digest, None)
+                continue
+            chunks[digest] = [None] * len(ranges)
+            for index, (first, last) in enumerate(ranges):
+                chunk_path = output_path.with_name(f"{output_path.name}.{index:05d}")
+                future = pool.submit(extract_document, filepath, digest, str(chunk_path), first, last)
+                futures[future] = (digest, index)
+        for future in as_completed(futures):
+            digest, index = futures[future]
+            result = future.result()
+            if index is not None:
+                chunks[digest][index] = result
+                if any(r is None for r in chunks[digest]):
+                    continue
+                result = _finish_chunks(chunks.pop(digest), text_path_for(output_dir, digest))
+            if result.ok:
+                logger.info(f"Extracted {result.pages} pages from {result.source}")
+            else:
+                logger.error(f"Failed to extract {result.source}: {result.error}")
+            results.append(result)
+    return results
+
+def iter_pages(output_dir: Union[str, Path] = DEFAULT_TEXT_DIR) -> Iterator[dict]:
+    """Stream every extracted page record, one JSON object at a time."""
+    for path in sorted(Path(output_dir).rglob('*.jsonl')):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Extract page text from downloaded agenda PDFs")
+    parser.add_argument('dirs', nargs='*',
+                        help='Directories to scan for PDFs (default: documents in the manifest)')
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST_PATH,
+                        help=f'Path of the SQLite crawl manifest (default: {DEFAULT_MANIFEST_PATH})')
+    parser.add_argument('--output-dir', default=DEFAULT_TEXT_DIR,
+                        help=f'Directory for page JSONL files (default: {DEFAULT_TEXT_DIR})')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: one per core)')
+    args = parser.parse_args(argv)
+
+    if args.dirs:
+        documents = documents_from_dirs(args.dirs)
+    elif os.path.exists(args.manifest):
+        documents = documents_from_manifest(args.manifest)
+    else:
+        documents = documents_from_dirs(d for d in DEFAULT_PDF_DIRS if os.path.isdir(d))
+    started = time.perf_counter()
+    results = extract_all(documents, args.output_dir, args.workers)
+    pages = sum(r.pages for r in results if r.ok)
+    failed = sum(1 for r in results if not r.ok)
+    elapsed = time.perf_counter() - started
+    logger.info(f"Extracted {pages} pages from {len(results) - failed} documents "
+                f"in {elapsed:.1f}s ({failed} failed)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Producer/consumer download pipeline.
+
+Discovery (calendar pages, agenda pages, attachment lookups) feeds a bounded
+queue while a pool of download workers drains it, so the first file lands
+as soon as the first document is found and a crawl takes about as long as
+the slower of discovery and downloading rather than their sum. When the
+queue is full, ``submit`` blocks, which holds discovery back until the
+downloads catch up.
+
+    jobs = (DownloadJob(m.packet_url, out / packet_filename(m), m) for m in client.iter_meetings(a, b))
+    for job, result in stream_downloads(jobs, workers=4):
+        manifest.record_result(..., result)
+"""
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+from blob_store import BlobStore
+from download_utils import DEFAULT_CHUNK_SIZE, DownloadResult, ValidatorStore, download_file
+from metrics import get_metrics
+from retry_policy import CircuitOpenError, RetryPolicy, RetryQueue, get_retry_policy, is_retryable
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+@dataclass
+class DownloadJob:
+    """One file to fetch; ``context`` (e.g. the meeting) is handed back with the result."""
+    url: str
+    filepath: Union[str, Path]
+    context: Any = None
+
+class DownloadPipeline:
+    """
+    Bounded queue of download jobs drained by a pool of worker threads.
+
+    Producers call ``submit`` as they discover documents; ``on_result`` is
+    called once per job with its final DownloadResult, one call at a time.
+    Jobs that fail transiently are held back and tried once more when the
+    pipeline is closed, like the end-of-batch pass of ``download_many``.
+
+    Args:
+        workers: Number of concurrent downloads
+        queue_size: Jobs that may wait for a worker before ``submit`` blocks
+            (default: four per worker)
+        per_host_limit: Maximum number of downloads in flight per host
+        chunk_size: Size of chunks for streaming download
+        resume: Continue interrupted downloads from their ``.part`` files
+        validators: Shared ETag/Last-Modified store for conditional requests
+        blob_store: Content-addressed store used to deduplicate bodies
+        retry_policy: Backoff/circuit breaker policy (default: the shared one)
+        final_pass: Retry queued failures when the pipeline is closed
+        on_result: Called with (job, result) as each job finishes
+    """
+
+    def __init__(self, workers: int = 4, queue_size: Optional[int] = None, per_host_limit: int = 4,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, resume: bool = False,
+                 validators: Optional[ValidatorStore] = None,
+                 blob_store: Optional[BlobStore] = None,
+                 retry_policy: Optional[RetryPolicy] = None, final_pass: bool = True,
+                 on_result: Optional[Callable[[DownloadJob, DownloadResult], None]] = None):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.resume = resume
+        self.validators = validators
+        self.blob_store = blob_store
+        self.retry_policy = retry_policy or get_retry_policy()
+        self.final_pass = final_pass
+        self.on_result = on_result
+        self.submitted = 0
+        self.completed = 0
+        self.succeeded = 0
+        self.started = time.perf_counter()
+        self.first_result_seconds: Optional[float] = None
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size or workers * 4)
+        self._per_host: Dict[str, threading.BoundedSemaphore] = defaultdict(
+            lambda: threading.BoundedSemaphore(per_host_limit))
+        self._per_host_lock = threading.Lock()
+        self._result_lock = threading.Lock()
+        self._retry_queue = RetryQueue()
+        self._cancelled = threading.Event()
+        self._closed = False
+        self._threads = [threading.Thread(target=self._work, name=f"download-{i}", daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.cancel()
+        self.close()
+
+    def submit(self, job: DownloadJob) -> bool:
+        """
+        Queue a job, blocking while the queue is full.
+
+        Returns:
+            False if the pipeline was cancelled and the job was dropped.
+        """
+        waited = 0.0
+        while not self._cancelled.is_set():
+            try:
+                self._queue.put(job, timeout=0.5)
+            except queue.Full:
+                waited += 0.5
+                continue
+            self.submitted += 1
+            if waited:
+                get_metrics().inc('pipeline_backpressure_seconds', waited)
+            return True
+        return False
+
+    def cancel(self) -> None:
+        """Stop taking jobs; queued jobs that have not started are dropped."""
+        self._cancelled.set()
+
+    def close(self) -> None:
+        """Wait for queued jobs, run the final retry pass and stop the workers."""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        queued = self._retry_queue.drain()
+        if queued and not self._cancelled.is_set():
+            logger.info(f"Retrying {len(queued)} failed downloads at the end of the run")
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                retried = pool.map(lambda item: (item.key, self._fetch(item.key, defer=False)), queued)
+                for job, result in retried:
+                    self._deliver(job, result)
+        elapsed = time.perf_counter() - self.started
+        first = f", first after {self.first_result_seconds:.1f}s" if self.first_result_seconds else ""
+        logger.info(f"Pipeline finished: {self.succeeded}/{self.completed} succeeded "
+                    f"in {elapsed:.1f}s{first}")
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                return
+            if self._cancelled.is_set():
+                continue
+            result = self._fetch(job, defer=self.final_pass)
+            if result is not None:
+                self._deliver(job, result)
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        with self._per_host_lock:
+            return self._per_host[urlparse(url).netloc]
+
+    def _fetch(self, job: DownloadJob, defer: bool) -> Optional[DownloadResult]:
+        with self._host_slot(job.url):
+            try:
+                return self.retry_policy.call(download_file, job.url, job.filepath,
+                                              chunk_size=self.chunk_size, show_progress=False,
+                                              resume=self.resume, validators=self.validators,
+                                              blob_store=self.blob_store, url=job.url)
+            except Exception as e:
+                if defer and (is_retryable(e) or isinstance(e, CircuitOpenError)):
+                    self._retry_queue.add(job, e)
+                    return None
+                return DownloadResult(job.url, Path(job.filepath), False, error=str(e))
+
+    def _deliver(self, job: DownloadJob, result: DownloadResult) -> None:
+        with self._result_lock:
+            self.completed += 1
+            self.succeeded += result.ok
+            if self.first_result_seconds is None:
+                self.first_result_seconds = time.perf_counter() - self.started
+            if self.on_result is not None:
+                self.on_result(job, result)
+
+def stream_downloads(jobs: Iterable[DownloadJob], **options) -> Iterator[Tuple[DownloadJob, DownloadResult]]:
+    """
+    Download jobs from a (lazy) discovery iterable, yielding results as they finish.
+
+    ``jobs`` is consumed on a producer thread, so discovery keeps running
+    while the caller handles results. Results come in completion order.
+    Keyword arguments are passed to DownloadPipeline. If discovery raises,
+    the error is re-raised here once the jobs already found have finished.
+    """
+    results: queue.Queue = queue.Queue()
+    failure = []
+    pipeline = DownloadPipeline(on_result=lambda job, result: results.put((job, result)), **options)
+
+    def produce() -> None:
+        try:
+            for job in jobs:
+                if not pipeline.submit(job):
+                    break
+        except BaseException as e:
+            failure.append(e)
+        finally:
+            pipeline.close()
+            results.put(_STOP)
+
+    producer = threading.Thread(target=produce, name="discovery", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = results.get()
+            if item is _STOP:
+                break
+            yield item
+    finally:
+        # The caller stopped early (or raised): let the producer wind down
+        pipeline.cancel()
+    if failure:
+        raise failure[0]
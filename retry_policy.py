@@ -0,0 +1,220 @@
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+from urllib.parse import urlparse
+
+import requests
+
+from metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+RETRYABLE_STATUSES = (408, 425, 429, 500, 502, 503, 504)
+RETRYABLE_EXCEPTIONS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.ContentDecodingError,
+)
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of contacting a host whose circuit breaker is open."""
+    retryable = False
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    Classify an error as transient (worth retrying) or permanent.
+
+    Exceptions can opt in or out explicitly with a ``retryable`` attribute;
+    otherwise connection problems, timeouts, truncated bodies and HTTP
+    408/425/429/5xx responses are retryable and everything else is not.
+    """
+    explicit = getattr(exc, 'retryable', None)
+    if explicit is not None:
+        return bool(explicit)
+    if isinstance(exc, requests.HTTPError):
+        response = exc.response
+        return response is not None and response.status_code in RETRYABLE_STATUSES
+    return isinstance(exc, RETRYABLE_EXCEPTIONS)
+
+def _retry_after(exc: BaseException) -> Optional[str]:
+    response = getattr(exc, 'response', None)
+    return response.headers.get('retry-after') if response is not None else None
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the host's circuit opens
+    and calls fail fast for ``reset_timeout`` seconds. Then one trial call is
+    let through (half-open); success closes the circuit, failure reopens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 120.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._trial_running: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, host: str) -> bool:
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return True
+            if time.monotonic() - opened_at < self.reset_timeout or self._trial_running.get(host):
+                return False
+            self._trial_running[host] = True
+            logger.info(f"Circuit half-open for {host}, sending a trial request")
+            return True
+
+    def record_success(self, host: str) -> None:
+        with self._lock:
+            if host in self._opened_at:
+                logger.info(f"Circuit closed for {host}")
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+            self._trial_running.pop(host, None)
+
+    def record_failure(self, host: str) -> None:
+        with self._lock:
+            failures = self._failures[host] = self._failures.get(host, 0) + 1
+            trial = self._trial_running.pop(host, False)
+            if trial or failures >= self.failure_threshold:
+                if trial or host not in self._opened_at:
+                    logger.warning(f"Circuit open for {host} after {failures} failures")
+                self._opened_at[host] = time.monotonic()
+
+    def is_open(self, host: str) -> bool:
+        with self._lock:
+            return host in self._opened_at
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter, a run-wide retry budget and a
+    per-host circuit breaker.
+
+    Args:
+        max_attempts: Attempts per call, including the first
+        base_delay: Backoff for the first retry, doubled on each further one
+        max_delay: Cap on a single backoff
+        retry_budget: Total seconds of backoff allowed across the whole run
+        breaker: Circuit breaker shared by everything using this policy
+    """
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 1.0, max_delay: float = 60.0,
+                 retry_budget: float = 900.0, breaker: Optional[CircuitBreaker] = None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_budget = retry_budget
+        self.breaker = breaker or CircuitBreaker()
+        self._budget_used = 0.0
+        self._lock = threading.Lock()
+
+    def backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Delay before retry number ``attempt`` (1-based), honoring Retry-After."""
+        from download_utils import parse_retry_after  # download_utils imports this module
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        return max(delay, min(self.max_delay, parse_retry_after(retry_after)))
+
+    def _spend(self, delay: float) -> bool:
+        with self._lock:
+            if self._budget_used + delay > self.retry_budget:
+                return False
+            self._budget_used += delay
+            return True
+
+    @property
+    def budget_remaining(self) -> float:
+        with self._lock:
+            return max(0.0, self.retry_budget - self._budget_used)
+
+    def call(self, fn: Callable[..., T], *args, url: Optional[str] = None, **kwargs) -> T:
+        """
+        Call ``fn(*args, **kwargs)``, retrying transient errors.
+
+        Args:
+            fn: Callable to run
+            url: URL being fetched; its host keys the circuit breaker
+
+        Raises:
+            CircuitOpenError: The host's circuit is open
+            The last error once attempts or the retry budget run out, or
+            immediately for non-retryable errors.
+        """
+        host = urlparse(url).netloc if url else ''
+        attempt = 1
+        while True:
+            if host and not self.breaker.allow(host):
+                get_metrics().inc('circuit_open_total', host=host)
+                raise CircuitOpenError(f"Circuit open for {host}, not fetching {url}")
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e):
+                    # The host answered (e.g. a 404); that settles a half-open trial too
+                    if host and not isinstance(e, CircuitOpenError):
+                        self.breaker.record_success(host)
+                    raise
+                if host:
+                    self.breaker.record_failure(host)
+                if attempt >= self.max_attempts:
+                    raise
+                delay = self.backoff(attempt, _retry_after(e))
+                if not self._spend(delay):
+                    logger.warning(f"Retry budget exhausted, giving up on {url or fn}")
+                    raise
+                logger.info(f"Attempt {attempt} for {url or fn} failed ({e}), retrying in {delay:.1f}s")
+                get_metrics().inc('retries_total', host=host or 'unknown')
+                time.sleep(delay)
+                attempt += 1
+                continue
+            if host:
+                self.breaker.record_success(host)
+            return result
+
+@dataclass
+class RetryItem:
+    """A failed unit of work waiting for the end-of-run retry pass."""
+    key: Any
+    error: BaseException
+
+class RetryQueue:
+    """Collects items that failed transiently so they can be retried at the end of a run."""
+
+    def __init__(self):
+        self._items: List[RetryItem] = []
+        self._lock = threading.Lock()
+
+    def add(self, key: Any, error: BaseException) -> None:
+        with self._lock:
+            self._items.append(RetryItem(key, error))
+
+    def drain(self) -> List[RetryItem]:
+        """Return and clear the queued items."""
+        with self._lock:
+            items, self._items = self._items, []
+        return items
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+_default_policy: Optional[RetryPolicy] = None
+_default_policy_lock = threading.Lock()
+
+def get_retry_policy() -> RetryPolicy:
+    """Return the process-wide retry policy (and its circuit breaker)."""
+    global _default_policy
+    if _default_policy is None:
+        with _default_policy_lock:
+            if _default_policy is None:
+                _default_policy = RetryPolicy()
+    return _default_policy
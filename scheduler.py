@@ -0,0 +1,289 @@
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from http_cache import add_cache_arguments, configure_from_args
+from manifest import Manifest, add_window_arguments
+from metrics import add_metrics_arguments, configure_metrics, write_run_report
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGISTRY = "jurisdictions.json"
+NETWORK_KINDS = ('iqm2', 'boarddocs')
+PROCESS_KINDS = ('selenium',)
+
+@dataclass
+class JurisdictionConfig:
+    """
+    One entry of the jurisdiction registry.
+
+    ``kind`` picks the runner: ``iqm2`` (iqm2_client), ``boarddocs``
+    (browserless boarddocs_client) or ``selenium`` (a standalone script run
+    in its own process). Every other key in the entry is kept in ``options``.
+    Higher ``priority`` jobs are started first.
+    """
+    name: str
+    kind: str
+    priority: int = 0
+    time_budget: Optional[float] = None
+    enabled: bool = True
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def manifest_name(self) -> str:
+        return self.options.get('jurisdiction', self.name)
+
+@dataclass
+class JobSummary:
+    """Outcome of one jurisdiction in a scheduler run."""
+    name: str
+    kind: str
+    status: str
+    elapsed: float = 0.0
+    documents: Dict[str, int] = field(default_factory=dict)
+    error: Optional[str] = None
+
+def load_registry(path: str = DEFAULT_REGISTRY) -> List[JurisdictionConfig]:
+    """Read the jurisdiction registry, highest priority first."""
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)['jurisdictions']
+    configs = []
+    for entry in entries:
+        entry = dict(entry)
+        config = JurisdictionConfig(name=entry.pop('name'), kind=entry.pop('kind'),
+                                    priority=entry.pop('priority', 0),
+                                    time_budget=entry.pop('time_budget', None),
+                                    enabled=entry.pop('enabled', True), options=entry)
+        if config.kind not in NETWORK_KINDS + PROCESS_KINDS:
+            raise ValueError(f"{config.name}: unknown kind {config.kind!r}")
+        configs.append(config)
+    return sorted(configs, key=lambda c: -c.priority)
+
+def _window_argv(args: argparse.Namespace) -> List[str]:
+    argv = ['--manifest', args.manifest]
+    if args.start:
+        argv += ['--from', args.start.isoformat()]
+    if args.end:
+        argv += ['--to', args.end.isoformat()]
+    if args.since_last_run:
+        argv.append('--since-last-run')
+    return argv
+
+def _cache_argv(args: argparse.Namespace) -> List[str]:
+    argv = ['--cache-dir', args.cache_dir]
+    if args.no_cache:
+        argv.append('--no-cache')
+    if args.offline:
+        argv.append('--offline')
+    return argv
+
+def _network_runner(config: JurisdictionConfig, args: argparse.Namespace) -> Callable[[], None]:
+    """
+    Build the in-process call for a network-bound jurisdiction.
+
+    The response cache and metrics are process-wide and set up once by
+    ``main``, so the runners are told not to configure them again.
+    """
+    argv = _window_argv(args) + _cache_argv(args) + list(config.options.get('args', []))
+    if config.kind == 'iqm2':
+        from iqm2_client import run_cli
+        return lambda: run_cli(config.manifest_name, config.options['subdomain'],
+                               config.options['output_dir'], argv, standalone=False)
+    from boarddocs_client import main as boarddocs_main
+    argv += ['--jurisdiction', config.manifest_name, '--site', config.options['site'],
+             '--output-dir', config.options['output_dir']]
+    return lambda: boarddocs_main(argv, standalone=False)
+
+def _in_daemon_thread(fn: Callable[[], None]) -> 'asyncio.Future[None]':
+    """
+    Run ``fn`` in a daemon thread and return a future for it.
+
+    Unlike ``asyncio.to_thread`` this does not keep the process alive if the
+    job overruns its time budget and is abandoned.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def settle(error: Optional[BaseException]) -> None:
+        if future.done():
+            return
+        if error is None:
+            future.set_result(None)
+        else:
+            future.set_exception(error)
+
+    def target() -> None:
+        try:
+            fn()
+        except SystemExit as e:
+            # argparse and friends exit instead of raising
+            loop.call_soon_threadsafe(settle, RuntimeError(f"exited with status {e.code}"))
+        except BaseException as e:
+            loop.call_soon_threadsafe(settle, e)
+        else:
+            loop.call_soon_threadsafe(settle, None)
+
+    threading.Thread(target=target, daemon=True).start()
+    return future
+
+class Scheduler:
+    """
+    Runs every enabled jurisdiction concurrently.
+
+    Network-bound crawls share this process and its pooled session, each in
+    a thread driven from one asyncio loop; Selenium crawls run as separate
+    processes, at most ``browser_processes`` at a time. A job that exceeds
+    its time budget is reported as timed out: its process is killed, or its
+    thread is abandoned (daemon threads end with the scheduler).
+
+    Args:
+        configs: Registry entries to run
+        args: Parsed command line (window, manifest and cache options)
+        max_network_jobs: Network crawls allowed in flight at once
+        browser_processes: Selenium scripts allowed to run at once
+    """
+
+    def __init__(self, configs: List[JurisdictionConfig], args: argparse.Namespace,
+                 max_network_jobs: int = 4, browser_processes: int = 1):
+        self.configs = [c for c in configs if c.enabled]
+        self.args = args
+        self.max_network_jobs = max_network_jobs
+        self.browser_processes = browser_processes
+
+    async def _run_network(self, config: JurisdictionConfig) -> None:
+        await asyncio.wait_for(_in_daemon_thread(_network_runner(config, self.args)),
+                               config.time_budget)
+
+    async def _run_process(self, config: JurisdictionConfig) -> None:
+        command = ([sys.executable, config.options['script']] + _window_argv(self.args)
+                   + list(config.options.get('args', [])))
+        logger.info(f"{config.name}: starting {' '.join(command[1:])}")
+        process = await asyncio.create_subprocess_exec(*command)
+        try:
+            returncode = await asyncio.wait_for(process.wait(), config.time_budget)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise
+        if returncode != 0:
+            raise RuntimeError(f"{config.options['script']} exited with status {returncode}")
+
+    async def _run(self, config: JurisdictionConfig, slots: asyncio.Semaphore) -> JobSummary:
+        async with slots:
+            logger.info(f"Starting {config.name} ({config.kind}, priority {config.priority})")
+            started_at = datetime.now().replace(microsecond=0)
+            started = time.perf_counter()
+            summary = JobSummary(config.name, config.kind, 'ok')
+            try:
+                if config.kind in PROCESS_KINDS:
+                    await self._run_process(config)
+                else:
+                    await self._run_network(config)
+            except asyncio.TimeoutError:
+                summary.status = 'timed_out'
+                summary.error = f"exceeded time budget of {config.time_budget:.0f}s"
+            except Exception as e:
+                summary.status = 'failed'
+                summary.error = str(e)
+            summary.elapsed = time.perf_counter() - started
+        with Manifest(self.args.manifest) as manifest:
+            summary.documents = manifest.status_counts(config.manifest_name, since=started_at)
+        log = logger.info if summary.status == 'ok' else logger.error
+        log(f"Finished {config.name}: {summary.status} in {summary.elapsed:.0f}s"
+            + (f" ({summary.error})" if summary.error else ''))
+        return summary
+
+    async def run_async(self) -> List[JobSummary]:
+        # Tasks are created in priority order and semaphores wake waiters
+        # first-come first-served, so higher-priority jobs get slots first
+        network_slots = asyncio.Semaphore(self.max_network_jobs)
+        process_slots = asyncio.Semaphore(self.browser_processes)
+        tasks = [asyncio.create_task(self._run(config, process_slots if config.kind in PROCESS_KINDS
+                                               else network_slots))
+                 for config in self.configs]
+        return list(await asyncio.gather(*tasks))
+
+    def run(self) -> List[JobSummary]:
+        return asyncio.run(self.run_async())
+
+def format_summary(summaries: List[JobSummary], wall_clock: float) -> str:
+    """Render the combined run summary as a text table."""
+    lines = [f"{'Jurisdiction':<24} {'Status':<10} {'Time':>7}  Documents"]
+    for s in summaries:
+        documents = ', '.join(f"{count} {status}" for status, count in sorted(s.documents.items()))
+        lines.append(f"{s.name:<24} {s.status:<10} {s.elapsed:>6.0f}s  {documents or '-'}")
+    serial = sum(s.elapsed for s in summaries)
+    lines.append(f"Wall clock {wall_clock:.0f}s (sum of jobs {serial:.0f}s)")
+    return '\n'.join(lines)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(threadName)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Run all configured jurisdictions concurrently")
+    parser.add_argument('--registry', default=DEFAULT_REGISTRY,
+                        help=f'Jurisdiction registry (default: {DEFAULT_REGISTRY})')
+    parser.add_argument('--only', nargs='+', metavar='NAME', help='Run just these jurisdictions')
+    parser.add_argument('--max-network-jobs', type=int, default=4,
+                        help='Network-bound crawls to run at once')
+    parser.add_argument('--browser-processes', type=int, default=1,
+                        help='Selenium crawls to run at once, each in its own process')
+    parser.add_argument('--summary-json', help='Also write the run summary to this file')
+    parser.add_argument('--extract-text', action='store_true',
+                        help='Extract page text from new or changed PDFs and update the '
+                             'search index after the crawl')
+    parser.add_argument('--catalog', action='store_true',
+                        help='Append newly fetched documents to the Parquet meeting catalog after the crawl')
+    add_window_arguments(parser)
+    add_cache_arguments(parser)
+    add_metrics_arguments(parser)
+    args = parser.parse_args(argv)
+    configure_from_args(args)
+    configure_metrics(args)
+
+    configs = load_registry(args.registry)
+    if args.only:
+        configs = [c for c in configs if c.name in args.only]
+        for config in configs:
+            config.enabled = True
+    started = time.perf_counter()
+    summaries = Scheduler(configs, args, args.max_network_jobs, args.browser_processes).run()
+    wall_clock = time.perf_counter() - started
+    print(format_summary(summaries, wall_clock))
+    # Threads of timed-out network jobs may still be writing to the manifest
+    abandoned = [s.name for s in summaries if s.status == 'timed_out' and s.kind in NETWORK_KINDS]
+    if abandoned and (args.extract_text or args.catalog):
+        logger.warning(f"Skipping text extraction and catalog export: {', '.join(abandoned)} timed out")
+    else:
+        if args.extract_text and not args.offline:
+            from pdf_text import documents_from_manifest, extract_all
+            from search_index import SearchIndex
+            extract_all(documents_from_manifest(args.manifest))
+            with SearchIndex() as index, Manifest(args.manifest) as manifest:
+                index.update_from_manifest(manifest)
+        if args.catalog:
+            from catalog import MeetingCatalog
+            try:
+                catalog = MeetingCatalog()
+            except RuntimeError as e:
+                logger.error(f"Skipping catalog export: {e}")
+            else:
+                with Manifest(args.manifest) as manifest:
+                    count = catalog.export_from_manifest(manifest)
+                logger.info(f"Appended {count} rows to {catalog.root}")
+    write_run_report(args, {'wall_clock_seconds': round(wall_clock, 3),
+                            'jobs': [asdict(s) for s in summaries]})
+    if args.summary_json:
+        Path(args.summary_json).write_text(json.dumps(
+            {'wall_clock': wall_clock, 'jobs': [asdict(s) for s in summaries]}, indent=2))
+    return 0 if all(s.status == 'ok' for s in summaries) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+import argparse
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from manifest import DEFAULT_MANIFEST_PATH, Manifest
+from pdf_text import DEFAULT_TEXT_DIR, text_path_for
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = "search_index.sqlite3"
+# FTS5 b-tree pages merged after each update; a full optimize is the
+# ``optimize`` command, since it rewrites the whole index
+MERGE_PAGES = 500
+MEETING_FIELDS = ('jurisdiction', 'meeting_id', 'url', 'sha256', 'meeting_date', 'meeting_type', 'filepath')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    sha256       TEXT PRIMARY KEY,
+    jurisdiction TEXT NOT NULL,
+    meeting_id   TEXT,
+    meeting_date TEXT,
+    meeting_type TEXT,
+    url          TEXT,
+    filepath     TEXT,
+    page_count   INTEGER NOT NULL,
+    indexed_at   TEXT NOT NULL,
+    first_rowid  INTEGER,
+    last_rowid   INTEGER
+);
+CREATE INDEX IF NOT EXISTS documents_by_date ON documents (jurisdiction, meeting_date);
+CREATE TABLE IF NOT EXISTS meetings (
+    jurisdiction TEXT NOT NULL,
+    meeting_id   TEXT,
+    url          TEXT,
+    sha256       TEXT NOT NULL,
+    meeting_date TEXT,
+    meeting_type TEXT,
+    filepath     TEXT,
+    PRIMARY KEY (jurisdiction, meeting_id, url)
+);
+CREATE INDEX IF NOT EXISTS meetings_by_hash ON meetings (sha256, meeting_date);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5(
+    text,
+    sha256 UNINDEXED,
+    page UNINDEXED,
+    tokenize = 'porter unicode61'
+);
+"""
+
+@dataclass
+class SearchHit:
+    """One matching page."""
+    sha256: str
+    page: int
+    jurisdiction: str
+    meeting_date: Optional[str]
+    meeting_type: Optional[str]
+    filepath: Optional[str]
+    url: Optional[str]
+    snippet: str
+    score: float
+
+class SearchIndex:
+    """
+    SQLite FTS5 index of extracted packet text.
+
+    Holds one FTS row per page (text, document hash, page number), one row
+    per document and one row per meeting that links to it: jurisdiction,
+    meeting date and meeting type (the IQM2 meeting type, or the event name
+    for BoardDocs), all taken from the crawl manifest. Documents are keyed
+    by content hash, so updates only touch packets that are new, changed or
+    gone; an attachment shared by several meetings is indexed once and found
+    by filters on any of them. A document's pages are written in one
+    transaction and so get consecutive FTS rowids; the document row keeps
+    that range, so dropping a document is a rowid lookup rather than a scan
+    of the unindexed ``sha256`` column.
+    """
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_INDEX_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(documents)")]
+        for column in ('first_rowid', 'last_rowid'):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE documents ADD COLUMN {column} INTEGER")
+        with self._conn:
+            # Indexes built before meetings were kept: start from each document's first meeting
+            self._conn.execute(
+                """
+                INSERT OR IGNORE INTO meetings (jurisdiction, meeting_id, url, sha256, meeting_date,
+                                                meeting_type, filepath)
+                SELECT jurisdiction, meeting_id, url, sha256, meeting_date, meeting_type, filepath
+                FROM documents WHERE NOT EXISTS (SELECT 1 FROM meetings)
+                """)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _delete_pages(self, digest: str) -> None:
+        row = self._conn.execute("SELECT page_count, first_rowid, last_rowid FROM documents WHERE sha256 = ?",
+                                 (digest,)).fetchone()
+        if row is None:
+            return  # Pages and their metadata row are always written together
+        page_count, first_rowid, last_rowid = row
+        if first_rowid is not None:
+            self._conn.execute("DELETE FROM pages WHERE rowid BETWEEN ? AND ?", (first_rowid, last_rowid))
+        elif page_count:
+            # Indexed before rowid ranges were kept
+            self._conn.execute("DELETE FROM pages WHERE sha256 = ?", (digest,))
+
+    def _record_meetings(self, rows: List[Dict[str, Optional[str]]]) -> None:
+        """Upsert the meeting rows that link to indexed documents."""
+        self._conn.executemany(
+            f"""
+            INSERT INTO meetings ({', '.join(MEETING_FIELDS)}) VALUES ({', '.join('?' * len(MEETING_FIELDS))})
+            ON CONFLICT (jurisdiction, meeting_id, url) DO UPDATE SET
+                sha256 = excluded.sha256,
+                meeting_date = excluded.meeting_date,
+                meeting_type = excluded.meeting_type,
+                filepath = excluded.filepath
+            WHERE sha256 IS NOT excluded.sha256 OR meeting_date IS NOT excluded.meeting_date
+                OR meeting_type IS NOT excluded.meeting_type OR filepath IS NOT excluded.filepath
+            """,
+            [tuple(row.get(name) for name in MEETING_FIELDS) for row in rows])
+
+    def indexed_hashes(self) -> set:
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT sha256 FROM documents")}
+
+    def add_document(self, text_path: Union[str, Path], metadata: Dict[str, Optional[str]]) -> int:
+        """
+        Index one document from its page JSONL file.
+
+        Args:
+            text_path: ``pdf_text`` output for the document
+            metadata: Manifest row of the document (needs at least ``sha256``
+                and ``jurisdiction``)
+
+        Returns:
+            Number of pages indexed.
+        """
+        digest = metadata['sha256']
+        with self._lock, self._conn:
+            self._delete_pages(digest)
+            pages = 0
+            first_rowid = last_rowid = None
+            with open(text_path, encoding='utf-8') as f:
+                for line in f:
+                    record = json.loads(line)
+                    last_rowid = self._conn.execute("INSERT INTO pages (text, sha256, page) VALUES (?, ?, ?)",
+                                                    (record['text'], digest, record['page'])).lastrowid
+                    if first_rowid is None:
+                        first_rowid = last_rowid
+                    pages += 1
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO documents (sha256, jurisdiction, meeting_id, meeting_date,
+                                                  meeting_type, url, filepath, page_count, indexed_at,
+                                                  first_rowid, last_rowid)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (digest, metadata['jurisdiction'], metadata.get('meeting_id'),
+                 metadata.get('meeting_date'), metadata.get('meeting_type'), metadata.get('url'),
+                 metadata.get('filepath'), pages, datetime.now().isoformat(timespec='seconds'),
+                 first_rowid, last_rowid))
+            self._record_meetings([metadata])
+        return pages
+
+    def remove_document(self, digest: str) -> None:
+        with self._lock, self._conn:
+            self._delete_pages(digest)
+            self._conn.execute("DELETE FROM documents WHERE sha256 = ?", (digest,))
+            self._conn.execute("DELETE FROM meetings WHERE sha256 = ?", (digest,))
+
+    def optimize(self) -> None:
+        """Merge the whole FTS index into one b-tree; rewrites the index, so run it occasionally."""
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO pages (pages) VALUES ('optimize')")
+
+    def update_from_manifest(self, manifest: Manifest,
+                             text_dir: Union[str, Path] = DEFAULT_TEXT_DIR) -> Dict[str, int]:
+        """
+        Bring the index in line with the manifest and the extracted text.
+
+        New documents whose text has been extracted are added, every meeting
+        linking to an indexed document is recorded, and documents no longer
+        referenced by any manifest row (a packet that was replaced by a
+        revised version) are dropped. Afterwards a bounded FTS merge of
+        MERGE_PAGES pages keeps the index from fragmenting without rewriting
+        it; see ``optimize`` for a full merge.
+
+        Returns:
+            Counts of added documents, indexed pages and removed documents.
+        """
+        current = {}
+        rows = [row for row in manifest.fetched_documents() if row['sha256']]
+        for row in rows:
+            current.setdefault(row['sha256'], row)
+        indexed = self.indexed_hashes()
+        stats = {'added': 0, 'pages': 0, 'removed': 0, 'waiting': 0}
+        for digest, row in current.items():
+            if digest in indexed:
+                continue
+            text_path = text_path_for(text_dir, digest)
+            if not text_path.exists():
+                stats['waiting'] += 1  # Not extracted yet
+                continue
+            stats['pages'] += self.add_document(text_path, row)
+            stats['added'] += 1
+        for digest in indexed - current.keys():
+            self.remove_document(digest)
+            stats['removed'] += 1
+        with self._lock, self._conn:
+            self._record_meetings(rows)
+            if stats['added'] or stats['removed']:
+                self._conn.execute("INSERT INTO pages (pages, rank) VALUES ('merge', ?)", (MERGE_PAGES,))
+        return stats
+
+    def search(self, query: str, limit: int = 20, jurisdiction: Optional[str] = None,
+               start: Optional[date] = None, end: Optional[date] = None) -> List[SearchHit]:
+        """
+        Return the best-matching pages, best first.
+
+        ``query`` uses FTS5 syntax (``"exact phrase"``, ``AND``/``OR``/``NOT``,
+        ``prefix*``); if it does not parse, its words are searched literally.
+        A page of a document shared by several meetings matches if any of
+        them passes the filters, and is shown once, under the latest of those.
+        """
+        conditions = ""
+        params: list = []
+        if jurisdiction:
+            conditions += " AND jurisdiction = ?"
+            params.append(jurisdiction)
+        if start:
+            conditions += " AND meeting_date >= ?"
+            params.append(start.isoformat())
+        if end:
+            conditions += " AND meeting_date <= ?"
+            params.append(end.isoformat())
+        sql = f"""
+            SELECT pages.sha256, pages.page, m.jurisdiction, m.meeting_date, m.meeting_type, m.filepath,
+                   m.url, snippet(pages, 0, '[', ']', '...', 12), bm25(pages)
+            FROM pages JOIN meetings m ON m.rowid = (
+                SELECT rowid FROM meetings WHERE sha256 = pages.sha256{conditions}
+                ORDER BY meeting_date DESC LIMIT 1)
+            WHERE pages MATCH ?
+            ORDER BY bm25(pages) LIMIT ?
+        """
+        try:
+            with self._lock:
+                rows = self._conn.execute(sql, params + [query, limit]).fetchall()
+        except sqlite3.OperationalError as e:
+            if 'syntax error' not in str(e) and 'no such column' not in str(e):
+                raise
+            literal = ' '.join('"' + word.replace('"', '""') + '"' for word in query.split())
+            with self._lock:
+                rows = self._conn.execute(sql, params + [literal, limit]).fetchall()
+        return [SearchHit(*row) for row in rows]
+
+def main(argv: Optional[List[str]] = None) -> None:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Full-text search over downloaded agenda packets")
+    parser.add_argument('--index', default=DEFAULT_INDEX_PATH,
+                        help=f'Path of the search index (default: {DEFAULT_INDEX_PATH})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    update = commands.add_parser('update', help='Index newly extracted documents')
+    update.add_argument('--manifest', default=DEFAULT_MANIFEST_PATH,
+                        help=f'Path of the SQLite crawl manifest (default: {DEFAULT_MANIFEST_PATH})')
+    update.add_argument('--text-dir', default=DEFAULT_TEXT_DIR,
+                        help=f'Directory of pdf_text.py output (default: {DEFAULT_TEXT_DIR})')
+
+    commands.add_parser('optimize', help='Merge the index into one b-tree (slow on a large index)')
+
+    search = commands.add_parser('search', help='Query the index')
+    search.add_argument('query', help='Words, "phrases", AND/OR/NOT, prefix*')
+    search.add_argument('--jurisdiction', help='Only search this jurisdiction')
+    search.add_argument('--from', dest='start', type=lambda s: datetime.strptime(s, '%Y-%m-%d').date(),
+                        help='Earliest meeting date (YYYY-MM-DD)')
+    search.add_argument('--to', dest='end', type=lambda s: datetime.strptime(s, '%Y-%m-%d').date(),
+                        help='Latest meeting date (YYYY-MM-DD)')
+    search.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with SearchIndex(args.index) as index:
+        if args.command == 'update':
+            with Manifest(args.manifest) as manifest:
+                stats = index.update_from_manifest(manifest, args.text_dir)
+            logger.info(f"Indexed {stats['added']} documents ({stats['pages']} pages), "
+                        f"removed {stats['removed']}, {stats['waiting']} awaiting text extraction")
+            return
+        if args.command == 'optimize':
+            started = time.perf_counter()
+            index.optimize()
+            logger.info(f"Optimized {args.index} in {time.perf_counter() - started:.1f}s")
+            return
+        started = time.perf_counter()
+        hits = index.search(args.query, args.limit, args.jurisdiction, args.start, args.end)
+        elapsed = time.perf_counter() - started
+        for hit in hits:
+            print(f"{hit.meeting_date} {hit.jurisdiction} - {hit.meeting_type or 'Unknown'} "
+                  f"(page {hit.page})")
+            print(f"    {hit.filepath}")
+            print(f"    {' '.join(hit.snippet.split())}")
+        print(f"{len(hits)} hits in {elapsed * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import time
+
+import pytest
+import requests
+
+from retry_policy import CircuitBreaker, CircuitOpenError, RetryPolicy
+
+URL = "https://example.com/agenda.pdf"
+HOST = "example.com"
+
+def http_error(status: int) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+def failing(status: int):
+    def fn():
+        raise http_error(status)
+    return fn
+
+def test_non_retryable_error_on_half_open_trial_closes_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    policy = RetryPolicy(max_attempts=1, breaker=breaker)
+
+    with pytest.raises(requests.HTTPError):
+        policy.call(failing(503), url=URL)
+    assert breaker.is_open(HOST)
+    with pytest.raises(CircuitOpenError):
+        policy.call(lambda: 'ok', url=URL)
+
+    time.sleep(0.02)
+    with pytest.raises(requests.HTTPError):
+        policy.call(failing(404), url=URL)
+    assert not breaker.is_open(HOST)
+    assert policy.call(lambda: 'ok', url=URL) == 'ok'
+
+def test_retryable_error_on_half_open_trial_reopens_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    policy = RetryPolicy(max_attempts=1, breaker=breaker)
+
+    with pytest.raises(requests.HTTPError):
+        policy.call(failing(503), url=URL)
+    time.sleep(0.02)
+    with pytest.raises(requests.HTTPError):
+        policy.call(failing(503), url=URL)
+    assert breaker.is_open(HOST)
+    with pytest.raises(CircuitOpenError):
+        policy.call(lambda: 'ok', url=URL)
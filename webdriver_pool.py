@@ -0,0 +1,126 @@
+import logging
+import os
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PoolResult:
+    """Outcome of one task run through the pool."""
+    task: Any
+    value: Any = None
+    error: Optional[BaseException] = None
+    attempts: int = 1
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+def default_pool_size() -> int:
+    """One browser per core, leaving one core for everything else."""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+def driver_is_alive(driver) -> bool:
+    """Return False if the browser behind ``driver`` has gone away."""
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+class WebDriverPool:
+    """
+    Bounded pool of browser workers fed from a shared work queue.
+
+    Each worker thread owns one driver created by ``driver_factory(worker_id)``
+    (so each can have its own download directory), recycles it after
+    ``recycle_after`` tasks to cap memory growth, and replaces it if the
+    browser crashes, putting the interrupted task back on the queue.
+
+    Args:
+        driver_factory: Callable taking a worker index and returning a driver
+        size: Number of concurrent drivers
+        recycle_after: Restart a driver after this many tasks (0 = never)
+        max_attempts: Times a task is retried after a browser crash
+    """
+
+    def __init__(self, driver_factory: Callable[[int], Any], size: Optional[int] = None,
+                 recycle_after: int = 50, max_attempts: int = 2):
+        self.driver_factory = driver_factory
+        self.size = size or default_pool_size()
+        self.recycle_after = recycle_after
+        self.max_attempts = max_attempts
+
+    def _start_driver(self, worker_id: int):
+        logger.info(f"Worker {worker_id}: starting browser")
+        return self.driver_factory(worker_id)
+
+    @staticmethod
+    def _stop_driver(driver) -> None:
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.debug(f"Ignoring error while quitting driver: {e}")
+
+    def _worker(self, worker_id: int, tasks: queue.Queue, handler: Callable,
+                results: List[PoolResult], lock: threading.Lock) -> None:
+        driver = None
+        pages = 0
+        while True:
+            try:
+                item = tasks.get_nowait()
+            except queue.Empty:
+                break
+            task, attempt = item
+            try:
+                if driver is None:
+                    driver = self._start_driver(worker_id)
+                    pages = 0
+                value = handler(driver, task)
+                with lock:
+                    results.append(PoolResult(task, value, attempts=attempt))
+            except Exception as e:
+                if driver is not None and not driver_is_alive(driver):
+                    logger.warning(f"Worker {worker_id}: browser crashed ({e}), restarting")
+                    self._stop_driver(driver)
+                    driver = None
+                    if attempt < self.max_attempts:
+                        tasks.put((task, attempt + 1))
+                        continue
+                with lock:
+                    results.append(PoolResult(task, error=e, attempts=attempt))
+            finally:
+                pages += 1
+                tasks.task_done()
+
+            if driver is not None and self.recycle_after and pages >= self.recycle_after:
+                logger.info(f"Worker {worker_id}: recycling browser after {pages} tasks")
+                self._stop_driver(driver)
+                driver = None
+
+        if driver is not None:
+            self._stop_driver(driver)
+
+    def map(self, handler: Callable[[Any, Any], Any], tasks: Iterable[Any]) -> List[PoolResult]:
+        """
+        Run ``handler(driver, task)`` for every task across the pool.
+
+        Returns:
+            One PoolResult per task, in completion order.
+        """
+        work: queue.Queue = queue.Queue()
+        for task in tasks:
+            work.put((task, 1))
+        results: List[PoolResult] = []
+        lock = threading.Lock()
+        workers = [threading.Thread(target=self._worker, args=(i, work, handler, results, lock),
+                                    name=f"webdriver-{i}", daemon=True)
+                   for i in range(min(self.size, work.qsize()))]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return results
@@ -0,0 +1,848 @@
+"""
+Lease-based crawl work queue for spreading a backfill over several machines.
+
+A coordinator runs discovery and enqueues one task per document (or, for
+the Selenium BoardDocs path, one task per meeting). Any number of worker
+processes, on any number of hosts, claim tasks under a time-limited lease,
+extend the lease while they work, and mark each task done or hand it back.
+A worker that dies simply stops renewing its lease; once the lease runs out
+the task is claimed again by someone else, so no work is lost. Delivery is
+at least once: a task whose lease expired mid-run can be done twice, which
+is harmless because downloads replace their target atomically.
+
+Workers on several hosts write documents to the paths in their tasks, so
+output directories must be on storage all of them share (or be synced
+afterwards). Manifest rows travel back through the queue instead: each
+worker attaches the rows it recorded to the task it completes, and
+``collect`` writes them into the coordinator's manifest and then clears
+them, so each result is recorded once.
+
+Two backends share the same interface:
+
+    SQLiteWorkQueue   a file on one host (workers are local processes)
+    RedisWorkQueue    any Redis-compatible server, for workers on many hosts;
+                      needs the ``redis`` package, or pass a compatible
+                      client such as ``fakeredis.FakeRedis()`` for local runs
+
+    python work_queue.py --queue crawl_queue.sqlite3 enqueue --from 2015-01-01
+    python work_queue.py --queue redis://coordinator:6379/0 work --processes 4
+    python work_queue.py --queue redis://coordinator:6379/0 collect
+    python work_queue.py --queue redis://coordinator:6379/0 status
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from manifest import DEFAULT_MANIFEST_PATH, Manifest, add_window_arguments, resolve_window
+from metrics import add_metrics_arguments, configure_metrics, get_metrics, write_run_report
+
+try:
+    import redis
+    HAVE_REDIS = True
+except ImportError:
+    HAVE_REDIS = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_PATH = "crawl_queue.sqlite3"
+DEFAULT_QUEUE_NAME = "crawl"
+DEFAULT_LEASE_SECONDS = 300.0
+DEFAULT_MAX_ATTEMPTS = 3
+POLL_INTERVAL = 1.0
+
+@dataclass
+class Task:
+    """One unit of crawl work; ``task_id`` keeps a task from being queued twice at once."""
+    task_id: str
+    kind: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+    attempts: int = 0
+
+class WorkQueue:
+    """
+    Interface shared by the queue backends.
+
+    Task states are ``pending``, ``leased``, ``done`` and ``failed``. A
+    leased task whose lease has expired counts as pending again; after
+    ``max_attempts`` claims it is marked failed instead.
+    """
+
+    def __init__(self, name: str = DEFAULT_QUEUE_NAME, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.name = name
+        self.max_attempts = max_attempts
+
+    def enqueue(self, tasks: Iterable[Task]) -> int:
+        """
+        Queue tasks to run.
+
+        New IDs are added. IDs that are already done or failed go back to
+        pending with their attempts reset, so a recurring enqueue re-checks
+        documents inside the lookback window and retries earlier failures.
+        IDs that are still pending or leased are left alone.
+
+        Returns:
+            Number of tasks added or requeued.
+        """
+        raise NotImplementedError
+
+    def claim(self, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Task]:
+        """Lease the next available task to ``worker_id``, or return None if there is none."""
+        raise NotImplementedError
+
+    def heartbeat(self, task: Task, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        """Extend the lease; False if the worker no longer holds it."""
+        raise NotImplementedError
+
+    def complete(self, task: Task, worker_id: str, result: Optional[Dict[str, Any]] = None) -> bool:
+        """Mark a leased task done, keeping ``result``; False if the lease had already been lost."""
+        raise NotImplementedError
+
+    def fail(self, task: Task, worker_id: str, error: str, retry: bool = True) -> str:
+        """
+        Give a task back after an error.
+
+        It goes back to pending if ``retry`` is set and it has attempts
+        left, otherwise it is marked failed.
+
+        Returns:
+            The task's new state.
+        """
+        raise NotImplementedError
+
+    def counts(self) -> Dict[str, int]:
+        """Number of tasks in each state."""
+        raise NotImplementedError
+
+    def results(self) -> Dict[str, Dict[str, Any]]:
+        """Results attached to done tasks and not yet cleared, by task ID."""
+        raise NotImplementedError
+
+    def clear_results(self, results: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Forget results once they have been collected; the tasks stay done.
+
+        A result that changed since it was read (the task was requeued and
+        ran again) is kept for the next collection.
+
+        Returns:
+            Number of results cleared.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    queue         TEXT NOT NULL,
+    task_id       TEXT NOT NULL,
+    kind          TEXT NOT NULL,
+    payload       TEXT NOT NULL,
+    status        TEXT NOT NULL DEFAULT 'pending',
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    lease_owner   TEXT,
+    lease_expires REAL,
+    error         TEXT,
+    result        TEXT,
+    PRIMARY KEY (queue, task_id)
+);
+CREATE INDEX IF NOT EXISTS tasks_by_status ON tasks (queue, status, lease_expires);
+"""
+
+class SQLiteWorkQueue(WorkQueue):
+    """Work queue in a SQLite file, for worker processes on one host."""
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_QUEUE_PATH, name: str = DEFAULT_QUEUE_NAME,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        super().__init__(name, max_attempts)
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        # Autocommit mode so claims can take the write lock up front with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SQLITE_SCHEMA)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(tasks)")]
+        if 'result' not in columns:
+            self._conn.execute("ALTER TABLE tasks ADD COLUMN result TEXT")
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _transaction(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def enqueue(self, tasks: Iterable[Task]) -> int:
+        rows = [(self.name, t.task_id, t.kind, json.dumps(t.payload)) for t in tasks]
+
+        def insert(conn: sqlite3.Connection) -> int:
+            before = conn.total_changes
+            conn.executemany(
+                """
+                INSERT INTO tasks (queue, task_id, kind, payload) VALUES (?, ?, ?, ?)
+                ON CONFLICT (queue, task_id) DO UPDATE SET
+                    kind = excluded.kind, payload = excluded.payload, status = 'pending',
+                    attempts = 0, lease_owner = NULL, lease_expires = NULL, error = NULL, result = NULL
+                WHERE status IN ('done', 'failed')
+                """, rows)
+            return conn.total_changes - before
+        return self._transaction(insert)
+
+    def claim(self, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Task]:
+        def take(conn: sqlite3.Connection) -> Optional[Task]:
+            now = time.time()
+            # Tasks whose worker died too often are given up on rather than retried forever
+            conn.execute(
+                """
+                UPDATE tasks SET status = 'failed', lease_owner = NULL,
+                                 error = 'lease expired on every attempt'
+                WHERE queue = ? AND status = 'leased' AND lease_expires < ? AND attempts >= ?
+                """, (self.name, now, self.max_attempts))
+            row = conn.execute(
+                """
+                SELECT rowid, task_id, kind, payload, attempts FROM tasks
+                WHERE queue = ? AND (status = 'pending' OR (status = 'leased' AND lease_expires < ?))
+                ORDER BY rowid LIMIT 1
+                """, (self.name, now)).fetchone()
+            if row is None:
+                return None
+            rowid, task_id, kind, payload, attempts = row
+            conn.execute("UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                         "attempts = attempts + 1 WHERE rowid = ?", (worker_id, now + lease_seconds, rowid))
+            return Task(task_id, kind, json.loads(payload), attempts + 1)
+        return self._transaction(take)
+
+    def _update_leased(self, task: Task, worker_id: str, assignments: str, params: tuple) -> bool:
+        def update(conn: sqlite3.Connection) -> bool:
+            cursor = conn.execute(
+                f"UPDATE tasks SET {assignments} "
+                "WHERE queue = ? AND task_id = ? AND status = 'leased' AND lease_owner = ?",
+                params + (self.name, task.task_id, worker_id))
+            return cursor.rowcount == 1
+        return self._transaction(update)
+
+    def heartbeat(self, task: Task, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        return self._update_leased(task, worker_id, "lease_expires = ?", (time.time() + lease_seconds,))
+
+    def complete(self, task: Task, worker_id: str, result: Optional[Dict[str, Any]] = None) -> bool:
+        return self._update_leased(task, worker_id, "status = 'done', lease_owner = NULL, error = NULL, result = ?",
+                                   (json.dumps(result) if result is not None else None,))
+
+    def fail(self, task: Task, worker_id: str, error: str, retry: bool = True) -> str:
+        status = 'pending' if retry and task.attempts < self.max_attempts else 'failed'
+        self._update_leased(task, worker_id, "status = ?, lease_owner = NULL, error = ?", (status, error))
+        return status
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT CASE WHEN status = 'leased' AND lease_expires < ? THEN 'pending' ELSE status END,
+                       COUNT(*)
+                FROM tasks WHERE queue = ? GROUP BY 1
+                """, (time.time(), self.name)).fetchall()
+        counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        counts.update(dict(rows))
+        return counts
+
+    def results(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT task_id, result FROM tasks WHERE queue = ? AND status = 'done' AND result IS NOT NULL",
+                (self.name,)).fetchall()
+        return {task_id: json.loads(result) for task_id, result in rows}
+
+    def clear_results(self, results: Dict[str, Dict[str, Any]]) -> int:
+        def clear(conn: sqlite3.Connection) -> int:
+            before = conn.total_changes
+            conn.executemany(
+                "UPDATE tasks SET result = NULL "
+                "WHERE queue = ? AND task_id = ? AND status = 'done' AND result = ?",
+                [(self.name, task_id, json.dumps(result)) for task_id, result in results.items()])
+            return conn.total_changes - before
+        return self._transaction(clear)
+
+    def failures(self) -> List[tuple]:
+        """(task_id, error) of every failed task."""
+        with self._lock:
+            return self._conn.execute("SELECT task_id, error FROM tasks WHERE queue = ? AND status = 'failed'",
+                                      (self.name,)).fetchall()
+
+class RedisWorkQueue(WorkQueue):
+    """
+    Work queue on a Redis-compatible server, for workers on many hosts.
+
+    Uses plain commands and WATCH/MULTI transactions (no Lua), so in-process
+    stand-ins such as fakeredis work too. Keys, all under ``<name>:``:
+    ``tasks`` (hash of task JSON), ``pending`` (list of IDs), ``leases``
+    (sorted set of IDs by expiry), ``owners`` and ``attempts`` (hashes),
+    ``done`` (set), ``results`` (hash of result JSON) and ``failed`` (hash
+    of errors).
+    """
+
+    def __init__(self, client, name: str = DEFAULT_QUEUE_NAME, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        """
+        Args:
+            client: redis-py compatible client created with ``decode_responses=True``
+            name: Key prefix of this queue
+            max_attempts: Claims before a task is marked failed
+        """
+        if not HAVE_REDIS:
+            raise RuntimeError("The Redis queue backend needs the redis package (pip install redis)")
+        super().__init__(name, max_attempts)
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str, name: str = DEFAULT_QUEUE_NAME,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> 'RedisWorkQueue':
+        if not HAVE_REDIS:
+            raise RuntimeError("The Redis queue backend needs the redis package (pip install redis)")
+        return cls(redis.Redis.from_url(url, decode_responses=True), name, max_attempts)
+
+    def _key(self, suffix: str) -> str:
+        return f"{self.name}:{suffix}"
+
+    def _transaction(self, fn: Callable[[Any], Any], *watch: str) -> Any:
+        """Run ``fn(pipe)`` under WATCH on the ``watch`` keys, retrying if another client got there first."""
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(*watch)
+                    return fn(pipe)
+                except redis.WatchError:
+                    continue
+
+    def close(self) -> None:
+        self.client.close()
+
+    def enqueue(self, tasks: Iterable[Task]) -> int:
+        tasks = list(tasks)
+        if not tasks:
+            return 0
+
+        def add(pipe) -> int:
+            # A known ID is only queued again once it has finished, one way or the other
+            queued = [task for task in tasks
+                      if not pipe.hexists(self._key('tasks'), task.task_id)
+                      or pipe.sismember(self._key('done'), task.task_id)
+                      or pipe.hexists(self._key('failed'), task.task_id)]
+            if not queued:
+                pipe.unwatch()
+                return 0
+            pipe.multi()
+            for task in queued:
+                pipe.hset(self._key('tasks'), task.task_id,
+                          json.dumps({'kind': task.kind, 'payload': task.payload}))
+                pipe.srem(self._key('done'), task.task_id)
+                pipe.hdel(self._key('failed'), task.task_id)
+                pipe.hdel(self._key('attempts'), task.task_id)
+                pipe.hdel(self._key('results'), task.task_id)
+            pipe.rpush(self._key('pending'), *[task.task_id for task in queued])
+            pipe.execute()
+            return len(queued)
+        # Watching tasks too keeps two enqueuers from both seeing an ID as new and pushing it twice
+        return self._transaction(add, self._key('tasks'), self._key('done'), self._key('failed'))
+
+    def _requeue_expired(self) -> None:
+        now = time.time()
+        for task_id in self.client.zrangebyscore(self._key('leases'), '-inf', now):
+            def requeue(pipe, task_id=task_id) -> None:
+                score = pipe.zscore(self._key('leases'), task_id)
+                if score is None or score >= now:
+                    pipe.unwatch()
+                    return  # Renewed or finished in the meantime
+                attempts = int(pipe.hget(self._key('attempts'), task_id) or 0)
+                pipe.multi()
+                pipe.zrem(self._key('leases'), task_id)
+                pipe.hdel(self._key('owners'), task_id)
+                if attempts >= self.max_attempts:
+                    pipe.hset(self._key('failed'), task_id, 'lease expired on every attempt')
+                else:
+                    pipe.rpush(self._key('pending'), task_id)
+                pipe.execute()
+            self._transaction(requeue, self._key('leases'))
+
+    def claim(self, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Task]:
+        self._requeue_expired()
+
+        def take(pipe) -> Optional[tuple]:
+            task_id = pipe.lindex(self._key('pending'), 0)
+            if task_id is None:
+                pipe.unwatch()
+                return None
+            pipe.multi()
+            pipe.lpop(self._key('pending'))
+            pipe.zadd(self._key('leases'), {task_id: time.time() + lease_seconds})
+            pipe.hset(self._key('owners'), task_id, worker_id)
+            pipe.hincrby(self._key('attempts'), task_id, 1)
+            results = pipe.execute()
+            return task_id, results[-1]
+
+        claimed = self._transaction(take, self._key('pending'))
+        if claimed is None:
+            return None
+        task_id, attempts = claimed
+        stored = json.loads(self.client.hget(self._key('tasks'), task_id))
+        return Task(task_id, stored['kind'], stored['payload'], attempts)
+
+    def _release(self, task: Task, worker_id: str, finish: Callable[[Any], None]) -> bool:
+        def release(pipe) -> bool:
+            if pipe.hget(self._key('owners'), task.task_id) != worker_id:
+                pipe.unwatch()
+                return False
+            pipe.multi()
+            finish(pipe)
+            pipe.execute()
+            return True
+        return self._transaction(release, self._key('owners'))
+
+    def heartbeat(self, task: Task, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        return self._release(task, worker_id, lambda pipe: pipe.zadd(
+            self._key('leases'), {task.task_id: time.time() + lease_seconds}, xx=True))
+
+    def _unlease(self, pipe, task: Task) -> None:
+        pipe.zrem(self._key('leases'), task.task_id)
+        pipe.hdel(self._key('owners'), task.task_id)
+
+    def complete(self, task: Task, worker_id: str, result: Optional[Dict[str, Any]] = None) -> bool:
+        def finish(pipe) -> None:
+            self._unlease(pipe, task)
+            pipe.sadd(self._key('done'), task.task_id)
+            if result is not None:
+                pipe.hset(self._key('results'), task.task_id, json.dumps(result))
+        return self._release(task, worker_id, finish)
+
+    def fail(self, task: Task, worker_id: str, error: str, retry: bool = True) -> str:
+        status = 'pending' if retry and task.attempts < self.max_attempts else 'failed'
+
+        def finish(pipe) -> None:
+            self._unlease(pipe, task)
+            if status == 'pending':
+                pipe.rpush(self._key('pending'), task.task_id)
+            else:
+                pipe.hset(self._key('failed'), task.task_id, error)
+        self._release(task, worker_id, finish)
+        return status
+
+    def counts(self) -> Dict[str, int]:
+        now = time.time()
+        pipe = self.client.pipeline(transaction=False)
+        pipe.llen(self._key('pending'))
+        pipe.zcount(self._key('leases'), now, '+inf')
+        pipe.zcount(self._key('leases'), '-inf', f"({now}")
+        pipe.scard(self._key('done'))
+        pipe.hlen(self._key('failed'))
+        pending, leased, expired, done, failed = pipe.execute()
+        return {'pending': pending + expired, 'leased': leased, 'done': done, 'failed': failed}
+
+    def results(self) -> Dict[str, Dict[str, Any]]:
+        return {task_id: json.loads(result)
+                for task_id, result in self.client.hgetall(self._key('results')).items()}
+
+    def clear_results(self, results: Dict[str, Dict[str, Any]]) -> int:
+        if not results:
+            return 0
+        task_ids = list(results)
+
+        def clear(pipe) -> int:
+            stored = pipe.hmget(self._key('results'), task_ids)
+            unchanged = [task_id for task_id, value in zip(task_ids, stored)
+                         if value == json.dumps(results[task_id])]
+            if not unchanged:
+                pipe.unwatch()
+                return 0
+            pipe.multi()
+            pipe.hdel(self._key('results'), *unchanged)
+            pipe.execute()
+            return len(unchanged)
+        return self._transaction(clear, self._key('results'))
+
+    def failures(self) -> List[tuple]:
+        return list(self.client.hgetall(self._key('failed')).items())
+
+def open_queue(location: str, name: str = DEFAULT_QUEUE_NAME,
+               max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> WorkQueue:
+    """A RedisWorkQueue for ``redis://``/``rediss://``/``unix://`` URLs, otherwise a SQLite file."""
+    if location.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisWorkQueue.from_url(location, name, max_attempts)
+    return SQLiteWorkQueue(location, name, max_attempts)
+
+# Coordinator: discovery to tasks
+
+def download_task(jurisdiction: str, url: str, filepath: Union[str, Path], meeting_id: str,
+                  meeting_date: date, meeting_type: Optional[str], validators: Optional[str] = None,
+                  blob_dir: Optional[str] = None) -> Task:
+    """
+    Task that downloads one document and records it in the manifest.
+
+    ``validators`` and ``blob_dir`` name the ValidatorStore file and
+    BlobStore directory the jurisdiction's own crawler would use.
+    """
+    return Task(f"{jurisdiction}|{meeting_id}|{url}", 'download',
+                {'jurisdiction': jurisdiction, 'url': url, 'filepath': str(filepath),
+                 'meeting_id': meeting_id, 'meeting_date': meeting_date.isoformat(),
+                 'meeting_type': meeting_type, 'validators': validators, 'blob_dir': blob_dir})
+
+def discover_tasks(config, start: date, end: date) -> Iterator[Task]:
+    """
+    Yield the tasks for one registry entry (see scheduler.JurisdictionConfig).
+
+    IQM2 and browserless BoardDocs entries yield a download task per
+    document. Selenium BoardDocs entries yield a task per meeting, since
+    each one needs a browser on the worker.
+    """
+    jurisdiction = config.manifest_name
+    options = config.options
+    if config.kind == 'iqm2':
+        from iqm2_client import VALIDATOR_FILE, IQM2Client
+        client = IQM2Client(options['subdomain'])
+        validators = str(Path(options['output_dir']) / VALIDATOR_FILE)
+        for job in client.iter_packet_jobs(start, end, Path(options['output_dir'])):
+            meeting = job.context
+            yield download_task(jurisdiction, job.url, job.filepath, meeting.meeting_id, meeting.date,
+                                meeting.meeting_type, validators=validators, blob_dir=options.get('blob_dir'))
+    elif config.kind == 'boarddocs':
+        from boarddocs_client import BOARDDOCS_HOST, BoardDocsClient
+        client = BoardDocsClient(options['site'], options.get('committee_id'),
+                                 host=options.get('host', BOARDDOCS_HOST))
+        for job in client.iter_download_jobs(client.list_meetings(start, end), options['output_dir']):
+            meeting = job.context
+            yield download_task(jurisdiction, job.url, job.filepath, meeting.meeting_id, meeting.date,
+                                meeting.name, blob_dir=options.get('blob_dir'))
+    elif options.get('script') == 'download_boarddocs.py':
+        from boarddocs_events import cached_events
+        import download_boarddocs
+        events = cached_events(options.get('event_cache', '.boarddocs_events.json'), download_boarddocs.BASE_URL,
+                               lambda: download_boarddocs.fetch_events(download_boarddocs.BASE_URL,
+                                                                       download_boarddocs.OUTPUT_DIR))
+        for j, event, event_date in download_boarddocs.select_events(events, start, end):
+            yield Task(f"{jurisdiction}|{event.get('url')}", 'boarddocs_event',
+                       {'index': j, 'event': event, 'event_date': event_date.isoformat()})
+    else:
+        logger.warning(f"{config.name}: {options.get('script')} cannot be split into queue tasks, skipping")
+
+# Workers
+
+class _RecordingManifest:
+    """Passes writes through to a Manifest and keeps a copy of each row for the task result."""
+
+    def __init__(self, manifest: Manifest):
+        self.manifest = manifest
+        self.records: List[Dict[str, Any]] = []
+
+    def record(self, jurisdiction: str, meeting_id: str, meeting_date: Union[date, str], url: str,
+               status: str, meeting_type: Optional[str] = None, filepath: Optional[str] = None,
+               sha256: Optional[str] = None, size: Optional[int] = None) -> None:
+        self.manifest.record(jurisdiction, meeting_id, meeting_date, url, status, meeting_type=meeting_type,
+                             filepath=filepath, sha256=sha256, size=size)
+        if isinstance(meeting_date, date):
+            meeting_date = meeting_date.strftime('%Y-%m-%d')
+        self.records.append({'jurisdiction': jurisdiction, 'meeting_id': str(meeting_id),
+                             'meeting_date': meeting_date, 'url': url, 'status': status,
+                             'meeting_type': meeting_type, 'filepath': filepath, 'sha256': sha256, 'size': size})
+
+    record_result = Manifest.record_result
+
+class TaskRunner:
+    """Runs claimed tasks in one worker process, keeping a browser around for Selenium tasks."""
+
+    def __init__(self, worker_id: str, manifest: Manifest, recycle_after: int = 50):
+        self.worker_id = worker_id
+        self.manifest = manifest
+        self.recycle_after = recycle_after
+        self._driver = None
+        self._driver_uses = 0
+        self._validators: Dict[str, Any] = {}
+        self._blob_stores: Dict[str, Any] = {}
+
+    def close(self) -> None:
+        if self._driver is not None:
+            self._driver.quit()
+            self._driver = None
+
+    def run(self, task: Task) -> List[Dict[str, Any]]:
+        """
+        Do one task; raises on failure.
+
+        Returns:
+            The manifest rows the task recorded.
+        """
+        manifest = _RecordingManifest(self.manifest)
+        if task.kind == 'download':
+            self._download(task.payload, manifest)
+        elif task.kind == 'boarddocs_event':
+            self._boarddocs_event(task.payload, manifest)
+        else:
+            raise ValueError(f"Unknown task kind {task.kind!r}")
+        return manifest.records
+
+    def _stores(self, payload: Dict[str, Any]) -> tuple:
+        """The ValidatorStore and BlobStore named in a download task, opened once per worker."""
+        from blob_store import BlobStore
+        from download_utils import ValidatorStore
+        validators = blob_store = None
+        if payload.get('validators'):
+            path = payload['validators']
+            if path not in self._validators:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                self._validators[path] = ValidatorStore(path)
+            validators = self._validators[path]
+        if payload.get('blob_dir'):
+            path = payload['blob_dir']
+            if path not in self._blob_stores:
+                self._blob_stores[path] = BlobStore(path)
+            blob_store = self._blob_stores[path]
+        return validators, blob_store
+
+    def _download(self, payload: Dict[str, Any], manifest: _RecordingManifest) -> None:
+        from download_utils import download_file
+        from retry_policy import get_retry_policy
+        filepath = Path(payload['filepath'])
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        validators, blob_store = self._stores(payload)
+        try:
+            result = get_retry_policy().call(download_file, payload['url'], filepath, show_progress=False,
+                                             resume=True, validators=validators, blob_store=blob_store,
+                                             url=payload['url'])
+        except Exception:
+            manifest.record(payload['jurisdiction'], payload['meeting_id'], payload['meeting_date'],
+                            payload['url'], 'failed', meeting_type=payload['meeting_type'])
+            raise
+        manifest.record_result(payload['jurisdiction'], payload['meeting_id'], payload['meeting_date'],
+                               result, meeting_type=payload['meeting_type'])
+
+    def _boarddocs_event(self, payload: Dict[str, Any], manifest: _RecordingManifest) -> None:
+        import download_boarddocs
+        if self._driver is not None and self._driver_uses >= self.recycle_after:
+            self.close()
+        if self._driver is None:
+            incoming = os.path.join(download_boarddocs.OUTPUT_DIR, ".incoming", self.worker_id)
+            self._driver = download_boarddocs.make_driver(incoming)
+            self._driver_uses = 0
+        self._driver_uses += 1
+        task = (payload['index'], payload['event'], date.fromisoformat(payload['event_date']))
+        try:
+            download_boarddocs.download_event_agenda(self._driver, task, download_boarddocs.OUTPUT_DIR,
+                                                     manifest)
+        except Exception:
+            # The browser may be wedged; start a fresh one for the next task
+            self.close()
+            raise
+
+class _Heartbeat(threading.Thread):
+    """Renews a task's lease until stopped."""
+
+    def __init__(self, queue: WorkQueue, task: Task, worker_id: str, lease_seconds: float):
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.task = task
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.lease_seconds / 3):
+            try:
+                if not self.queue.heartbeat(self.task, self.worker_id, self.lease_seconds):
+                    logger.warning(f"Lost the lease on {self.task.task_id}")
+                    return
+            except Exception as e:
+                logger.warning(f"Heartbeat for {self.task.task_id} failed: {e}")
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+def run_worker(queue: WorkQueue, worker_id: str, manifest: Manifest,
+               lease_seconds: float = DEFAULT_LEASE_SECONDS, max_tasks: Optional[int] = None,
+               wait: bool = False) -> Dict[str, int]:
+    """
+    Claim and run tasks until the queue is drained.
+
+    Args:
+        queue: Queue to work from
+        worker_id: Name this worker holds leases under (unique per process)
+        manifest: Where results are recorded
+        lease_seconds: Lease length; renewed every third of it while a task runs
+        max_tasks: Stop after this many tasks
+        wait: Keep polling for new tasks instead of exiting once the queue is empty
+
+    Returns:
+        Counts of tasks done, requeued and failed by this worker, and of
+        tasks finished after their lease had passed to another worker.
+    """
+    from retry_policy import CircuitOpenError, is_retryable
+    metrics = get_metrics()
+    runner = TaskRunner(worker_id, manifest)
+    stats = {'done': 0, 'requeued': 0, 'failed': 0, 'lost': 0}
+    try:
+        while max_tasks is None or sum(stats.values()) < max_tasks:
+            task = queue.claim(worker_id, lease_seconds)
+            if task is None:
+                counts = queue.counts()
+                if not wait and not counts['pending'] and not counts['leased']:
+                    break
+                # Other workers still hold leases that may expire back to us
+                time.sleep(POLL_INTERVAL)
+                continue
+            heartbeat = _Heartbeat(queue, task, worker_id, lease_seconds)
+            heartbeat.start()
+            try:
+                records = runner.run(task)
+            except Exception as e:
+                heartbeat.stop()
+                retry = is_retryable(e) or isinstance(e, CircuitOpenError) or task.kind == 'boarddocs_event'
+                status = queue.fail(task, worker_id, str(e), retry=retry)
+                logger.error(f"{task.task_id} failed (attempt {task.attempts}): {e}; now {status}")
+                outcome = 'requeued' if status == 'pending' else 'failed'
+            else:
+                heartbeat.stop()
+                if queue.complete(task, worker_id, {'records': records}):
+                    outcome = 'done'
+                else:
+                    # The lease expired mid-run; the task is someone else's now
+                    logger.warning(f"{task.task_id} finished after its lease was lost; not marked done")
+                    outcome = 'lost'
+            stats[outcome] += 1
+            metrics.inc('queue_tasks_total', kind=task.kind, result=outcome)
+    finally:
+        runner.close()
+    return stats
+
+def _per_worker_path(path: Optional[str], worker_id: str) -> Optional[str]:
+    if not path:
+        return path
+    path = Path(path)
+    return str(path.with_name(f"{path.stem}.{worker_id}{path.suffix}"))
+
+def _worker_process(location: str, name: str, worker_id: str, args: argparse.Namespace) -> None:
+    logging.basicConfig(level=logging.INFO, format=f'%(asctime)s - {worker_id} - %(levelname)s - %(message)s')
+    if args.processes > 1:
+        # One report per worker process instead of each overwriting the last
+        args = argparse.Namespace(**vars(args))
+        args.metrics_report = _per_worker_path(args.metrics_report, worker_id)
+        args.prometheus_textfile = _per_worker_path(args.prometheus_textfile, worker_id)
+        if args.profile:
+            args.profile_output = _per_worker_path(args.profile_output or f"{args.profile}.prof", worker_id)
+    configure_metrics(args)
+    with open_queue(location, name, args.max_attempts) as queue, Manifest(args.manifest) as manifest:
+        try:
+            stats = run_worker(queue, worker_id, manifest, args.lease, args.max_tasks, args.wait)
+            logger.info(f"Worker finished: {stats}")
+        finally:
+            write_run_report(args, {'worker_id': worker_id})
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Distributed crawl work queue")
+    parser.add_argument('--queue', default=DEFAULT_QUEUE_PATH,
+                        help=f'SQLite file or redis:// URL of the queue (default: {DEFAULT_QUEUE_PATH})')
+    parser.add_argument('--queue-name', default=DEFAULT_QUEUE_NAME,
+                        help='Name of the queue, so one server can hold several (default: crawl)')
+    parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help='Claims before a task is marked failed')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    enqueue = commands.add_parser('enqueue', help='Discover documents and enqueue a task for each')
+    enqueue.add_argument('--registry', default='jurisdictions.json', help='Jurisdiction registry file')
+    enqueue.add_argument('--only', action='append', help='Only enqueue this jurisdiction (repeatable)')
+    add_window_arguments(enqueue)
+
+    work = commands.add_parser('work', help='Claim and run tasks')
+    work.add_argument('--processes', type=int, default=1, help='Worker processes on this host')
+    work.add_argument('--lease', type=float, default=DEFAULT_LEASE_SECONDS,
+                      help=f'Lease length in seconds (default: {DEFAULT_LEASE_SECONDS:.0f})')
+    work.add_argument('--max-tasks', type=int, help='Stop each worker after this many tasks')
+    work.add_argument('--wait', action='store_true', help='Keep waiting for tasks when the queue is empty')
+    work.add_argument('--manifest', default=DEFAULT_MANIFEST_PATH,
+                      help=f'Path of the SQLite crawl manifest (default: {DEFAULT_MANIFEST_PATH})')
+    add_metrics_arguments(work)
+
+    collect = commands.add_parser('collect', help="Record the workers' results in this host's manifest")
+    collect.add_argument('--manifest', default=DEFAULT_MANIFEST_PATH,
+                         help=f'Path of the SQLite crawl manifest (default: {DEFAULT_MANIFEST_PATH})')
+
+    commands.add_parser('status', help='Show task counts and failures')
+    args = parser.parse_args(argv)
+
+    if args.command == 'enqueue':
+        from scheduler import load_registry
+        configs = load_registry(args.registry)
+        if args.only:
+            configs = [c for c in configs if c.name in args.only]
+        else:
+            configs = [c for c in configs if c.enabled]
+        with open_queue(args.queue, args.queue_name, args.max_attempts) as queue, \
+                Manifest(args.manifest) as manifest:
+            for config in configs:
+                start, end = resolve_window(args, manifest, config.manifest_name)
+                added = 0
+                batch: List[Task] = []
+                for task in discover_tasks(config, start, end):
+                    batch.append(task)
+                    if len(batch) >= 100:
+                        added += queue.enqueue(batch)
+                        batch = []
+                added += queue.enqueue(batch)
+                logger.info(f"{config.name}: queued {added} tasks ({start} to {end})")
+            logger.info(f"Queue: {queue.counts()}")
+    elif args.command == 'work':
+        host = socket.gethostname()
+        workers = []
+        context = multiprocessing.get_context('spawn')
+        for i in range(args.processes):
+            worker_id = f"{host}-{os.getpid()}-{i}"
+            process = context.Process(target=_worker_process,
+                                      args=(args.queue, args.queue_name, worker_id, args))
+            process.start()
+            workers.append(process)
+        for process in workers:
+            process.join()
+        return 0 if all(p.exitcode == 0 for p in workers) else 1
+    elif args.command == 'collect':
+        with open_queue(args.queue, args.queue_name, args.max_attempts) as queue, \
+                Manifest(args.manifest) as manifest:
+            results = queue.results()
+            count = 0
+            for result in results.values():
+                for record in result.get('records', []):
+                    manifest.record(**record)
+                    count += 1
+            # Recorded results are dropped so the next collect does not touch those rows again
+            queue.clear_results(results)
+        logger.info(f"Recorded {count} documents from {len(results)} tasks in {args.manifest}")
+    else:
+        with open_queue(args.queue, args.queue_name, args.max_attempts) as queue:
+            counts = queue.counts()
+            print(', '.join(f"{state}: {count}" for state, count in counts.items()))
+            for task_id, error in queue.failures():
+                print(f"  failed {task_id}: {error}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())